@@ -3,40 +3,91 @@ AB Race Translator Package
 
 A Python package for translating AB Racing messages from C++ LOGAB structures.
 Converted from C++ ABRace.cpp and related files.
+
+Submodules are imported on first attribute access (PEP 562), so importing
+the package alone stays cheap for short-lived batch jobs.
 """
 
-from .ab_race import ABRace
-from .ab_msg_translator import ABMsgTranslator
-from .data_structures import Msg, LogabHdr, LogabRac, LogabData
-from .constants import *
+# Public attribute -> submodule that defines it
+_LAZY_ATTRS = {
+    'ABRace': '.ab_race',
+    'ABMsgTranslator': '.ab_msg_translator',
+    'Msg': '.data_structures',
+    'LogabHdr': '.data_structures',
+    'LogabRac': '.data_structures',
+    'LogabData': '.data_structures',
+}
+
+# Constants re-exported from the constants module
+_CONSTANTS = [
+    'BETTYP_WINPLA', 'BETTYP_WIN', 'BETTYP_PLA', 'BETTYP_QIN', 'BETTYP_QPL',
+    'BETTYP_DBL', 'BETTYP_TCE', 'BETTYP_FCT', 'BETTYP_QTT', 'BETTYP_DQN',
+    'BETTYP_TBL', 'BETTYP_TTR', 'BETTYP_6UP', 'BETTYP_DTR', 'BETTYP_TRIO',
+    'BETTYP_QINQPL', 'BETTYP_CV', 'BETTYP_MK6', 'BETTYP_PWB', 'BETTYP_AUP',
+    'BETTYP_FF', 'BETTYP_BWA', 'BETTYP_CWA', 'BETTYP_CWB', 'BETTYP_CWC',
+    'BETTYP_IWN',
+    'LOGAB_CODE_RAC',
+    'STORE_TYPE_STRING', 'STORE_TYPE_INTEGER', 'STORE_TYPE_CHAR'
+]
+
+
+def __getattr__(name):
+    """
+    Import the submodule defining a public attribute on first access.
+
+    Any other constant of the constants module is also resolved here, as
+    the former star import made them package attributes.
+
+    Args:
+        name: Attribute name
 
-def create_ab_race():
+    Returns:
+        Any: Attribute value, cached in the package namespace
+    """
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        if name.startswith('_'):
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        module_name = '.constants'
+    from importlib import import_module
+    module = import_module(module_name, __name__)
+    try:
+        value = getattr(module, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+def create_ab_race(tz=None):
     """
     Factory function to create an ABRace translator instance.
-    
+
+    Args:
+        tz: Timezone of the formatted message times (datetime.tzinfo),
+            None for local time
+
     Returns:
         ABRace: Configured race translator instance
     """
-    return ABRace()
+    from .ab_race import ABRace
+    return ABRace(tz=tz)
 
 __version__ = "1.0.0"
 __author__ = "Converted from C++ ABRace"
 
 __all__ = [
     'ABRace',
-    'ABMsgTranslator', 
+    'ABMsgTranslator',
     'Msg',
     'LogabHdr',
     'LogabRac',
     'LogabData',
     'create_ab_race',
     # Constants
-    'BETTYP_WINPLA', 'BETTYP_WIN', 'BETTYP_PLA', 'BETTYP_QIN', 'BETTYP_QPL',
-    'BETTYP_DBL', 'BETTYP_TCE', 'BETTYP_FCT', 'BETTYP_QTT', 'BETTYP_DQN',
-    'BETTYP_TBL', 'BETTYP_TTR', 'BETTYP_6UP', 'BETTYP_DTR', 'BETTYP_TRIO',
-    'BETTYP_QINQPL', 'BETTYP_CV', 'BETTYP_MK6', 'BETTYP_PWB', 'BETTYP_AUP',
-    'BETTYP_FF', 'BETTYP_BWA', 'BETTYP_CWA', 'BETTYP_CWB', 'BETTYP_CWC',
-    'BETTYP_IWN',
-    'LOGAB_CODE_RAC',
-    'STORE_TYPE_STRING', 'STORE_TYPE_INTEGER', 'STORE_TYPE_CHAR'
+    *_CONSTANTS,
 ]
@@ -5,10 +5,174 @@ Converted from C++ ABMsgTranslator.cpp
 Provides base functionality for message translation with field formatting.
 """
 
-import time
-from typing import List, Optional, Union
+from datetime import tzinfo
+from typing import List, Optional, Tuple, Union
+from . import metrics as _metrics
 from .constants import *
 from .data_structures import Msg, Logab, StructParser
+from .utils import TimestampFormatter
+
+
+class FieldBlock(str):
+    """
+    Pre-delimited run of constant output fields.
+
+    Renders as the fields joined with DELIMITER, so a block of constant
+    fields is appended to a record once instead of field by field. The
+    individual values stay available through fields for consumers that
+    need them one by one (field counts, columnar output).
+    """
+
+    __slots__ = ("fields",)
+
+    def __new__(cls, fields) -> "FieldBlock":
+        """
+        Build a block.
+
+        Args:
+            fields: Field values in output order, at least one
+
+        Returns:
+            FieldBlock: Pre-delimited block
+        """
+        fields = tuple(fields)
+        if not fields:
+            raise ValueError("A field block needs at least one field")
+        block = super().__new__(cls, DELIMITER.join(map(str, fields)))
+        block.fields = fields
+        return block
+
+
+class RecordBuilder:
+    """
+    Per-message output record builder.
+
+    Collects field values in a list and joins them once when the record is
+    rendered, so building a record costs O(fields) regardless of how many
+    messages the owning translator has already processed. Values keep their
+    type (integer fields stay int) until rendering, so columnar consumers
+    can read typed values through fields without re-parsing text. Runs of
+    constant fields can be appended as a single precomputed FieldBlock.
+
+    Delimiters follow the C++ AddField rules: the first field is the record
+    separator and is never emitted, the second and third fields are joined
+    with DELIMITER_SIM_SEL and every later field is preceded by DELIMITER.
+    """
+
+    __slots__ = ("_fields", "_blocks")
+
+    def __init__(self):
+        """Initialize an empty record."""
+        self._fields: List[Union[int, str]] = []
+        self._blocks = 0
+
+    def reset(self):
+        """Discard the current record and start a new one."""
+        self._fields.clear()
+        self._blocks = 0
+
+    def truncate(self, count: int):
+        """
+        Drop every field after the first count fields.
+
+        Args:
+            count: Number of fields to keep
+        """
+        if self._blocks:
+            self._fields[:] = self.fields[:count]
+            self._blocks = 0
+        else:
+            del self._fields[count:]
+
+    def append(self, val: Union[int, str]):
+        """
+        Append one field value to the record.
+
+        Args:
+            val: Field value, rendered with str() unless already a string
+        """
+        self._fields.append(val)
+
+    def extend(self, vals):
+        """
+        Append several field values to the record.
+
+        Args:
+            vals: Field values in output order
+        """
+        self._fields.extend(vals)
+
+    def append_block(self, block: FieldBlock):
+        """
+        Append a precomputed block of constant fields.
+
+        Args:
+            block: Field block
+        """
+        self._fields.append(block)
+        self._blocks += 1
+
+    @property
+    def count(self) -> int:
+        """int: Number of fields added to the current record."""
+        if self._blocks:
+            return len(self.fields)
+        return len(self._fields)
+
+    @property
+    def fields(self) -> List[Union[int, str]]:
+        """List[Union[int, str]]: Field values of the current record, blocks expanded."""
+        if not self._blocks:
+            return self._fields
+        fields: List[Union[int, str]] = []
+        for val in self._fields:
+            if type(val) is FieldBlock:
+                fields.extend(val.fields)
+            else:
+                fields.append(val)
+        return fields
+
+    def tail(self, start: int) -> Tuple[tuple, int]:
+        """
+        Get the fields and blocks appended after the first start entries.
+
+        Every block of the record must be among them, i.e. no block may
+        have been appended within the first start entries.
+
+        Args:
+            start: Number of leading fields to skip
+
+        Returns:
+            Tuple[tuple, int]: Entries as appended, and how many of them
+                are blocks; see extend_run
+        """
+        return tuple(self._fields[start:]), self._blocks
+
+    def extend_run(self, run: tuple, blocks: int):
+        """
+        Append entries taken from a record by tail.
+
+        Args:
+            run: Fields and blocks in output order
+            blocks: Number of blocks in run
+        """
+        self._fields.extend(run)
+        self._blocks += blocks
+
+    def getvalue(self) -> str:
+        """
+        Render the current record as a delimited string.
+
+        Returns:
+            str: Delimited record
+        """
+        fields = self._fields
+        if len(fields) < 3:
+            return str(fields[1]) if len(fields) == 2 else ""
+        return str(fields[1]) + DELIMITER_SIM_SEL + DELIMITER.join(map(str, fields[2:]))
+
+    def __len__(self) -> int:
+        return self.count
 
 
 class ABMsgTranslator:
@@ -17,14 +181,21 @@ class ABMsgTranslator:
     Converted from C++ ABMsgTranslator class.
     """
     
-    def __init__(self):
-        """Initialize the translator."""
-        self.buf = ""
-        self.m_iCount = 0
+    def __init__(self, tz: Optional[tzinfo] = None):
+        """
+        Initialize the translator.
+
+        Args:
+            tz: Timezone of the formatted message times, None for local time
+        """
+        self.record = RecordBuilder()
         self.m_iLoggerMsgOrderNo = 1
         self.m_lLoggerTapeId = 1
         self.m_iTerminalType = 0
         
+        # Cached date/time formatting, shared by all time fields
+        self.time_formatter = TimestampFormatter(tz)
+        
         # Header fields
         self.m_iSysNo = 0
         self.m_iMsgOrderNo = 0
@@ -81,18 +252,40 @@ class ABMsgTranslator:
         self.m_iBatchDep = 0
         self.m_iCallSeq = 0
 
-    def translate_header(self, msg: Msg) -> str:
+    @property
+    def buf(self) -> str:
+        """str: Delimited output of the message currently being translated."""
+        return self.record.getvalue()
+
+    @property
+    def m_iCount(self) -> int:
+        """int: Number of fields added to the current output record."""
+        return self.record.count
+
+    def begin_message(self):
+        """
+        Start a new output record.
+
+        Called at every translation entry point so that a long-lived
+        translator only ever holds the fields of the current message.
+        """
+        self.record.reset()
+
+    def translate_header(self, msg: Msg, pMlog: Optional[Logab] = None) -> str:
         """
         Translate message header.
         
         Args:
             msg: Input message
+            pMlog: Already decoded message, parsed from msg if not given
             
         Returns:
             str: Translated header or error message
         """
+        self.begin_message()
         try:
-            pMlog = StructParser.parse_logab_from_msg(msg)
+            if pMlog is None:
+                pMlog = StructParser.parse_logab_from_msg(msg)
             
             if (msg.m_iMsgErrwu != 0) and (pMlog.hdr.codewu != LOGAB_CODE_ACA):
                 self.get_error(pMlog, msg)
@@ -106,6 +299,7 @@ class ABMsgTranslator:
             
             return self.buf
         except Exception as e:
+            _metrics.record_exception("ABMsgTranslator.translate_header", e)
             return ""
 
     def translate_action(self, msg: Msg) -> str:
@@ -126,10 +320,35 @@ class ABMsgTranslator:
         
         return NOT_IMPLEMENTED
 
+    def translate_logab(self, pMlog: Logab, msg: Msg) -> str:
+        """
+        Translate the action of an already decoded message.
+        
+        Called by translate() with the Logab that was used for the header
+        check, so the message buffer is decoded only once. Derived classes
+        override this together with translate_action.
+        
+        Args:
+            pMlog: Decoded message
+            msg: Input message
+            
+        Returns:
+            str: NOT_IMPLEMENTED for base class
+        """
+        hdr_err = self.translate_header(msg, pMlog)
+        
+        if hdr_err and DELIMITER in hdr_err:
+            return hdr_err  # Error message
+        
+        return NOT_IMPLEMENTED
+
     def translate(self, msg_type: int, msg: Msg) -> str:
         """
         Main translation method.
         
+        The message is decoded once; the header check and the action
+        translation share the decoded Logab.
+        
         Args:
             msg_type: Message type code
             msg: Input message
@@ -137,13 +356,20 @@ class ABMsgTranslator:
         Returns:
             str: Translated message
         """
-        hdr_err = self.translate_header(msg)
+        try:
+            pMlog = StructParser.parse_logab_from_msg(msg)
+        except Exception as e:
+            _metrics.record_exception("ABMsgTranslator.translate", e)
+            # Undecodable buffer: let translate_action report the failure
+            self.begin_message()
+            return self.translate_action(msg)
+        
+        hdr_err = self.translate_header(msg, pMlog)
         
         if hdr_err and DELIMITER in hdr_err:
             return hdr_err  # Error message
             
-        buf_msg = self.translate_action(msg)
-        return buf_msg
+        return self.translate_logab(pMlog, msg)
 
     def pack_header(self, store_proc_name: str, pMlog: Logab, msg: Msg):
         """
@@ -154,14 +380,11 @@ class ABMsgTranslator:
             pMlog: LOGAB structure
             msg: Input message
         """
-        months = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        
         self.m_iSysNo = msg.m_iSysNo
         self.m_iMsgOrderNo = self.m_iLoggerMsgOrderNo
         self.m_sSysName = msg.m_iSysName
         
-        self.m_sSellingDate = f"{msg.m_iMsgDay:02d}-{months[msg.m_iMsgMonth]}-{msg.m_iMsgYear}"
+        self.m_sSellingDate = self.time_formatter.format_date(msg.m_iMsgDay, msg.m_iMsgMonth, msg.m_iMsgYear)
         
         self.m_iMsgSize = pMlog.hdr.sizew
         self.m_iMsgCode = pMlog.hdr.codewu
@@ -182,9 +405,7 @@ class ABMsgTranslator:
         self.m_iMsnNo = pMlog.hdr.msnlu
         
         # Format time
-        tm_time = time.localtime(msg.m_iMsgTime)
-        month_name = months[tm_time.tm_mon] if tm_time.tm_mon < len(months) else "Jan"
-        self.m_sTime = f"{tm_time.tm_mday:02d}-{month_name}-{tm_time.tm_year} {tm_time.tm_hour:02d}:{tm_time.tm_min:02d}:{tm_time.tm_sec:02d}"
+        self.m_sTime = self.time_formatter.format_datetime(msg.m_iMsgTime)
         
         # Initialize source-specific fields
         self.m_iSourceType = getattr(pMlog.hdr, 'srcTypebu', 0)
@@ -287,7 +508,7 @@ class ABMsgTranslator:
         elif val < -2147483647:
             r_val = -2147483647
             
-        self.add_field_string(str(r_val), output)
+        self.record.append(r_val)
 
     def add_field_64(self, val: int, output: int):
         """
@@ -297,7 +518,7 @@ class ABMsgTranslator:
             val: 64-bit value to add
             output: Output flag (unused)
         """
-        self.add_field_string(str(val), output)
+        self.record.append(val)
 
     def add_field_string(self, val: str, output: int):
         """
@@ -307,15 +528,7 @@ class ABMsgTranslator:
             val: String value to add
             output: Output flag (unused)
         """
-        if self.m_iCount == 2:
-            self.buf += DELIMITER_SIM_SEL
-        elif self.m_iCount > 2:
-            self.buf += DELIMITER
-            
-        if self.m_iCount >= 1:
-            self.buf += val
-            
-        self.m_iCount += 1
+        self.record.append(val)
 
     def get_error(self, pMlog: Logab, msg: Msg):
         """
@@ -326,13 +539,10 @@ class ABMsgTranslator:
             msg: Input message
         """
         # Simplified error handling
-        months = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        
         self.m_iSysNo = msg.m_iSysNo
         self.m_iMsgOrderNo = self.m_iLoggerMsgOrderNo
         self.m_sSysName = msg.m_iSysName
-        self.m_sSellingDate = f"{msg.m_iMsgDay:02d}-{months[msg.m_iMsgMonth]}-{msg.m_iMsgYear}"
+        self.m_sSellingDate = self.time_formatter.format_date(msg.m_iMsgDay, msg.m_iMsgMonth, msg.m_iMsgYear)
         
         # Add error fields
         self.add_field(0, 0)
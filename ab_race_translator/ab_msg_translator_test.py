@@ -0,0 +1,90 @@
+import pytest
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.ab_msg_translator import FieldBlock, RecordBuilder
+from ab_race_translator.data_structures import StructParser, create_sample_msg
+
+
+def test_record_builder_delimiters():
+    record = RecordBuilder()
+    assert record.getvalue() == ""
+
+    record.append("0")
+    assert record.getvalue() == ""
+
+    record.append("6")
+    assert record.getvalue() == "6"
+
+    record.append("AB")
+    record.append("1")
+    record.append("15-Jun-2024")
+    assert record.getvalue() == "6@|@AB~|~1~|~15-Jun-2024"
+    assert record.count == 5
+
+    record.reset()
+    assert record.count == 0
+    assert record.getvalue() == ""
+
+
+def test_reused_translator_output_does_not_grow():
+    translator = create_ab_race()
+    msg = create_sample_msg()
+
+    first = translator.translate_action(msg)
+    field_count = translator.m_iCount
+
+    for _ in range(100):
+        result = translator.translate_action(msg)
+
+    assert result == first
+    assert translator.m_iCount == field_count
+    assert translator.buf == first
+
+
+def test_translate_header_does_not_return_previous_record():
+    translator = create_ab_race()
+    msg = create_sample_msg()
+
+    translator.translate_action(msg)
+
+    assert translator.translate_header(msg) == ""
+
+
+def test_field_block_renders_and_expands():
+    block = FieldBlock([0, "0000", 0])
+    assert block == "0~|~0000~|~0"
+
+    record = RecordBuilder()
+    record.extend(["0", 6, "AB"])
+    record.append_block(block)
+    record.append(7)
+
+    assert record.getvalue() == "6@|@AB~|~0~|~0000~|~0~|~7"
+    assert record.count == 7
+    assert record.fields == ["0", 6, "AB", 0, "0000", 0, 7]
+
+    record.truncate(4)
+    assert record.fields == ["0", 6, "AB", 0]
+    assert record.getvalue() == "6@|@AB~|~0"
+
+
+def test_translate_parses_message_once(monkeypatch):
+    parse = StructParser.parse_logab_from_msg
+    calls = []
+
+    def counting_parse(msg):
+        calls.append(msg)
+        return parse(msg)
+
+    translator = create_ab_race()
+    msg = create_sample_msg()
+    expected = translator.translate(6, msg)
+
+    monkeypatch.setattr(StructParser, "parse_logab_from_msg", staticmethod(counting_parse))
+    assert translator.translate(6, msg) == expected
+    assert len(calls) == 1
+
+    msg.m_iMsgErrwu = 1
+    calls.clear()
+    translator.translate(6, msg)
+    assert len(calls) == 1
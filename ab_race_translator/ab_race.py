@@ -5,25 +5,133 @@ Converted from C++ ABRace.cpp
 Handles translation of racing bet messages from LOGAB format to delimited string format.
 """
 
-import time
 import math
-from typing import List, Optional
-from .ab_msg_translator import ABMsgTranslator
+from datetime import tzinfo
+from time import perf_counter_ns
+from typing import Iterable, Iterator, List, Optional
+from . import metrics as _metrics
+from .ab_msg_translator import ABMsgTranslator, FieldBlock
+from .columnar import ColumnarBatch
 from .constants import *
-from .data_structures import Msg, Logab, StructParser
+from .data_structures import BatchResult, Msg, Logab, LogabData, StructParser, as_byte_buffer
+from .memo import TranslationMemo
+from .schema import RECORD_VALUE_OFFSET, VALUE_FIELDS
 from .utils import DeSelMap
 
 
+# Allup output layout: events per bet and output fields per event
+ALLUP_MAX_EVENTS = 6
+ALLUP_EVENT_FIELDS = 9
+
+# Standard/exotic bet fields (race no. and indicators), zero for allup bets
+STANDARD_BET_FIELDS = 6
+
+# Precomputed constant output segments, see FieldBlock
+# Allup block of a standard bet: event count, formula and all event fields
+_EMPTY_ALLUP_BLOCK = FieldBlock([0] * (2 + ALLUP_MAX_EVENTS * ALLUP_EVENT_FIELDS))
+
+# Allup bet with n events: unused event fields and the standard bet fields
+_ALLUP_TAIL_BLOCKS = tuple(
+    FieldBlock([0] * ((ALLUP_MAX_EVENTS - n) * ALLUP_EVENT_FIELDS + STANDARD_BET_FIELDS))
+    for n in range(ALLUP_MAX_EVENTS + 1)
+)
+
+# Banker counts
+_EMPTY_BANKER_BLOCK = FieldBlock([0, 0, 0])
+
+# Allup bet with n < 6 events: bitmaps of the unused events
+_ALLUP_BITMAP_PADDING = tuple(
+    FieldBlock(["0000"] * (ALLUP_MAX_EVENTS - n)) for n in range(ALLUP_MAX_EVENTS)
+)
+
+# Record fields before the first racing field, i.e. those added by pack_header
+_RACING_FIELD_OFFSET = RECORD_VALUE_OFFSET + VALUE_FIELDS.index("meeting_date")
+
+# Two-digit uppercase hex of every byte, for 16-bit bitmap fields
+_HEX_BYTE = tuple(f"{b:02X}" for b in range(256))
+
+
+def _hex16(bitmap: int) -> str:
+    """
+    Format a selection bitmap as 4 hex digits, "0000" if it exceeds 16 bits.
+    
+    Args:
+        bitmap: Selection bitmap
+        
+    Returns:
+        str: Hex bitmap
+    """
+    if bitmap > 0xFFFF:
+        return "0000"
+    return _HEX_BYTE[bitmap >> 8] + _HEX_BYTE[bitmap & 0xFF]
+
+
+def _clamp32(val: int) -> int:
+    """
+    Clamp an integer field value the way ABMsgTranslator.add_field does.
+    
+    Args:
+        val: Field value
+        
+    Returns:
+        int: Value limited to +/-2147483647
+    """
+    if val > 2147483647:
+        return 2147483647
+    if val < -2147483647:
+        return -2147483647
+    return val
+
+
 class ABRace(ABMsgTranslator):
     """
     Racing message translator.
     Converted from C++ ABRace class.
     """
     
-    def __init__(self):
-        """Initialize the race translator."""
-        super().__init__()
+    # Methods whose behaviour the specialized translators reproduce; a
+    # subclass overriding any of them keeps the generic path
+    _SPECIALIZED_HOOKS = (
+        "_process_bet_type_data", "_format_meeting_date", "_build_output_string",
+        "_add_allup_fields", "_add_standard_fields", "_add_bitmap_fields",
+        "get_bet_type", "get_formula",
+    )
+    
+    def __init__(self, memo: Optional[TranslationMemo] = None, specialized: bool = True,
+                 tz: Optional[tzinfo] = None):
+        """
+        Initialize the race translator.
+        
+        Args:
+            memo: Optional memo of rendered racing fields, reused for
+                retransmitted bet bodies. It is consulted by translate_action,
+                translate_iter and translate_batch only: translate() and
+                translate_logab work on an already decoded message and
+                always translate in full. The racing m_* attributes are not
+                refreshed when a message is served from the memo.
+            specialized: Translate the bet families of specialized.py with
+                their generated translators; False always takes the generic
+                path. Output is identical either way.
+            tz: Timezone of the formatted message times, None for local time
+        """
+        super().__init__(tz)
+        
+        self._reset_racing_state()
+        
+        # Selection utility
+        self.desel_map = DeSelMap()
+        
+        self.memo = memo
         
+        # Bet type -> generated translator, None for the generic path
+        self._specialized = None
+        if specialized and all(getattr(type(self), name) is getattr(ABRace, name)
+                               for name in self._SPECIALIZED_HOOKS):
+            from .specialized import SPECIALIZED_TRANSLATORS
+            self._specialized = SPECIALIZED_TRANSLATORS
+
+    def _reset_racing_state(self):
+        """Reset all racing fields to their initial values."""
         # Racing-specific fields
         self.m_sMeetDate = ""
         self.m_cLoc = 0
@@ -66,9 +174,18 @@ class ABRace(ABMsgTranslator):
         self.m_cRandomFlag = 0
         self.m_iBitmap = [0] * 6
         self.m_sBitmap = ""
+
+    def begin_message(self):
+        """
+        Start a new output record and clear the racing fields.
         
-        # Selection utility
-        self.desel_map = DeSelMap()
+        Fields that a message does not carry (e.g. the bet body of a
+        truncated message) must not leak from the previously translated
+        message, so that the output of a message never depends on which
+        messages the same translator instance has seen before.
+        """
+        super().begin_message()
+        self._reset_racing_state()
 
     def translate_action(self, msg: Msg) -> str:
         """
@@ -80,20 +197,242 @@ class ABRace(ABMsgTranslator):
         Returns:
             str: Translated message in delimited format
         """
+        if self.memo is not None:
+            return self._translate_memoized(msg)
+        return self._translate_full(msg)
+
+    def _translate_full(self, msg: Msg) -> str:
+        """
+        Translate a racing message without consulting the memo.
+        
+        Args:
+            msg: Input racing message
+            
+        Returns:
+            str: Translated message in delimited format
+        """
+        metrics = _metrics.active
+        if metrics is not None:
+            return self._translate_action_timed(msg, metrics)
+        
         try:
             # Parse the message
             pMlog = StructParser.parse_logab_from_msg(msg)
+        except Exception as e:
+            self.begin_message()
+            return f"ERROR: Failed to translate racing message: {str(e)}"
+        
+        return self.translate_logab(pMlog, msg)
+
+    def _translate_action_timed(self, msg: Msg, metrics: _metrics.Metrics) -> str:
+        """
+        translate_action with parse and total latencies recorded.
+        
+        Args:
+            msg: Input racing message
+            metrics: Active metrics registry
             
+        Returns:
+            str: Translated message in delimited format
+        """
+        start = perf_counter_ns()
+        try:
+            pMlog = StructParser.parse_logab_from_msg(msg)
+        except Exception as e:
+            metrics.count_exception("ABRace.translate_action", e)
+            self.begin_message()
+            result = f"ERROR: Failed to translate racing message: {str(e)}"
+        else:
+            metrics.observe("parse", perf_counter_ns() - start)
+            result = self.translate_logab(pMlog, msg)
+        
+        metrics.observe("total", perf_counter_ns() - start)
+        if result.startswith(ERROR_PREFIX):
+            metrics.count_error()
+        return result
+
+    def _translate_memoized(self, msg: Msg) -> str:
+        """
+        translate_action through the racing field memo.
+        
+        On a hit only the LOGAB header is decoded and packed; the cached
+        racing fields are appended as they were produced. On a miss the message is
+        translated in full and its racing fields are stored, unless the
+        translation failed.
+        
+        Args:
+            msg: Input racing message
+            
+        Returns:
+            str: Translated message in delimited format
+        """
+        memo = self.memo
+        metrics = _metrics.active
+        start = perf_counter_ns()
+        try:
+            buf = as_byte_buffer(msg.m_cpBuf)
+            header = StructParser.parse_logab_header(buf)
+        except Exception:
+            # Undecodable buffer: let the full path report the failure
+            return self._translate_full(msg)
+        if header.codewu != LOGAB_CODE_RAC:
+            # Only racing bodies are memoized
+            return self._translate_full(msg)
+        
+        key = memo.key(buf, msg.m_iMsgSellTime or msg.m_iMsgTime, header.anonymous1)
+        cached = memo.get(key)
+        if metrics is not None:
+            metrics.count_memo(cached is not None)
+        
+        if cached is None:
+            result = self._translate_full(msg)
+            if not result.startswith(ERROR_PREFIX):
+                # pack_header appends no blocks, so the racing fields start
+                # at the same entry of every record and hold all blocks
+                run, blocks = self.record.tail(_RACING_FIELD_OFFSET)
+                memo.put(key, (run, blocks, self.m_cBetType))
+            return result
+        
+        run, blocks, bet_type = cached
+        self.begin_message()
+        if not header.timelu:
+            header.timelu = msg.m_iMsgTime
+        try:
+            self.pack_header("", Logab(hdr=header, data=LogabData()), msg)
+        except Exception as e:
+            _metrics.record_exception("ABRace.translate_logab", e)
+            if metrics is not None:
+                metrics.count_error()
+            return f"ERROR: Failed to translate racing message: {str(e)}"
+        self.record.extend_run(run, blocks)
+        result = self.buf
+        
+        if metrics is not None:
+            metrics.observe("total", perf_counter_ns() - start)
+            metrics.count_message(LOGAB_CODE_RAC, bet_type)
+        return result
+
+    def translate_logab(self, pMlog: Logab, msg: Msg) -> str:
+        """
+        Translate an already decoded racing message.
+        
+        Args:
+            pMlog: Decoded message
+            msg: Input racing message
+            
+        Returns:
+            str: Translated message in delimited format
+        """
+        self.begin_message()
+        metrics = _metrics.active
+        try:
             # Pack header information
-            self.pack_header("", pMlog, msg)
+            if metrics is None:
+                self.pack_header("", pMlog, msg)
+            else:
+                start = perf_counter_ns()
+                self.pack_header("", pMlog, msg)
+                metrics.observe("pack_header", perf_counter_ns() - start)
+                bt_rac = pMlog.data.bt_rac
+                metrics.count_message(pMlog.hdr.codewu,
+                                      bt_rac.d.hdr.bettypebu if bt_rac and bt_rac.d else None)
             
             # Extract racing data from the parsed structure
             return self._process_racing_data(pMlog, msg)
             
         except Exception as e:
+            _metrics.record_exception("ABRace.translate_logab", e)
             # Return error indicator on failure
             return f"ERROR: Failed to translate racing message: {str(e)}"
 
+    def translate_iter(self, msgs: Iterable[Msg],
+                       start_order_no: Optional[int] = None) -> Iterator[str]:
+        """
+        Lazily translate a stream of racing messages.
+        
+        Yields exactly what translate_action returns for each message, in
+        input order. Method lookups are bound once for the whole stream
+        instead of once per message.
+        
+        Args:
+            msgs: Input racing messages
+            start_order_no: If given, message i is translated with logger
+                message order number start_order_no + i, as if set_msg_key
+                had been called before each message
+            
+        Yields:
+            str: Translated message in delimited format
+        """
+        begin_message = self.begin_message
+        parse = StructParser.parse_logab_from_msg
+        translate_logab = self.translate_logab
+        order_no = start_order_no
+        metrics = _metrics.active
+        memoized = self._translate_memoized if self.memo is not None else None
+        
+        for msg in msgs:
+            if order_no is not None:
+                self.m_iLoggerMsgOrderNo = order_no
+                order_no += 1
+            if memoized is not None:
+                yield memoized(msg)
+                continue
+            if metrics is not None:
+                yield self._translate_action_timed(msg, metrics)
+                continue
+            try:
+                pMlog = parse(msg)
+            except Exception as e:
+                begin_message()
+                yield f"ERROR: Failed to translate racing message: {str(e)}"
+                continue
+            yield translate_logab(pMlog, msg)
+
+    def translate_batch(self, msgs: Iterable[Msg],
+                        start_order_no: Optional[int] = None) -> BatchResult:
+        """
+        Translate a batch of racing messages.
+        
+        Args:
+            msgs: Input racing messages
+            start_order_no: Optional order number of the first message,
+                see translate_iter
+            
+        Returns:
+            BatchResult: Outputs in input order with per-message error slots
+        """
+        return BatchResult.from_results(list(self.translate_iter(msgs, start_order_no)))
+
+    def translate_columns(self, msgs: Iterable[Msg],
+                          start_order_no: Optional[int] = None) -> ColumnarBatch:
+        """
+        Translate a batch of racing messages into typed columns.
+        
+        Each column holds one EDW value field (see schema.VALUE_FIELDS)
+        taken from the typed record fields, so no output text is split.
+        
+        Args:
+            msgs: Input racing messages
+            start_order_no: Optional order number of the first message,
+                see translate_iter
+            
+        Returns:
+            ColumnarBatch: Columns in input order with per-message error slots
+        """
+        rows: List[Optional[List]] = []
+        errors: List[Optional[str]] = []
+        record = self.record
+        
+        for result in self.translate_iter(msgs, start_order_no):
+            if result.startswith(ERROR_PREFIX):
+                rows.append(None)
+                errors.append(result)
+            else:
+                rows.append(record.fields[RECORD_VALUE_OFFSET:])
+                errors.append(None)
+        
+        return ColumnarBatch.from_rows(rows, errors)
+
     def _process_racing_data(self, pMlog: Logab, msg: Msg) -> str:
         """
         Process racing-specific data from LOGAB structure.
@@ -105,6 +444,25 @@ class ABRace(ABMsgTranslator):
         Returns:
             str: Formatted racing data
         """
+        specialized = self._specialized
+        if specialized is not None:
+            bt_rac = pMlog.data.bt_rac
+            if bt_rac and bt_rac.d:
+                translate = specialized.get(bt_rac.d.hdr.bettypebu)
+                if translate is not None:
+                    metrics = _metrics.active
+                    start = perf_counter_ns() if metrics is not None else 0
+                    try:
+                        result = translate(self, pMlog, msg)
+                    except Exception as e:
+                        # Unexpected structure shape, nothing was written yet
+                        _metrics.record_exception("ABRace._process_racing_data", e)
+                        result = None
+                    if result is not None:
+                        if metrics is not None:
+                            metrics.observe("specialized", perf_counter_ns() - start)
+                        return result
+        
         try:
             # Get racing bet data
             if pMlog.data.bt_rac and pMlog.data.bt_rac.d:
@@ -148,17 +506,19 @@ class ABRace(ABMsgTranslator):
                     self.m_iTotalNoOfCombinations = max(1, self.m_iTotalCost // 10000)
                 
                 # Format sell time
-                sell_time = time.localtime(msg.m_iMsgSellTime or msg.m_iMsgTime)
-                months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
-                         "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-                month_name = months[sell_time.tm_mon - 1] if 1 <= sell_time.tm_mon <= 12 else "Jan"
-                self.m_sSellTime = f"{sell_time.tm_mday:02d}-{month_name}-{sell_time.tm_year} {sell_time.tm_hour:02d}:{sell_time.tm_min:02d}:{sell_time.tm_sec:02d}"
+                self.m_sSellTime = self.time_formatter.format_datetime(msg.m_iMsgSellTime or msg.m_iMsgTime)
                 
                 # Get bet type string
                 self.m_sBetType = self.get_bet_type(self.m_cBetType)
                 
                 # Get selections using DeSelMap utility
-                selections = self.desel_map.get_selections(pMlog, self.m_cBetType)
+                metrics = _metrics.active
+                if metrics is None:
+                    selections = self.desel_map.get_selections(pMlog, self.m_cBetType)
+                else:
+                    start = perf_counter_ns()
+                    selections = self.desel_map.get_selections(pMlog, self.m_cBetType)
+                    metrics.observe("selections", perf_counter_ns() - start)
                 
                 # Process bet type specific data
                 self._process_bet_type_data(bet_data, msg)
@@ -171,13 +531,19 @@ class ABRace(ABMsgTranslator):
                 self.m_iCscCard = getattr(pMlog.data.bt_rac, 'csctrn', 0)
                 
                 # Build output string
-                return self._build_output_string(selections, cross_sell)
+                if metrics is None:
+                    return self._build_output_string(selections, cross_sell)
+                start = perf_counter_ns()
+                result = self._build_output_string(selections, cross_sell)
+                metrics.observe("render", perf_counter_ns() - start)
+                return result
                 
             else:
                 # No racing data available, return minimal output
                 return self._build_minimal_output()
                 
         except Exception as e:
+            _metrics.record_exception("ABRace._process_racing_data", e)
             return f"ERROR: {str(e)}"
 
     def _process_bet_type_data(self, bet_data, msg: Msg):
@@ -246,6 +612,7 @@ class ABRace(ABMsgTranslator):
                             self.m_iBitmap[a] = exostd.sellu[a]
                             
         except Exception as e:
+            _metrics.record_exception("ABRace._process_bet_type_data", e)
             # Set default values on error
             self.m_sMeetDate = "01-Jan-2024 00:00:00"
             self.m_cLoc = 1
@@ -270,13 +637,19 @@ class ABRace(ABMsgTranslator):
                 return f"{yy}-{mm}-{dd} 00:00:00"
             else:
                 return "2024-01-01 00:00:00"
-        except:
+        except Exception as e:
+            _metrics.record_exception("ABRace._format_meeting_date", e)
             return "2024-01-01 00:00:00"
 
     def _build_output_string(self, selections: str, cross_sell: int) -> str:
         """
         Build the final output string with all racing data.
         
+        Constant runs of fields are appended as precomputed FieldBlocks and
+        the remaining fields in a few extend calls, bypassing the per-field
+        add_field calls. Values that may exceed 32 bits are clamped exactly
+        as add_field would.
+        
         Args:
             selections: Selection string from DeSelMap
             cross_sell: Cross sell indicator
@@ -284,18 +657,12 @@ class ABRace(ABMsgTranslator):
         Returns:
             str: Complete output string
         """
-        # Add racing-specific fields
-        self.add_field_string(self.m_sMeetDate, 0)
-        self.add_field(self.m_cLoc, 0)
-        self.add_field(self.m_cDay, 0)
-        self.add_field_64(self.m_itotalPay, 0)
-        self.add_field_64(self.m_iUnitBetTenK, 0)
-        self.add_field_64(self.m_iTotalCost, 0)
-        self.add_field_string(self.m_sSellTime, 0)
-        self.add_field_string(self.m_sBetType, 0)
-        
-        # Cancel flag for EDW (empty for race bets)
-        self.add_field_string(" ", 0)
+        # Add racing-specific fields; the cancel flag is empty for race bets
+        self.record.extend((
+            self.m_sMeetDate, _clamp32(self.m_cLoc), _clamp32(self.m_cDay),
+            self.m_itotalPay, self.m_iUnitBetTenK, self.m_iTotalCost,
+            self.m_sSellTime, self.m_sBetType, " ",
+        ))
         
         # Process bet type specific output
         if self.m_cBetType == BETTYP_AUP:
@@ -306,97 +673,81 @@ class ABRace(ABMsgTranslator):
         # Add selections (truncate if too long)
         if len(selections) > 1000:
             selections = selections[:1000]
-        self.add_field_string(selections, 0)
+        self.record.append(selections)
         
         # Add banker and bitmap information
         self._add_bitmap_fields()
         
         # Add final fields
-        self.add_field(cross_sell, 0)
-        self.add_field(self.m_iFlexiBetFlag, 0)
-        self.add_field(self.m_iTotalNoOfCombinations, 0)
-        self.add_field(self.m_iAnonymous, 0)
-        self.add_field(self.m_iCscCard, 0)
+        self.record.extend((
+            _clamp32(cross_sell), _clamp32(self.m_iFlexiBetFlag),
+            _clamp32(self.m_iTotalNoOfCombinations), _clamp32(self.m_iAnonymous),
+            _clamp32(self.m_iCscCard),
+        ))
         
         return self.buf
 
     def _add_allup_fields(self):
         """Add allup-specific fields to output."""
-        self.add_field(self.m_cNoOfEvt, 0)
-        self.add_field_string(self.m_sFormula, 0)
+        record = self.record
+        no_of_evt = self.m_cNoOfEvt
+        record.extend((_clamp32(no_of_evt), self.m_sFormula))
         
         # Add data for each event
-        for a in range(self.m_cNoOfEvt):
+        for a in range(no_of_evt):
             self.m_sAllupBettype = self.get_bet_type(self.m_cAllupPoolType[a])
-            self.add_field_string(self.m_sAllupBettype, 0)
-            self.add_field(self.m_iAllupRaceNo[a], 0)
-            self.add_field(self.m_cAllupBankerFlag[a], 0)
-            self.add_field(self.m_cAllupFieldFlag[a], 0)
-            self.add_field(self.m_cAllupMultiFlag[a], 0)
-            self.add_field(self.m_cAllupMultiBankerFlag[a], 0)
-            self.add_field(self.m_cAllupRandomFlag[a], 0)
-            self.add_field(self.m_iNoOfCombination[a], 0)
-            self.add_field(self.m_iPayFactor[a], 0)
-        
-        # Pad remaining events with zeros
-        for a in range(self.m_cNoOfEvt, 6):
-            for _ in range(9):  # 9 fields per event
-                self.add_field(0, 0)
-        
-        # Add standard bet fields (all zeros for allup)
-        for _ in range(6):  # 6 standard bet fields
-            self.add_field(0, 0)
+            record.extend((
+                self.m_sAllupBettype,
+                _clamp32(self.m_iAllupRaceNo[a]),
+                _clamp32(self.m_cAllupBankerFlag[a]),
+                _clamp32(self.m_cAllupFieldFlag[a]),
+                _clamp32(self.m_cAllupMultiFlag[a]),
+                _clamp32(self.m_cAllupMultiBankerFlag[a]),
+                _clamp32(self.m_cAllupRandomFlag[a]),
+                _clamp32(self.m_iNoOfCombination[a]),
+                _clamp32(self.m_iPayFactor[a]),
+            ))
+        
+        # Zeros for the remaining events and the standard bet fields
+        record.append_block(_ALLUP_TAIL_BLOCKS[no_of_evt])
 
     def _add_standard_fields(self):
         """Add standard/exotic bet specific fields to output."""
-        # Add allup fields (all zeros for standard bets)
-        self.add_field(0, 0)  # Number of events
-        self.add_field(0, 0)  # Formula
-        
-        # Add allup event fields (all zeros)
-        for _ in range(6):  # 6 events
-            for _ in range(9):  # 9 fields per event
-                self.add_field(0, 0)
+        # Event count, formula and event fields are all zeros for standard bets
+        self.record.append_block(_EMPTY_ALLUP_BLOCK)
         
         # Add standard bet fields
-        self.add_field(self.m_iRaceNo, 0)
-        self.add_field(self.m_cBankerFlag, 0)
-        self.add_field(self.m_cFieldFlag, 0)
-        self.add_field(self.m_cMultiFlag, 0)
-        self.add_field(self.m_cMultiBankerFlag, 0)
-        self.add_field(self.m_cRandomFlag, 0)
+        self.record.extend((
+            _clamp32(self.m_iRaceNo),
+            _clamp32(self.m_cBankerFlag),
+            _clamp32(self.m_cFieldFlag),
+            _clamp32(self.m_cMultiFlag),
+            _clamp32(self.m_cMultiBankerFlag),
+            _clamp32(self.m_cRandomFlag),
+        ))
 
     def _add_bitmap_fields(self):
         """Add banker and bitmap fields to output."""
+        record = self.record
+        
+        # Banker counts (simplified, always zero)
+        record.append_block(_EMPTY_BANKER_BLOCK)
+        
         if self.m_cBetType < BETTYP_AUP or self.m_cBetType >= BETTYP_FF:
-            # Standard/exotic bet bitmaps
-            # Add number of bankers (simplified)
-            for i in range(3):
-                self.add_field(0, 0)  # Banker counts
-            
-            # Add selection bitmaps
-            for i in range(6):
-                if self.m_iBitmap[i] > 65535:
-                    self.add_field_string("0000", 0)
-                else:
-                    bitmap_str = f"{self.m_iBitmap[i]:04X}"
-                    self.add_field_string(bitmap_str, 0)
+            # Standard/exotic bet selection bitmaps
+            bitmaps = self.m_iBitmap
+            record.extend([_hex16(bitmaps[i]) for i in range(6)])
         else:
-            # Allup bet bitmaps
-            # Add banker fields (zeros for allup)
-            for _ in range(3):
-                self.add_field(0, 0)
-            
-            # Add allup bitmaps
-            for i in range(self.m_cNoOfEvt):
-                temp1 = "0000" if self.m_iAllupBankerBitmap[i] > 65535 else f"{self.m_iAllupBankerBitmap[i]:04X}"
-                temp2 = "0000" if self.m_iAllupSelectBitmap[i] > 65535 else f"{self.m_iAllupSelectBitmap[i]:04X}"
-                bitmap_str = temp1 + temp2
-                self.add_field_string(bitmap_str, 0)
+            # Allup bitmaps, banker and selection bitmap per event
+            no_of_evt = self.m_cNoOfEvt
+            banker_bitmaps = self.m_iAllupBankerBitmap
+            select_bitmaps = self.m_iAllupSelectBitmap
+            record.extend([_hex16(banker_bitmaps[i]) + _hex16(select_bitmaps[i])
+                           for i in range(no_of_evt)])
             
             # Pad remaining with zeros
-            for i in range(self.m_cNoOfEvt, 6):
-                self.add_field_string("0000", 0)
+            if no_of_evt < 6:
+                record.append_block(_ALLUP_BITMAP_PADDING[no_of_evt])
 
     def _build_minimal_output(self) -> str:
         """
@@ -0,0 +1,165 @@
+import pytest
+
+import random
+import struct
+from datetime import timedelta, timezone
+from hashlib import blake2b
+
+from ab_race_translator import create_ab_race, Msg
+from ab_race_translator.bench.corpus import build_corpus
+from ab_race_translator.constants import DELIMITER, DELIMITER_SIM_SEL, LOGAB_CODE_RAC
+from ab_race_translator.data_structures import BatchResult, create_sample_msg
+from ab_race_translator.schema import RECORD_VALUE_OFFSET, VALUE_FIELDS
+from ab_race_translator.utils import TimestampFormatter
+
+
+def _messages():
+    msgs = []
+    for i in range(20):
+        msg = create_sample_msg()
+        msg.m_iSysName = f"AB{i}"
+        msg.m_iMsgTime = 1700000000 + i * 61
+        msgs.append(msg)
+    # Unparseable buffer and an invalid selling month
+    msgs.append(Msg(b"invalid_data", 1, 1, "AB", 1700000000, 1, 1, 2024))
+    msgs.append(Msg(b"\x00" * 200, 0, 1, "AB", 1700000000, 1, 13, 2024))
+    msgs.append(create_sample_msg())
+    return msgs
+
+
+def test_translate_batch_matches_single_message_path():
+    msgs = _messages()
+    single = create_ab_race()
+    expected = [single.translate_action(msg) for msg in msgs]
+
+    batch = create_ab_race().translate_batch(msgs)
+
+    assert isinstance(batch, BatchResult)
+    assert batch.results == expected
+    assert len(batch) == len(msgs)
+
+
+def test_translate_batch_error_slots():
+    msgs = _messages()
+
+    batch = create_ab_race().translate_batch(msgs)
+
+    assert batch.error_count == 1
+    assert batch.errors[-2] == batch.results[-2]
+    assert batch.results[-2].startswith("ERROR: ")
+    assert batch.errors[-1] is None
+
+
+def test_translate_iter_is_lazy_and_ordered():
+    msgs = _messages()
+    translator = create_ab_race()
+
+    stream = translator.translate_iter(iter(msgs))
+    first = next(stream)
+
+    assert first == create_ab_race().translate_action(msgs[0])
+    assert list(stream) == create_ab_race().translate_batch(msgs[1:]).results
+
+
+def test_templated_blocks_keep_field_layout():
+    translator = create_ab_race()
+    for msg in build_corpus(50, seed=9):
+        result = translator.translate_action(msg)
+        fields = translator.record.fields
+
+        assert translator.m_iCount == RECORD_VALUE_OFFSET + len(VALUE_FIELDS)
+        assert result.split("@|@", 1)[1].split("~|~") == [str(val) for val in fields[2:]]
+        for name in ("bitmap1", "bitmap6"):
+            bitmap = fields[RECORD_VALUE_OFFSET + VALUE_FIELDS.index(name)]
+            assert len(bitmap) in (4, 8) and bitmap == bitmap.upper()
+
+
+# blake2b(digest_size=6) of the original converter's translation of each
+# _baseline_messages() message, with time.time() returning the message time
+_BASELINE_DIGESTS = (
+    "d1a4914932e4", "6decafbdc12f", "3b59e7f637c7", "e7458e846c11", "422312c94f1d",
+    "50c70620a004", "77bbab00852a", "ef9b73646c19", "9115f9b6e768", "c2c182c585ad",
+    "2c2e94e3645f", "fdd28246c3f4", "c7cc333e5745", "a89ef611e7cd", "97a3f5536d35",
+    "e8d5e0e0ae7e", "2f5953fda3a7", "3275be52796a", "a7d3ff2a67b0", "195070c2d13c",
+    "f5deb5c203eb", "07fb6c7c7f81", "a01559691ac5", "b8e8a4e96a63", "a4d6ab383ac9",
+    "bec805d80fa0", "fef0ba75c432", "a6d9bf94fdd5", "f2fad779a8ff", "860e871bc60f",
+    "1e7ef4e1203d", "1b023a1ac1d7", "edfda55fbc1a", "e5b7f863219f", "6eaa05a877e3",
+    "4934abf310b5", "7d4ee35f6fa3", "a7001542706f", "098421846dd8", "08fc549bca32",
+    "76722af63db8", "6919e0de6642", "d57710f49b48", "8a374dd21769", "9ae41eb9566d",
+    "c29143cc1155", "34c7aa355c33", "174ef7bdcdcd", "3bb07972cc1b", "a78365e944d1",
+    "70ecd3714285", "dc38bfcb0d36", "17ffc3a3ff97", "603dace20f78", "ae78be472416",
+    "b19ed72e5ec5", "2b14505c113c", "76a6bb40dfce", "515619181be9", "b062dead943c",
+    "fe517feac6d7", "00c15a3d9bcb", "6badcda77ec2", "fcd5cac10754", "aaa360bf7630",
+    "fa3d10fd2a5f", "2b95afcab894", "1d107e5c3734", "ec9f9fe63038", "20e560fcef9b",
+    "cd99307ac40a", "5c57aebba284", "949deb988382", "00bb80357b56", "e56f62ba77eb",
+    "a3155c312892", "b521cde96784", "bb3277452271", "685ffdd9168f", "63e8cf38a530",
+    "d14178371ba4", "e2451432cbbf", "e5a1ff6b90d0", "7990a78f1f41", "bbe177f93781",
+    "ea2a70e5d1c1", "cbc701e154c9", "3782c5fd2628", "281b790d583a", "77e7a30e8198",
+    "94e163a8d9c2", "96bc30afe60b", "fbb268f90421", "8d7779205408", "2e8afd858be0",
+    "5e89b980718c", "9138ee8e7344", "ff01cf778174", "37c8dbda2401", "1e9eb8024050",
+    "34560a661c3f", "0cfd9375d7e9", "013db885a162", "37d3786569d7", "f32a29325156",
+    "a40ed948fd43", "bc0d05efa387", "744f4d1a73bd", "b631447ed640", "ab1c29886bdb",
+    "9e40d8ffb94b", "2673c7d62a09", "81de18bb7fc5", "018cc85a11fa", "37638eff5d3f",
+    "ae060352810c", "f868a4eb3dcd", "c4a55260712a", "d2b1c2926a62", "51530f5ef8d4",
+    "741763225a18", "f1e4845ade24", "306fb025bc7b", "811b13c5b854", "802e8557cc70",
+    "2f6f92e58eea", "80d0d57381aa", "04b045f0faac", "a21bcee45542", "ad2c3deed7ad",
+    "82c089fe8125", "67ed92ca3da8", "918b68313779", "12902275d4f2", "0a0a4aa4f5ba",
+    "3bc9bf306a9a", "e808152e1cc9", "0df897073dd5", "ef8657b6d471", "bb7f678d8ebf",
+    "68c91f498504", "0654e86a8cc6", "e0cda37e51d9", "e1fecc82e17c", "fdf5546174dd",
+    "57d90170bb7d", "234de3d525d3", "ccf46ae1fc29", "4c54ea216164", "b46217262522",
+    "c15ccc25b6c2", "57bb24fcd172", "64199816c1e5", "7af88aa53a0b", "29f38d11610d",
+    "f65bc0519432", "4a99af1de01d", "e1d1d2b7fdfa", "08fc329c50c1", "4fd16265ac99",
+    "23314855efe0", "8f3aeb9dc45f", "9acc3353d281", "fd979d9279fb", "cabad7144d0e",
+    "833ed80e6397", "dd379df43e8f", "c5a7ffb788e0", "33984332b8c9", "d3be863872c7",
+    "0813131205d3", "92cce198f214", "f73958784c14", "3991f7c3088e", "d60c8dd56b51",
+    "d802ce71da6f", "9fae783f10be", "ac3524b11610", "326fdf39f12b", "ad013ab77922",
+    "582d72864d7f", "ca143465a198", "cd6d1ab71a1e", "74e54274030c", "93fa7205c64c",
+    "87722f5225c2", "690b1259a340", "60082ab62108", "037c16c4ef8c", "697b35344916",
+    "28da03d38014", "65e7ca41c708", "0e6d6435a3f5", "13c43fa34eaa", "a20dd9fb7136",
+    "24378a42b715", "6404adee58a9", "6e0dd386d40e", "a3ba1e76bab7", "e6b939730ad1",
+)
+
+
+def _baseline_messages(count=200, seed=5):
+    """Random racing messages: LOGAB header prefix, bet header at 50 and a random body."""
+    rnd = random.Random(seed)
+    msgs = []
+    for _ in range(count):
+        size = rnd.choice([40, 60, 70, 74, 120, 160, 237, 302])
+        buf = bytearray(rnd.getrandbits(8) for _ in range(size))
+        struct.pack_into("<HH", buf, 0, size, LOGAB_CODE_RAC)
+        if size >= 70:
+            struct.pack_into("<QQI", buf, 50, rnd.getrandbits(rnd.choice([16, 40, 64])),
+                             rnd.getrandbits(rnd.choice([16, 40, 64])),
+                             rnd.choice([1, 2, 3, 4, 6, 13, 18, 27, 33, 34, 99]))
+        when = 1700000000 + rnd.randrange(10 ** 6)
+        msgs.append(Msg(bytes(buf), rnd.choice([0, 0, 3]), 1, "AB", when, 15, 6, 2024,
+                        when, LOGAB_CODE_RAC))
+    return msgs
+
+
+def test_racing_messages_match_original_converter():
+    results = []
+    for msg in _baseline_messages():
+        translator = create_ab_race(tz=timezone.utc)
+        result = translator.translate_action(msg)
+        results.append(blake2b(result.encode(), digest_size=6).hexdigest())
+
+    differing = [i for i, (digest, expected) in enumerate(zip(results, _BASELINE_DIGESTS))
+                 if digest != expected]
+    assert len(results) == len(_BASELINE_DIGESTS)
+    assert differing == []
+
+
+def test_times_are_formatted_in_the_given_timezone():
+    msg = _baseline_messages()[0]
+    utc = create_ab_race(tz=timezone.utc).translate_action(msg)
+    hkt = create_ab_race(tz=timezone(timedelta(hours=8))).translate_action(msg)
+
+    sell_time = VALUE_FIELDS.index("sell_time")
+    utc_time = utc.split(DELIMITER_SIM_SEL, 1)[1].split(DELIMITER)[sell_time]
+    hkt_time = hkt.split(DELIMITER_SIM_SEL, 1)[1].split(DELIMITER)[sell_time]
+    assert utc_time == TimestampFormatter(timezone.utc).format_datetime(msg.m_iMsgSellTime)
+    assert hkt_time == TimestampFormatter(timezone(timedelta(hours=8))).format_datetime(
+        msg.m_iMsgSellTime)
+    assert utc_time != hkt_time
@@ -0,0 +1,27 @@
+"""
+AB Race Translator Benchmarks
+
+Stage-level micro-benchmarks over a synthetic corpus with a realistic bet
+type mix. Run with:
+
+    python -m ab_race_translator.bench --messages 20000 --output bench.json
+"""
+
+from .corpus import (CORPUS_TIME_OFFSET, DEFAULT_MIX, build_allup_var, build_corpus, build_exostd_var,
+                     build_racing_logs, encode_racing_message)
+from .stages import STAGES, run_benchmarks
+from .startup import IMPORT_BUDGET_US, measure_import_time
+
+__all__ = [
+    'CORPUS_TIME_OFFSET',
+    'DEFAULT_MIX',
+    'IMPORT_BUDGET_US',
+    'STAGES',
+    'build_allup_var',
+    'build_corpus',
+    'build_exostd_var',
+    'build_racing_logs',
+    'encode_racing_message',
+    'measure_import_time',
+    'run_benchmarks',
+]
@@ -0,0 +1,72 @@
+"""
+Run the stage benchmarks and print a JSON report.
+
+Usage:
+    python -m ab_race_translator.bench [--messages N] [--repeat N] [--seed N]
+                                       [--stage NAME ...] [--no-alloc]
+                                       [--import-time] [--import-budget [US]]
+                                       [--output FILE]
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from .stages import STAGES, run_benchmarks
+from .startup import IMPORT_BUDGET_US, measure_import_time
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: Exit status; 1 if the package import exceeds --import-budget
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m ab_race_translator.bench",
+        description="Stage-level AB race translator benchmarks")
+    parser.add_argument("--messages", type=int, default=10000,
+                        help="corpus size (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed passes over the corpus (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=2024,
+                        help="corpus random seed (default: %(default)s)")
+    parser.add_argument("--stage", action="append", choices=list(STAGES),
+                        help="stage to run, may be repeated (default: all)")
+    parser.add_argument("--no-alloc", action="store_true",
+                        help="skip the allocation measurement pass")
+    parser.add_argument("--import-time", action="store_true",
+                        help="also measure the package import time in fresh interpreters")
+    parser.add_argument("--import-budget", type=int, nargs="?", const=IMPORT_BUDGET_US,
+                        metavar="US",
+                        help="measure the import time and exit with status 1 if the best "
+                             "run exceeds US microseconds (default: %(const)s)")
+    parser.add_argument("--output", help="write the JSON report to a file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(count=args.messages, seed=args.seed, repeat=args.repeat,
+                            stages=args.stage, measure_allocations=not args.no_alloc)
+    if args.import_time or args.import_budget is not None:
+        report["import"] = measure_import_time()
+    text = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.import_budget is not None and report["import"]["best_us"] > args.import_budget:
+        print(f"Package import took {report['import']['best_us']} us, "
+              f"over the budget of {args.import_budget} us", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
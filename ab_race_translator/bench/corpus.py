@@ -0,0 +1,269 @@
+"""
+Benchmark Corpus
+
+Encodes synthetic LOGAB_RAC messages with the compiled layouts. The default
+mix follows a typical race day: mostly single-race WIN and QIN bets, the
+exotic TCE/QTT/FCT pools, 6-leg allups, and a share of flexi bets across
+all of them.
+
+StructParser decodes only the LOGAB header and the bet header; the bytes
+after the bet header stand in for the undecoded bet body, so that messages
+of different bets differ as they do on a real tape. build_racing_logs
+pairs every message with its parsed Logab completed with the bet body and
+flexi combination of the bet, for the stages that format them.
+
+The message time is written at CORPUS_TIME_OFFSET, in the undecoded bytes
+between the LOGAB header and the bet header; pass it as the time_offset of
+tape readers over corpus tapes.
+"""
+
+import random
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..constants import (
+    BETTYP_AUP, BETTYP_FCT, BETTYP_PLA, BETTYP_QIN, BETTYP_QTT, BETTYP_TCE,
+    BETTYP_WIN, LOGAB_CODE_RAC,
+)
+from ..data_structures import (
+    BetAup, BetAupSel, BetExBnk, BetExoStd, BetFlexiCombo, BetInd, BetInvestCombo,
+    BetVar, Logab, Msg, StructParser,
+)
+from ..layouts import BETHDR, LOGAB_HDR, RAC_BETHDR_OFFSET
+
+# Relative weights of each bet type in the default corpus
+DEFAULT_MIX: Dict[int, int] = {
+    BETTYP_WIN: 30,
+    BETTYP_QIN: 20,
+    BETTYP_TCE: 12,
+    BETTYP_QTT: 8,
+    BETTYP_FCT: 12,
+    BETTYP_AUP: 18,
+}
+
+# Number of ordered selection bitmaps per exotic bet type
+_EXOTIC_POSITIONS = {BETTYP_TCE: 3, BETTYP_QTT: 4, BETTYP_FCT: 2}
+
+# Allup formula 6x63 (FORMULA_NAMES index)
+_ALLUP_FORMULA_6X63 = 40
+
+# Offset of the message time (u32 epoch seconds) in corpus messages
+CORPUS_TIME_OFFSET = LOGAB_HDR.size
+
+_TIME = struct.Struct(LOGAB_HDR.byte_order + "I")
+
+_BASE_TIME = 1718409600  # 15-Jun-2024 00:00:00 UTC
+_MEETING_DATE = 20240615
+
+# Stand-in bet body: meeting date, race or event count, six selection bitmaps
+_BODY = struct.Struct("<IB6Q")
+
+
+class _Bet(NamedTuple):
+    """One synthetic bet of the corpus."""
+    bet_type: int
+    var: BetVar
+    cost: int
+    unit_bet: int
+    combinations: int
+    flexi: bool
+    timelu: int
+    terminal: int
+
+
+def _no_indicators() -> BetInd:
+    return BetInd(bnk1=0, fld1=0, mul1=0, mbk1=0, rand1=0, twoentry=0)
+
+
+def encode_racing_message(bet_type: int, cost: int, body: bytes = b"",
+                          timelu: int = _BASE_TIME, terminal: int = 1) -> bytes:
+    """
+    Encode a LOGAB_RAC message.
+
+    Args:
+        bet_type: Bet type
+        cost: Total cost in cents
+        body: Bytes after the bet header, not decoded by StructParser
+        timelu: Message time (epoch seconds), written at CORPUS_TIME_OFFSET
+        terminal: Logical terminal number
+
+    Returns:
+        bytes: Message buffer
+    """
+    size = RAC_BETHDR_OFFSET + BETHDR.size + len(body)
+    buf = bytearray(size)
+    LOGAB_HDR.struct.pack_into(
+        buf, 0, size, LOGAB_CODE_RAC, 0, 0, 1000 + terminal % 500, terminal,
+        0, 0, 0, 0, 0)
+    _TIME.pack_into(buf, CORPUS_TIME_OFFSET, timelu)
+    BETHDR.struct.pack_into(buf, RAC_BETHDR_OFFSET, 0, cost, bet_type)
+    buf[RAC_BETHDR_OFFSET + BETHDR.size:] = body
+    return bytes(buf)
+
+
+def build_exostd_var(race: int, bitmaps: Sequence[int], field_size: int = 14,
+                     loc: int = 1, day: int = 3, md: int = _MEETING_DATE) -> BetVar:
+    """
+    Build a standard/exotic bet body.
+
+    Args:
+        race: Race number
+        bitmaps: Selection bitmaps, up to 6
+        field_size: Number of runners in the race
+        loc: Meeting location
+        day: Meeting day
+        md: Meeting date (YYYYMMDD)
+
+    Returns:
+        BetVar: Bet body with es set
+    """
+    sellu = list(bitmaps) + [0] * (6 - len(bitmaps))
+    return BetVar(es=BetExoStd(
+        loc=loc, day=day, md=md, racebu=race, ind=_no_indicators(),
+        pid=[race] * 6, fdsz=[field_size] * 6, sellu=sellu,
+        betexbnk=BetExBnk(bnkbu=[0, 0, 0])
+    ))
+
+
+def build_allup_var(legs: Sequence[Tuple[int, int, int]], formula: int = _ALLUP_FORMULA_6X63,
+                    field_size: int = 14, loc: int = 1, day: int = 3,
+                    md: int = _MEETING_DATE) -> BetVar:
+    """
+    Build an allup bet body.
+
+    Args:
+        legs: (race, pool bet type, selection bitmap) per event, up to 6
+        formula: Allup formula
+        field_size: Number of runners in each race
+        loc: Meeting location
+        day: Meeting day
+        md: Meeting date (YYYYMMDD)
+
+    Returns:
+        BetVar: Bet body with a set
+    """
+    sels = [BetAupSel(racebu=race, bettypebu=pool, ind=_no_indicators(), pid=[race],
+                      fdsz=field_size, sellu=[0, bitmap], comwu=bin(bitmap).count("1"),
+                      pftrlu=100)
+            for race, pool, bitmap in legs]
+    sels += [BetAupSel(racebu=0, bettypebu=0, ind=_no_indicators(), pid=[0], fdsz=0,
+                       sellu=[0, 0], comwu=0, pftrlu=0)
+             for _ in range(6 - len(legs))]
+    return BetVar(a=BetAup(loc=loc, day=day, md=md, evtbu=len(legs), fmlbu=formula, sel=sels))
+
+
+def _runners(rnd: random.Random, field_size: int, count: int) -> int:
+    """Bitmap of count distinct runners drawn from 1..field_size."""
+    bitmap = 0
+    for runner in rnd.sample(range(1, field_size + 1), count):
+        bitmap |= 1 << runner
+    return bitmap
+
+
+def _bets(count: int, seed: int, mix: Optional[Dict[int, int]],
+          flexi_ratio: float, field_size: int) -> Iterator[_Bet]:
+    """Draw the bets of a corpus, see build_corpus."""
+    rnd = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    bet_types = list(mix)
+    weights = [mix[bet_type] for bet_type in bet_types]
+
+    for i in range(count):
+        bet_type = rnd.choices(bet_types, weights)[0]
+        race = rnd.randint(1, 10)
+
+        if bet_type == BETTYP_AUP:
+            legs = [(race + leg, rnd.choice((BETTYP_WIN, BETTYP_PLA, BETTYP_QIN)),
+                     _runners(rnd, field_size, rnd.randint(1, 3)))
+                    for leg in range(6)]
+            var = build_allup_var(legs, field_size=field_size)
+            combinations = 63
+        elif bet_type in _EXOTIC_POSITIONS:
+            positions = _EXOTIC_POSITIONS[bet_type]
+            bitmaps = [_runners(rnd, field_size, rnd.randint(1, 3)) for _ in range(positions)]
+            var = build_exostd_var(race, bitmaps, field_size)
+            combinations = 1
+            for bitmap in bitmaps:
+                combinations *= bin(bitmap).count("1")
+        else:
+            picks = 1 if bet_type == BETTYP_WIN else rnd.randint(2, 5)
+            bitmap = _runners(rnd, field_size, picks)
+            var = build_exostd_var(race, [bitmap], field_size)
+            combinations = picks * (picks - 1) // 2 if picks > 1 else 1
+
+        flexi = rnd.random() < flexi_ratio
+        unit_bet = rnd.choice((10, 20, 50, 100))
+        cost = rnd.randint(10, 200) * 1000 if flexi else unit_bet * 100 * combinations
+        timelu = _BASE_TIME + 36000 + i // 4
+        yield _Bet(bet_type, var, cost, unit_bet, combinations, flexi, timelu, i % 5000)
+
+
+def _message(bet: _Bet) -> Msg:
+    var = bet.var
+    if var.a is not None:
+        body = _BODY.pack(var.a.md, var.a.evtbu, *(sel.sellu[1] for sel in var.a.sel))
+    else:
+        body = _BODY.pack(var.es.md, var.es.racebu, *var.es.sellu)
+    return Msg(
+        m_cpBuf=encode_racing_message(bet.bet_type, bet.cost, body, bet.timelu, bet.terminal),
+        m_iMsgErrwu=0,
+        m_iSysNo=1,
+        m_iSysName="AB",
+        m_iMsgTime=bet.timelu,
+        m_iMsgDay=15,
+        m_iMsgMonth=6,
+        m_iMsgYear=2024,
+        m_iMsgSellTime=bet.timelu,
+        m_iMsgCode=LOGAB_CODE_RAC
+    )
+
+
+def build_corpus(count: int = 10000, seed: int = 2024,
+                 mix: Optional[Dict[int, int]] = None,
+                 flexi_ratio: float = 0.25, field_size: int = 14) -> List[Msg]:
+    """
+    Build a deterministic benchmark corpus.
+
+    Args:
+        count: Number of messages
+        seed: Random seed
+        mix: Relative weight per bet type, defaults to DEFAULT_MIX
+        flexi_ratio: Share of bets encoded as flexi bets
+        field_size: Number of runners in every race
+
+    Returns:
+        List[Msg]: Messages in sell time order
+    """
+    return [_message(bet) for bet in _bets(count, seed, mix, flexi_ratio, field_size)]
+
+
+def build_racing_logs(count: int = 10000, seed: int = 2024,
+                      mix: Optional[Dict[int, int]] = None,
+                      flexi_ratio: float = 0.25,
+                      field_size: int = 14) -> List[Tuple[Logab, Msg]]:
+    """
+    Build the corpus of build_corpus with complete racing structures.
+
+    Args:
+        count: Number of messages
+        seed: Random seed
+        mix: Relative weight per bet type, defaults to DEFAULT_MIX
+        flexi_ratio: Share of flexi bets
+        field_size: Number of runners in every race
+
+    Returns:
+        List[Tuple[Logab, Msg]]: Parsed structure, with bet body and flexi
+            combination filled in, and message of every bet
+    """
+    logs = []
+    for bet in _bets(count, seed, mix, flexi_ratio, field_size):
+        msg = _message(bet)
+        pMlog = StructParser.parse_logab_from_msg(msg)
+        bet_data = pMlog.data.bt_rac.d
+        bet_data.var = bet.var
+        bet_data.hdr.betinvcomb = BetInvestCombo(flexi=BetFlexiCombo(
+            baseinv=bet.combinations if bet.flexi else bet.unit_bet,
+            flexibet=int(bet.flexi)
+        ))
+        logs.append((pMlog, msg))
+    return logs
@@ -0,0 +1,47 @@
+import pytest
+
+from ab_race_translator.ab_race import ABRace
+from ab_race_translator.bench.corpus import DEFAULT_MIX, build_corpus, build_racing_logs
+from ab_race_translator.constants import BETTYP_AUP, ERROR_PREFIX
+from ab_race_translator.data_structures import StructParser
+
+
+def test_corpus_is_deterministic_and_decodes():
+    msgs = build_corpus(300, seed=5)
+    assert [msg.m_cpBuf for msg in msgs] == [msg.m_cpBuf for msg in build_corpus(300, seed=5)]
+
+    bet_types = set()
+    for msg in msgs:
+        bet = StructParser.parse_logab_from_msg(msg).data.bt_rac.d
+        bet_types.add(bet.hdr.bettypebu)
+
+    assert bet_types == set(DEFAULT_MIX)
+
+
+def test_racing_logs_complete_the_corpus():
+    msgs = build_corpus(300, seed=5)
+    logs = build_racing_logs(300, seed=5)
+    assert [msg.m_cpBuf for _, msg in logs] == [msg.m_cpBuf for msg in msgs]
+
+    flexi = 0
+    for pMlog, _ in logs:
+        bet = pMlog.data.bt_rac.d
+        flexi += bet.hdr.betinvcomb.flexi.flexibet
+        if bet.hdr.bettypebu == BETTYP_AUP:
+            assert bet.var.a.evtbu == 6
+        else:
+            assert bet.var.es is not None
+
+    assert 0 < flexi < len(logs)
+
+
+def test_corpus_translates_without_errors():
+    results = ABRace().translate_batch(build_corpus(200, seed=6))
+
+    assert results.error_count == 0
+    assert not any(result.startswith(ERROR_PREFIX) for result in results.results)
+
+    logs = build_racing_logs(200, seed=6)
+    translator = ABRace()
+    assert not any(translator.translate_logab(pMlog, msg).startswith(ERROR_PREFIX)
+                   for pMlog, msg in logs)
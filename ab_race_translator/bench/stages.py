@@ -0,0 +1,282 @@
+"""
+Stage Benchmarks
+
+Times each translation stage separately over a corpus:
+
+- header_parse: LOGAB header decode
+- bet_parse: bet header decode
+- pack_header: common header fields
+- racing: ABRace._process_racing_data, the production racing path; bet
+  types with a generated specialized translator take it, the rest the
+  generic path
+- selections: DeSelMap.get_selections (generic path)
+- render: racing fields and record rendering (generic path)
+- end_to_end: ABRace.translate_action
+
+Every stage is called once per message with its inputs prepared up front,
+so a stage's figures exclude the stages before it. The stages from
+pack_header to render take the structures of build_racing_logs, since
+StructParser does not decode bet bodies; end_to_end translates the
+messages alone. Latencies are measured per call with perf_counter_ns. Allocation figures come from a separate,
+untimed pass that keeps every stage result alive: retained blocks and
+bytes per message (sys.getallocatedblocks and tracemalloc) and the
+tracemalloc peak per message.
+"""
+
+import gc
+import platform
+import sys
+import tracemalloc
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .. import __version__
+from ..ab_race import ABRace
+from ..constants import BET_TYPE_NAMES
+from ..data_structures import Logab, Msg, StructParser, as_byte_buffer
+from ..layouts import RAC_BETHDR_OFFSET
+from ..utils import DeSelMap
+from .corpus import DEFAULT_MIX, build_racing_logs
+
+# A corpus entry: parsed structure and its message
+LogEntry = Tuple[Logab, Msg]
+
+# A prepared stage: untimed per-call setup (or None), timed call, call arguments
+PreparedStage = Tuple[Optional[Callable[..., Any]], Callable[..., Any], List[tuple]]
+
+
+def _prepare_header_parse(logs: Sequence[LogEntry]) -> PreparedStage:
+    args = [(as_byte_buffer(msg.m_cpBuf),) for _, msg in logs]
+    return None, StructParser.parse_logab_header, args
+
+
+def _prepare_bet_parse(logs: Sequence[LogEntry]) -> PreparedStage:
+    args = [(as_byte_buffer(msg.m_cpBuf), RAC_BETHDR_OFFSET) for _, msg in logs]
+    return None, StructParser.parse_bet_header, args
+
+
+def _prepare_pack_header(logs: Sequence[LogEntry]) -> PreparedStage:
+    translator = ABRace()
+    begin_message = translator.begin_message
+    pack_header = translator.pack_header
+
+    def pack(pMlog, msg):
+        begin_message()
+        pack_header("", pMlog, msg)
+
+    return None, pack, list(logs)
+
+
+def _prepare_racing(logs: Sequence[LogEntry]) -> PreparedStage:
+    translator = ABRace()
+
+    def setup(pMlog, msg):
+        # Bring the translator to the state just after pack_header
+        translator.begin_message()
+        translator.pack_header("", pMlog, msg)
+
+    return setup, translator._process_racing_data, list(logs)
+
+
+def _prepare_selections(logs: Sequence[LogEntry]) -> PreparedStage:
+    desel_map = DeSelMap()
+    args = [(pMlog, pMlog.data.bt_rac.d.hdr.bettypebu) for pMlog, _ in logs]
+    return None, desel_map.get_selections, args
+
+
+def _prepare_render(logs: Sequence[LogEntry]) -> PreparedStage:
+    translator = ABRace()
+    desel_map = DeSelMap()
+    record = translator.record
+
+    def setup(pMlog, msg, selections):
+        # Bring the translator to the state just before rendering
+        translator.begin_message()
+        translator.pack_header("", pMlog, msg)
+        header_count = record.count
+        translator._process_racing_data(pMlog, msg)
+        record.truncate(header_count)
+
+    def render(pMlog, msg, selections):
+        return translator._build_output_string(selections, 0)
+
+    args = []
+    for pMlog, msg in logs:
+        selections = desel_map.get_selections(pMlog, pMlog.data.bt_rac.d.hdr.bettypebu)
+        args.append((pMlog, msg, selections))
+    return setup, render, args
+
+
+def _prepare_end_to_end(logs: Sequence[LogEntry]) -> PreparedStage:
+    translator = ABRace()
+    return None, translator.translate_action, [(msg,) for _, msg in logs]
+
+
+# Stage name -> preparation function, in pipeline order
+STAGES: Dict[str, Callable[[Sequence[LogEntry]], PreparedStage]] = {
+    "header_parse": _prepare_header_parse,
+    "bet_parse": _prepare_bet_parse,
+    "pack_header": _prepare_pack_header,
+    "racing": _prepare_racing,
+    "selections": _prepare_selections,
+    "render": _prepare_render,
+    "end_to_end": _prepare_end_to_end,
+}
+
+
+def _percentile(sorted_values: List[int], pct: float) -> int:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _time_stage(prepared: PreparedStage, repeat: int) -> List[int]:
+    """
+    Time every call of a prepared stage.
+
+    Args:
+        prepared: Prepared stage
+        repeat: Number of passes over the arguments
+
+    Returns:
+        List[int]: Per-call latencies in nanoseconds
+    """
+    setup, fn, args = prepared
+    latencies = []
+    append = latencies.append
+    for _ in range(repeat):
+        for call_args in args:
+            if setup is not None:
+                setup(*call_args)
+            start = perf_counter_ns()
+            fn(*call_args)
+            append(perf_counter_ns() - start)
+    return latencies
+
+
+def _measure_allocations(prepared: PreparedStage) -> Dict[str, float]:
+    """
+    Measure memory retained by one pass of a prepared stage.
+
+    Args:
+        prepared: Prepared stage
+
+    Returns:
+        Dict[str, float]: Retained blocks, retained bytes and peak bytes per message
+    """
+    setup, fn, args = prepared
+    count = len(args)
+    results: List[Any] = []
+    append = results.append
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        gc.collect()
+        base_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.clear_traces()
+        base_blocks = sys.getallocatedblocks()
+
+        for call_args in args:
+            if setup is not None:
+                setup(*call_args)
+            append(fn(*call_args))
+
+        blocks = sys.getallocatedblocks() - base_blocks
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    del results
+    return {
+        "retained_blocks_per_msg": round(blocks / count, 2),
+        "retained_bytes_per_msg": round(current / count, 1),
+        "peak_bytes_per_msg": round(peak / count, 1),
+    }
+
+
+def run_stage(name: str, logs: Sequence[LogEntry], repeat: int = 3,
+              measure_allocations: bool = True) -> Dict[str, float]:
+    """
+    Benchmark one stage over a corpus.
+
+    Args:
+        name: Stage name, a key of STAGES
+        logs: Corpus structures and messages, see build_racing_logs
+        repeat: Number of timed passes over the corpus
+        measure_allocations: Also run an allocation measurement pass
+
+    Returns:
+        Dict[str, float]: Stage figures
+    """
+    if not logs:
+        raise ValueError("Benchmark corpus is empty")
+
+    prepared = STAGES[name](logs)
+
+    # Warm up caches and lookup tables before timing
+    _time_stage(prepared, 1)
+    gc.collect()
+    latencies = _time_stage(prepared, repeat)
+
+    latencies.sort()
+    total_ns = sum(latencies)
+    result: Dict[str, float] = {
+        "calls": len(latencies),
+        "total_s": round(total_ns / 1e9, 6),
+        "msgs_per_sec": round(len(latencies) / (total_ns / 1e9), 1) if total_ns else 0.0,
+        "mean_us": round(total_ns / len(latencies) / 1e3, 3),
+        "p50_us": round(_percentile(latencies, 50) / 1e3, 3),
+        "p99_us": round(_percentile(latencies, 99) / 1e3, 3),
+    }
+
+    if measure_allocations:
+        result.update(_measure_allocations(STAGES[name](logs)))
+
+    return result
+
+
+def run_benchmarks(msgs: Optional[Sequence[Msg]] = None, count: int = 10000,
+                   seed: int = 2024, repeat: int = 3,
+                   stages: Optional[Iterable[str]] = None,
+                   measure_allocations: bool = True) -> Dict[str, Any]:
+    """
+    Benchmark translation stages and return a JSON-serializable report.
+
+    Args:
+        msgs: Corpus messages, parsed with StructParser; defaults to
+            build_racing_logs(count, seed)
+        count: Size of the default corpus
+        seed: Seed of the default corpus
+        repeat: Number of timed passes over the corpus
+        stages: Stage names to run, defaults to all of STAGES
+        measure_allocations: Also measure allocations per message
+
+    Returns:
+        Dict[str, Any]: Benchmark report
+    """
+    corpus = {"messages": count, "seed": seed,
+              "mix": {BET_TYPE_NAMES.get(bet_type, str(bet_type)): weight
+                      for bet_type, weight in DEFAULT_MIX.items()}}
+    if msgs is None:
+        logs = build_racing_logs(count, seed)
+    else:
+        logs = [(StructParser.parse_logab_from_msg(msg), msg) for msg in msgs]
+        corpus = {"messages": len(msgs), "seed": None, "mix": None}
+
+    names = list(stages) if stages is not None else list(STAGES)
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark stages: {', '.join(unknown)}")
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "corpus": corpus,
+        "repeat": repeat,
+        "stages": {name: run_stage(name, logs, repeat, measure_allocations)
+                   for name in names},
+    }
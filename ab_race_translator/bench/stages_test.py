@@ -0,0 +1,34 @@
+import pytest
+
+import json
+
+from ab_race_translator.bench import STAGES, run_benchmarks
+from ab_race_translator.bench.__main__ import main
+
+
+def test_run_benchmarks_reports_every_stage():
+    report = run_benchmarks(count=40, repeat=1)
+
+    assert list(report["stages"]) == list(STAGES)
+    for figures in report["stages"].values():
+        assert figures["calls"] == 40
+        assert 0 < figures["p50_us"] <= figures["p99_us"]
+        assert figures["msgs_per_sec"] > 0
+        assert "retained_bytes_per_msg" in figures
+    json.dumps(report)
+
+
+def test_unknown_stage_is_rejected():
+    with pytest.raises(ValueError):
+        run_benchmarks(count=5, stages=["decode"])
+
+
+def test_main_writes_json_report(tmp_path):
+    output = tmp_path / "bench.json"
+
+    assert main(["--messages", "20", "--repeat", "1", "--stage", "selections",
+                 "--no-alloc", "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    assert list(report["stages"]) == ["selections"]
+    assert "retained_bytes_per_msg" not in report["stages"]["selections"]
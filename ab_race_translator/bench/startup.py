@@ -0,0 +1,70 @@
+"""
+Import Time Benchmark
+
+Measures the cost of importing a module in a fresh interpreter, as paid by
+every short-lived batch job. Each run starts a new Python process with
+-X importtime and takes the cumulative import time of the module from its
+report, so interpreter startup is excluded.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+# Startup budget of a bare package import in microseconds
+IMPORT_BUDGET_US = 20000
+
+_PACKAGE = __name__.split(".")[0]
+
+# Prints the package submodules loaded by the import
+_PROBE = ("import sys, {module}; "
+          "print(','.join(sorted(m for m in sys.modules if m.startswith('{package}.'))))")
+
+
+def _import_once(module: str) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter and parse its import time report."""
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (root, env.get("PYTHONPATH"))))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         _PROBE.format(module=module, package=_PACKAGE)],
+        capture_output=True, text=True, env=env, check=True)
+
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith("import time:") and line.rsplit("|", 1)[-1].strip() == module:
+            cumulative_us = int(line.split("|")[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"{module} missing from the import time report")
+    loaded = proc.stdout.strip()
+    return {"cumulative_us": cumulative_us, "submodules": loaded.split(",") if loaded else []}
+
+
+def measure_import_time(module: str = _PACKAGE, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Measure the import time of a module in fresh interpreters.
+
+    The first run also writes bytecode caches and is not counted.
+
+    Args:
+        module: Module to import
+        repeat: Number of counted runs
+
+    Returns:
+        Dict[str, Any]: Best and median cumulative import time in
+            microseconds, and the package submodules the import loaded
+    """
+    _import_once(module)
+    runs: List[Dict[str, Any]] = [_import_once(module) for _ in range(repeat)]
+    times = [run["cumulative_us"] for run in runs]
+    return {
+        "module": module,
+        "repeat": repeat,
+        "best_us": min(times),
+        "median_us": statistics.median(times),
+        "submodules": runs[-1]["submodules"],
+    }
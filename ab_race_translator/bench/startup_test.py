@@ -0,0 +1,36 @@
+import pytest
+
+from ab_race_translator.bench.__main__ import main
+from ab_race_translator.bench.startup import measure_import_time
+
+
+def test_package_import_is_lazy():
+    report = measure_import_time(repeat=1)
+
+    assert report["submodules"] == []
+    assert report["best_us"] > 0
+
+
+def test_import_budget_check_sets_exit_status(capsys):
+    args = ["--messages", "5", "--repeat", "1", "--stage", "header_parse", "--no-alloc"]
+
+    assert main(args + ["--import-budget", "0"]) == 1
+    assert "over the budget of 0 us" in capsys.readouterr().err
+    assert main(args + ["--import-budget", "10000000"]) == 0
+
+
+def test_public_names_resolve_on_access():
+    import ab_race_translator
+
+    from ab_race_translator import BETTYP_WIN, LOGAB_CODE_RAC, Msg, create_ab_race
+    from ab_race_translator.ab_race import ABRace
+    from ab_race_translator.constants import ERROR_PREFIX
+
+    assert isinstance(create_ab_race(), ABRace)
+    assert ab_race_translator.ABRace is ABRace
+    assert Msg.__module__ == "ab_race_translator.data_structures"
+    assert (BETTYP_WIN, LOGAB_CODE_RAC) == (1, 6)
+    assert ab_race_translator.ERROR_PREFIX == ERROR_PREFIX
+    assert set(ab_race_translator.__all__) <= set(dir(ab_race_translator))
+    with pytest.raises(AttributeError):
+        ab_race_translator.no_such_name
@@ -0,0 +1,83 @@
+"""
+Translation Checkpoints
+
+Resumable state of a tape translation run. A checkpoint records where the
+next record starts on the tape, the logger message order number of the
+last translated record, and the output sink state: the sequence, position
+and CRC-32 of the file being written plus the files already completed.
+
+The driver commits a checkpoint only after the sink made every record
+before it durable, and the checkpoint file itself is replaced atomically,
+so the newest checkpoint on disk never runs ahead of the output. A
+restarted run truncates the output back to the checkpoint and continues
+from its tape offset, without duplicating or dropping records.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional, Union
+
+# Format version of checkpoint files
+CHECKPOINT_VERSION = 1
+
+# Records translated between checkpoints
+DEFAULT_CHECKPOINT_RECORDS = 100000
+
+
+@dataclass
+class Checkpoint:
+    """Resumable state of a tape translation run."""
+    tape_path: str                       # absolute tape path
+    offset: int                          # byte offset of the next record
+    last_order_no: int                   # order number of the last translated record
+    records: int                         # records translated before the checkpoint
+    sink: Dict[str, Any] = field(default_factory=dict)  # OutputSink.checkpoint() state
+    tape_id: int = 1
+
+    def save(self, path: Union[str, "os.PathLike[str]"]):
+        """
+        Write the checkpoint to a file atomically.
+
+        The file is written and fsynced under a temporary name, then
+        renamed into place.
+
+        Args:
+            path: Checkpoint file path
+        """
+        path = os.fspath(path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CHECKPOINT_VERSION, **asdict(self)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, "os.PathLike[str]"]) -> Optional["Checkpoint"]:
+        """
+        Read a checkpoint file.
+
+        Args:
+            path: Checkpoint file path
+
+        Returns:
+            Optional[Checkpoint]: Checkpoint, None if the file does not exist
+
+        Raises:
+            ValueError: If the file is not a checkpoint of this version
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid checkpoint file {os.fspath(path)}: {e}") from None
+
+        if not isinstance(data, dict) or data.pop("version", None) != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint file {os.fspath(path)}")
+        try:
+            return cls(**data)
+        except TypeError as e:
+            raise ValueError(f"Invalid checkpoint file {os.fspath(path)}: {e}") from None
@@ -0,0 +1,127 @@
+import pytest
+
+import gzip
+import json
+import lzma
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.bench.corpus import build_corpus
+from ab_race_translator.checkpoint import Checkpoint
+from ab_race_translator.driver import translate_tape
+from ab_race_translator.sink import OutputSink
+from ab_race_translator.tape import TapeReader
+
+
+def _write_tape(tmp_path, count=200):
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(bytes(m.m_cpBuf) for m in build_corpus(count, seed=9)))
+    with TapeReader(path) as reader:
+        expected = create_ab_race().translate_batch(list(reader.messages()), start_order_no=1).results
+    return path, expected
+
+
+def _crash_after(monkeypatch, batches):
+    """Make OutputSink.write_batch fail after a number of batches."""
+    write_batch = OutputSink.write_batch
+    calls = []
+
+    def failing(self, results):
+        if len(calls) == batches:
+            raise RuntimeError("crash")
+        calls.append(1)
+        write_batch(self, results)
+
+    monkeypatch.setattr(OutputSink, "write_batch", failing)
+
+
+def _read(files, compression):
+    opener = {None: open, "gzip": gzip.open, "xz": lzma.open}[compression]
+    return b"".join(opener(p, "rb").read() for p in files).decode().splitlines()
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "xz"])
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path, monkeypatch, compression):
+    path, expected = _write_tape(tmp_path)
+    out = tmp_path / "out"
+    checkpoint = tmp_path / "run.ckpt"
+
+    with monkeypatch.context() as patch:
+        _crash_after(patch, 7)
+        with pytest.raises(RuntimeError):
+            translate_tape(path, OutputSink(out, compression=compression, max_records=45),
+                           batch_size=16, checkpoint_path=checkpoint, checkpoint_every=40)
+
+    state = Checkpoint.load(checkpoint)
+    assert (state.records, state.last_order_no) == (96, 96)
+    with TapeReader(path) as reader:
+        assert state.offset == list(reader.records())[96].offset
+
+    sink = OutputSink(out, compression=compression, max_records=45)
+    result = translate_tape(path, sink, batch_size=16,
+                            checkpoint_path=checkpoint, checkpoint_every=40)
+
+    assert result.records == 200
+    assert result.resumed_offset == state.offset
+    assert not checkpoint.exists()
+    assert sorted(p.name for p in out.iterdir()) == [p.split("/")[-1] for p in result.files]
+    assert _read(result.files, compression) == expected
+
+
+def test_checkpoint_rejects_modified_output(tmp_path, monkeypatch):
+    path, _ = _write_tape(tmp_path, 100)
+    out = tmp_path / "out"
+    checkpoint = tmp_path / "run.ckpt"
+
+    with monkeypatch.context() as patch:
+        _crash_after(patch, 4)
+        with pytest.raises(RuntimeError):
+            translate_tape(path, OutputSink(out), batch_size=16,
+                           checkpoint_path=checkpoint, checkpoint_every=16)
+
+    [partial] = out.iterdir()
+    data = bytearray(partial.read_bytes())
+    data[0] ^= 1
+    partial.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="does not match the checkpoint"):
+        translate_tape(path, OutputSink(out), batch_size=16, checkpoint_path=checkpoint)
+
+    with pytest.raises(ValueError, match="belongs to"):
+        translate_tape(path, OutputSink(out), tape_id=2, checkpoint_path=checkpoint)
+
+
+def test_load_validates_the_file(tmp_path):
+    path = tmp_path / "run.ckpt"
+    assert Checkpoint.load(path) is None
+
+    Checkpoint("/tapes/sys1.tape", 128, 4, 4, {"sequence": 1}).save(path)
+    assert Checkpoint.load(path) == Checkpoint("/tapes/sys1.tape", 128, 4, 4, {"sequence": 1})
+    assert not (tmp_path / "run.ckpt.tmp").exists()
+
+    path.write_text(json.dumps({"version": 99}))
+    with pytest.raises(ValueError):
+        Checkpoint.load(path)
+    path.write_text("{")
+    with pytest.raises(ValueError):
+        Checkpoint.load(path)
+
+
+def test_resume_from_another_working_directory(tmp_path, monkeypatch):
+    path, expected = _write_tape(tmp_path, 100)
+    checkpoint = tmp_path / "run.ckpt"
+    (tmp_path / "elsewhere").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    with monkeypatch.context() as patch:
+        _crash_after(patch, 3)
+        with pytest.raises(RuntimeError):
+            translate_tape(path, OutputSink("out"), batch_size=16,
+                           checkpoint_path=checkpoint, checkpoint_every=16)
+
+    state = Checkpoint.load(checkpoint).sink
+    assert state["path"].startswith(str(tmp_path / "out"))
+    monkeypatch.chdir(tmp_path / "elsewhere")
+    result = translate_tape(path, OutputSink("../out"), batch_size=16,
+                            checkpoint_path=checkpoint, checkpoint_every=16)
+
+    assert result.records == 100
+    assert _read(result.files, None) == expected
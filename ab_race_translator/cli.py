@@ -0,0 +1,436 @@
+"""
+Command Line Translator
+
+Entry point of the ab-race-translate console script. Translates logger
+tapes, directories of tapes or a record stream on stdin, and writes one
+translated record per line to a file or stdout:
+
+    ab-race-translate /data/tapes -o racing.txt.gz --workers 8
+    cat sys1.tape | ab-race-translate --code 6 --format jsonl > racing.jsonl
+
+Each input is a separate logger file: message order numbers restart at 1
+for every input. A throughput and error summary is printed to stderr when
+the run completes.
+"""
+
+import argparse
+import gzip
+import json
+import lzma
+import os
+import re
+import sys
+import time
+from datetime import timedelta, timezone, tzinfo
+from typing import IO, Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .constants import *
+from .data_structures import Msg
+from .parallel import DEFAULT_BATCH_SIZE, ParallelTranslator
+from .schema import VALUE_FIELDS
+from .service import DEFAULT_READ_SIZE, MessageFramer
+from .tape import TapeReader
+from .tape_index import INDEX_SUFFIX
+
+# Input and output name for stdin/stdout
+STDIO = "-"
+
+# Output formats
+FORMATS = ("text", "jsonl")
+
+# Output file suffix -> opener of a compressed binary stream
+_COMPRESSED_OPENERS = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+}
+
+# Bytes of rendered output collected before a write
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# JSON string encoder and the encoded "key": prefixes of the value fields
+_encode_json_str = json.encoder.encode_basestring_ascii
+_JSON_KEYS = tuple(_encode_json_str(name) + ":" for name in VALUE_FIELDS)
+
+
+class RunSummary(NamedTuple):
+    """Totals of one command line run."""
+    inputs: int           # inputs translated
+    records: int          # records translated
+    errors: int           # records that failed to translate
+    skipped: int          # records dropped by the message code filter
+    input_bytes: int      # bytes of framed input records
+    trailing_bytes: int   # input bytes that did not form a complete record
+    seconds: float        # wall clock time
+    stream_errors: Tuple[str, ...] = ()  # framing errors that stopped an input
+
+    def format(self) -> str:
+        """
+        Render the summary as one line of text.
+
+        Returns:
+            str: Summary line
+        """
+        seconds = max(self.seconds, 1e-9)
+        return (f"{self.records} records from {self.inputs} input(s) in {self.seconds:.2f} s "
+                f"({self.records / seconds:.0f} records/s, "
+                f"{self.input_bytes / seconds / 1e6:.1f} MB/s); "
+                f"{self.errors} errors, {self.skipped} filtered, "
+                f"{self.trailing_bytes} trailing bytes"
+                + (f", {len(self.stream_errors)} framing errors" if self.stream_errors else ""))
+
+
+def expand_inputs(paths: Iterable[str]) -> List[str]:
+    """
+    Expand directories into the tape files they contain.
+
+    Files of a directory are taken in name order; hidden files and tape
+    index sidecars are skipped.
+
+    Args:
+        paths: Files, directories or STDIO
+
+    Returns:
+        List[str]: Inputs in translation order
+
+    Raises:
+        FileNotFoundError: If a path does not exist
+    """
+    inputs = []
+    for path in paths:
+        if path == STDIO or os.path.isfile(path):
+            inputs.append(path)
+        elif os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if (not name.startswith(".") and not name.endswith(INDEX_SUFFIX)
+                        and os.path.isfile(full)):
+                    inputs.append(full)
+        else:
+            raise FileNotFoundError(f"No such input: {path}")
+    return inputs
+
+
+def _read_stream(stream: IO[bytes], framer: MessageFramer, dropped: List[int],
+                 read_size: int = DEFAULT_READ_SIZE) -> Iterator[Msg]:
+    """
+    Frame the records of a binary stream.
+
+    After a framing error the rest of the stream is read to its end and
+    counted, unframed, in dropped[0].
+    """
+    while True:
+        data = stream.read(read_size)
+        if not data:
+            return
+        if framer.error is not None:
+            dropped[0] += len(data)
+            continue
+        yield from framer.feed(data)
+
+
+def _read_tape(reader: TapeReader, dropped: List[int], errors: List[str]) -> Iterator[Msg]:
+    """
+    Frame the records of a tape.
+
+    A framing error stops the tape: the error is appended to errors and the
+    rest of the tape is counted, unframed, in dropped[0].
+    """
+    to_msg = reader.to_msg
+    offset = 0
+    try:
+        for record in reader.records():
+            offset = record.end_offset
+            yield to_msg(record)
+    except ValueError as e:
+        errors.append(str(e))
+        dropped[0] += reader.size - offset
+
+
+def _filter_codes(msgs: Iterable[Msg], codes: Optional[frozenset],
+                  counts: List[int]) -> Iterator[Msg]:
+    """
+    Drop messages whose code is not selected.
+
+    Args:
+        msgs: Input messages
+        codes: Selected message codes, None for all
+        counts: [kept, skipped, input bytes], updated in place
+    """
+    for msg in msgs:
+        counts[2] += len(msg.m_cpBuf)
+        if codes is None or msg.m_iMsgCode in codes:
+            counts[0] += 1
+            yield msg
+        else:
+            counts[1] += 1
+
+
+def record_to_json(result: str) -> str:
+    """
+    Render a translated record as a JSON object keyed by EDW field name.
+
+    Values are kept as the text of the delimited record. Error results and
+    records of an unexpected width become {"error": text}.
+
+    Args:
+        result: Translated record
+
+    Returns:
+        str: JSON object text
+    """
+    if not result.startswith(ERROR_PREFIX):
+        head, _, rest = result.partition(DELIMITER)
+        code, _, first = head.partition(DELIMITER_SIM_SEL)
+        values = [first] + rest.split(DELIMITER) if rest else [first]
+        if len(values) == len(VALUE_FIELDS):
+            encode = _encode_json_str
+            return ('{"msg_type":' + encode(code) + ","
+                    + ",".join([key + encode(val) for key, val in zip(_JSON_KEYS, values)])
+                    + "}")
+    return json.dumps({"error": result})
+
+
+def _render_text(results: List[str]) -> str:
+    """Render records as newline-terminated lines."""
+    text = "\n".join(results)
+    if text.count("\n") != len(results) - 1:
+        # Error texts may embed exception messages with line breaks
+        text = "\n".join(result.replace("\n", " ") for result in results)
+    return text + "\n"
+
+
+def _render_jsonl(results: List[str]) -> str:
+    """Render records as JSON Lines."""
+    return "\n".join(map(record_to_json, results)) + "\n"
+
+
+_RENDERERS = {
+    "text": _render_text,
+    "jsonl": _render_jsonl,
+}
+
+
+_UTC_OFFSET = re.compile(r"([+-])(\d\d):?(\d\d)$")
+
+
+def parse_timezone(text: str) -> Optional[tzinfo]:
+    """
+    Parse a --tz value.
+
+    Args:
+        text: "local", "UTC", a fixed offset such as "+08:00", or an IANA
+            timezone name such as "Asia/Hong_Kong" (Python 3.9+)
+
+    Returns:
+        Optional[tzinfo]: Timezone, None for local time
+
+    Raises:
+        ValueError: If the timezone is not known
+    """
+    if text.lower() == "local":
+        return None
+    if text.upper() in ("UTC", "Z"):
+        return timezone.utc
+    match = _UTC_OFFSET.match(text)
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = timedelta(hours=int(hours), minutes=int(minutes))
+        return timezone(-offset if sign == "-" else offset)
+    try:
+        from zoneinfo import ZoneInfo
+    except ImportError:
+        raise ValueError(f"Timezone names need Python 3.9 or later: {text}") from None
+    try:
+        return ZoneInfo(text)
+    except (KeyError, ValueError, OSError):
+        # ZoneInfoNotFoundError is a KeyError
+        raise ValueError(f"Unknown timezone: {text}") from None
+
+
+def _open_output(path: str) -> IO[bytes]:
+    """Open the binary output stream, compressed by file suffix."""
+    if path == STDIO:
+        return sys.stdout.buffer
+    opener = _COMPRESSED_OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, "wb")
+
+
+def run(inputs: List[str], output: IO[bytes], workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE, codes: Optional[Iterable[int]] = None,
+        output_format: str = "text", skip_errors: bool = False, tape_id: int = 1,
+        sys_no: int = 1, sys_name: str = "AB", time_offset: Optional[int] = None,
+        tz: Optional[tzinfo] = None, stdin: Optional[IO[bytes]] = None) -> RunSummary:
+    """
+    Translate inputs into a binary output stream.
+
+    Args:
+        inputs: Tape files or STDIO, see expand_inputs
+        output: Binary output stream
+        workers: Number of worker processes, None for the CPU count
+        batch_size: Number of messages per shard
+        codes: Message codes to translate, None for all
+        output_format: One of FORMATS
+        skip_errors: Drop records that failed to translate from the output
+        tape_id: Logger tape ID
+        sys_no: System number reported in each Msg
+        sys_name: System name reported in each Msg
+        time_offset: Byte offset of the message time within each record,
+            None to report time 0 (see TapeReader)
+        tz: Timezone of the message dates and formatted times, None for
+            local time
+        stdin: Stream read for STDIO inputs, defaults to sys.stdin
+
+    Returns:
+        RunSummary: Run totals
+    """
+    render: Callable[[List[str]], str] = _RENDERERS[output_format]
+    codes = frozenset(codes) if codes is not None else None
+    counts = [0, 0, 0]
+    errors = trailing = 0
+    stream_errors: List[str] = []
+    pending: List[bytes] = []
+    pending_bytes = 0
+    started = time.perf_counter()
+
+    with ParallelTranslator(workers=workers, batch_size=batch_size,
+                            tape_id=tape_id, tz=tz) as translator:
+        for path in inputs:
+            dropped = [0]
+            if path == STDIO:
+                framer = MessageFramer(sys_no=sys_no, sys_name=sys_name,
+                                       time_offset=time_offset, tz=tz)
+                stream = stdin if stdin is not None else sys.stdin.buffer
+                msgs = _filter_codes(_read_stream(stream, framer, dropped), codes, counts)
+                reader = None
+            else:
+                reader = TapeReader(path, sys_no=sys_no, sys_name=sys_name,
+                                    time_offset=time_offset, tz=tz)
+                msgs = _filter_codes(_read_tape(reader, dropped, stream_errors), codes, counts)
+
+            try:
+                for results in translator.translate_shards(msgs, start_order_no=1):
+                    failed = [result for result in results if result.startswith(ERROR_PREFIX)]
+                    errors += len(failed)
+                    if skip_errors and failed:
+                        results = [result for result in results
+                                   if not result.startswith(ERROR_PREFIX)]
+                    if not results:
+                        continue
+                    data = render(results).encode("utf-8")
+                    pending.append(data)
+                    pending_bytes += len(data)
+                    if pending_bytes >= _WRITE_BUFFER_SIZE:
+                        output.write(b"".join(pending))
+                        pending.clear()
+                        pending_bytes = 0
+            finally:
+                if reader is not None:
+                    trailing += reader.trailing_bytes + dropped[0]
+                    reader.close()
+                else:
+                    trailing += framer.pending_bytes + dropped[0]
+                    if framer.error is not None:
+                        stream_errors.append(f"stdin: {framer.error}")
+
+    output.write(b"".join(pending))
+    output.flush()
+    return RunSummary(
+        inputs=len(inputs),
+        records=counts[0],
+        errors=errors,
+        skipped=counts[1],
+        input_bytes=counts[2],
+        trailing_bytes=trailing,
+        seconds=time.perf_counter() - started,
+        stream_errors=tuple(stream_errors),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: Exit status; 1 if an input is missing or, with --strict, if
+            any record failed to translate, trailing bytes were found or
+            framing of an input failed
+    """
+    parser = argparse.ArgumentParser(
+        prog="ab-race-translate",
+        description="Translate AB racing logger tapes into EDW records")
+    parser.add_argument("inputs", nargs="*", default=[STDIO],
+                        help="tape files or directories of tapes, '-' for stdin "
+                             "(default: stdin)")
+    parser.add_argument("-o", "--output", default=STDIO,
+                        help="output file, '-' for stdout; a .gz or .xz suffix "
+                             "compresses (default: stdout)")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="text",
+                        help="output format (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes, 1 to translate in-process "
+                             "(default: CPU count)")
+    parser.add_argument("-b", "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="messages per shard (default: %(default)s)")
+    parser.add_argument("-c", "--code", type=int, action="append", dest="codes",
+                        help="message code to translate, may be repeated (default: all)")
+    parser.add_argument("--skip-errors", action="store_true",
+                        help="leave records that failed to translate out of the output")
+    parser.add_argument("--strict", action="store_true",
+                        help="exit with status 1 on translation errors, trailing bytes "
+                             "or framing errors")
+    parser.add_argument("--tape-id", type=int, default=1,
+                        help="logger tape ID (default: %(default)s)")
+    parser.add_argument("--sys-no", type=int, default=1,
+                        help="system number (default: %(default)s)")
+    parser.add_argument("--sys-name", default="AB",
+                        help="system name (default: %(default)s)")
+    parser.add_argument("--time-offset", type=int, default=None, metavar="BYTES",
+                        help="byte offset of the message time (u32 epoch seconds) "
+                             "within each record (default: time not read)")
+    parser.add_argument("--tz", default="local",
+                        help="timezone of message dates and times: local, UTC, an "
+                             "offset such as +08:00 or a name such as Asia/Hong_Kong "
+                             "(default: %(default)s)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not print the summary")
+    args = parser.parse_args(argv)
+
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.time_offset is not None and args.time_offset < 0:
+        parser.error("--time-offset must not be negative")
+    try:
+        tz = parse_timezone(args.tz)
+    except ValueError as e:
+        parser.error(f"--tz: {e}")
+    try:
+        inputs = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        print(f"ab-race-translate: {e}", file=sys.stderr)
+        return 1
+
+    output = _open_output(args.output)
+    try:
+        summary = run(inputs, output, workers=args.workers, batch_size=args.batch_size,
+                      codes=args.codes, output_format=args.format,
+                      skip_errors=args.skip_errors, tape_id=args.tape_id,
+                      sys_no=args.sys_no, sys_name=args.sys_name,
+                      time_offset=args.time_offset, tz=tz)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    for error in summary.stream_errors:
+        print(f"ab-race-translate: {error}", file=sys.stderr)
+    if not args.quiet:
+        print(summary.format(), file=sys.stderr)
+    if args.strict and (summary.errors or summary.trailing_bytes or summary.stream_errors):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
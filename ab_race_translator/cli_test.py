@@ -0,0 +1,171 @@
+import pytest
+
+import gzip
+import io
+import json
+from datetime import timezone
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.bench.corpus import CORPUS_TIME_OFFSET, build_corpus
+from ab_race_translator.cli import expand_inputs, main, parse_timezone, record_to_json, run
+from ab_race_translator.constants import LOGAB_CODE_RAC
+from ab_race_translator.data_structures import StructParser
+from ab_race_translator.schema import VALUE_FIELDS
+from ab_race_translator.tape import TapeReader
+
+
+def _write_tape(path, count, seed):
+    path.write_bytes(b"".join(bytes(m.m_cpBuf) for m in build_corpus(count, seed=seed)))
+    with TapeReader(path) as reader:
+        return create_ab_race().translate_batch(list(reader.messages()), start_order_no=1).results
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_directory_into_compressed_file(tmp_path, workers, capsys):
+    tapes = tmp_path / "tapes"
+    tapes.mkdir()
+    expected = _write_tape(tapes / "a.tape", 40, 1) + _write_tape(tapes / "b.tape", 30, 2)
+    (tapes / "a.tape.idx").write_bytes(b"not a tape")
+    out = tmp_path / "out.txt.gz"
+
+    status = main([str(tapes), "-o", str(out), "-w", str(workers), "-b", "8"])
+
+    assert status == 0
+    assert gzip.open(out).read().decode().splitlines() == expected
+    assert "70 records from 2 input(s)" in capsys.readouterr().err
+
+
+def test_stdin_with_code_filter_and_jsonl(tmp_path):
+    expected = _write_tape(tmp_path / "a.tape", 20, 3)
+    stream = io.BytesIO((tmp_path / "a.tape").read_bytes() + b"\x01\x02")
+    output = io.BytesIO()
+
+    summary = run(["-"], output, workers=1, codes=[LOGAB_CODE_RAC], output_format="jsonl",
+                  stdin=stream)
+    rows = [json.loads(line) for line in output.getvalue().decode().splitlines()]
+
+    assert summary.records == 20
+    assert summary.skipped == 0
+    assert summary.trailing_bytes == 2
+    assert len(rows) == 20
+    assert rows[0]["msg_type"] == str(LOGAB_CODE_RAC)
+    assert rows[0]["oltp_id"] == "AB"
+    assert rows[0]["sb_selection"] == expected[0].split("~|~")[VALUE_FIELDS.index("sb_selection")]
+
+    summary = run(["-"], io.BytesIO(), workers=1, codes=[0], stdin=io.BytesIO(stream.getvalue()))
+    assert (summary.records, summary.skipped) == (0, 20)
+
+
+def test_stdin_framing_error_is_reported(tmp_path, monkeypatch, capsys):
+    expected = _write_tape(tmp_path / "a.tape", 10, 4)
+    bad = (3).to_bytes(2, "little") + b"\x00" * 60
+    data = (tmp_path / "a.tape").read_bytes() + bad + b"\x00" * 100
+
+    summary = run(["-"], io.BytesIO(), workers=1, stdin=io.BytesIO(data), batch_size=4)
+
+    assert summary.records == len(expected)
+    assert summary.trailing_bytes == len(bad) + 100
+    assert summary.stream_errors == ("stdin: Invalid record size 3 in stream",)
+
+    monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(data)))
+    assert main(["-o", str(tmp_path / "out.txt"), "-w", "1", "--strict", "-q"]) == 1
+    assert "Invalid record size 3" in capsys.readouterr().err
+
+
+def test_tape_framing_error_is_reported(tmp_path, capsys):
+    good = _write_tape(tmp_path / "a.tape", 12, 6)
+    before = _write_tape(tmp_path / "b.tape", 5, 7)
+    bad = (3).to_bytes(2, "little") + b"\x00" * 60
+    prefix = (tmp_path / "b.tape").read_bytes()
+    (tmp_path / "b.tape").write_bytes(prefix + bad + bytes(build_corpus(1)[0].m_cpBuf))
+    inputs = [str(tmp_path / "a.tape"), str(tmp_path / "b.tape"), str(tmp_path / "a.tape")]
+    output = io.BytesIO()
+
+    summary = run(inputs, output, workers=1, batch_size=4)
+
+    # Records framed before the error are written and later inputs still run
+    assert output.getvalue().decode().splitlines() == good + before + good
+    assert summary.trailing_bytes == len(bad) + len(build_corpus(1)[0].m_cpBuf)
+    assert len(summary.stream_errors) == 1
+    assert "Invalid record size 3 at offset %d" % len(prefix) in summary.stream_errors[0]
+
+    out = tmp_path / "out.txt"
+    assert main(inputs[:2] + ["-o", str(out), "-w", "1", "-q"]) == 0
+    assert len(out.read_text().splitlines()) == len(good) + len(before)
+    assert main(inputs[:2] + ["-o", str(out), "-w", "1", "--strict", "-q"]) == 1
+    assert "Invalid record size 3" in capsys.readouterr().err
+
+
+def test_errors_are_counted_and_skipped(tmp_path, monkeypatch):
+    tape = tmp_path / "bad.tape"
+    good = bytes(build_corpus(1)[0].m_cpBuf)
+    short = (50).to_bytes(2, "little") + good[2:50]
+    tape.write_bytes(good + short)
+    parse = StructParser.parse_logab_from_msg
+
+    def parse_long(msg):
+        if len(msg.m_cpBuf) == 50:
+            raise ValueError("short record")
+        return parse(msg)
+
+    monkeypatch.setattr(StructParser, "parse_logab_from_msg", staticmethod(parse_long))
+    output = io.BytesIO()
+
+    summary = run([str(tape)], output, workers=1, skip_errors=True)
+
+    assert summary.errors == 1
+    assert len(output.getvalue().splitlines()) == 1
+    assert main([str(tape), "-o", str(tmp_path / "out.txt"), "-w", "1", "--strict", "-q"]) == 1
+
+
+def test_time_offset_option(tmp_path):
+    untimed = _write_tape(tmp_path / "a.tape", 10, 5)
+    with TapeReader(tmp_path / "a.tape", time_offset=CORPUS_TIME_OFFSET) as reader:
+        expected = create_ab_race().translate_batch(list(reader.messages()),
+                                                    start_order_no=1).results
+    out = tmp_path / "out.txt"
+
+    status = main([str(tmp_path / "a.tape"), "-o", str(out), "-w", "1", "-q",
+                   "--time-offset", str(CORPUS_TIME_OFFSET)])
+
+    assert status == 0
+    assert out.read_text().splitlines() == expected
+    assert expected != untimed
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "a.tape"), "--time-offset", "-1"])
+
+
+def test_tz_option(tmp_path):
+    path = tmp_path / "a.tape"
+    _write_tape(path, 10, 8)
+    with TapeReader(path, time_offset=CORPUS_TIME_OFFSET, tz=timezone.utc) as reader:
+        expected = create_ab_race(tz=timezone.utc).translate_batch(
+            list(reader.messages()), start_order_no=1).results
+    out = tmp_path / "out.txt"
+
+    status = main([str(path), "-o", str(out), "-w", "1", "-q",
+                   "--time-offset", str(CORPUS_TIME_OFFSET), "--tz", "UTC"])
+
+    assert status == 0
+    assert out.read_text().splitlines() == expected
+    with pytest.raises(SystemExit):
+        main([str(path), "--tz", "Nowhere/Nothing"])
+
+
+def test_parse_timezone():
+    assert parse_timezone("local") is None
+    assert parse_timezone("UTC") is timezone.utc
+    assert parse_timezone("+08:00").utcoffset(None).total_seconds() == 8 * 3600
+    assert parse_timezone("-0530").utcoffset(None).total_seconds() == -(5 * 3600 + 1800)
+    with pytest.raises(ValueError):
+        parse_timezone("Nowhere/Nothing")
+
+
+def test_record_to_json_error():
+    assert json.loads(record_to_json("ERROR: bad")) == {"error": "ERROR: bad"}
+
+
+def test_missing_input(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(tmp_path / "missing")])
+    assert main([str(tmp_path / "missing")]) == 1
@@ -0,0 +1,208 @@
+"""
+Columnar Batch Output
+
+Holds a translated batch as one typed column per EDW value field instead
+of one delimited string per message, so bulk loaders can ingest it without
+splitting text. Integer fields are stored as array('q') columns, the
+unsigned 64-bit amounts as array('Q'), and text fields as lists of str,
+taken directly from the translator's record fields.
+
+Writers are provided for NumPy .npz (requires numpy) and Arrow/Parquet
+(requires pyarrow); both are optional dependencies.
+"""
+
+import importlib
+import os
+from array import array
+from typing import Dict, List, Optional, Sequence, Union
+
+from .constants import ERROR_PREFIX
+from .schema import FIELD_TYPECODES, VALUE_FIELDS
+
+Column = Union[array, List[str]]
+
+# Name of the per-row error column in exported files
+ERROR_COLUMN = "error"
+
+# Value range of each integer column typecode
+_TYPECODE_RANGES = {
+    "q": (-(1 << 63), (1 << 63) - 1),
+    "Q": (0, (1 << 64) - 1),
+}
+
+
+def _require(module: str, extra: str):
+    """Import an optional dependency or raise a helpful ImportError."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError(
+            f"{module} is required for this output format: "
+            f"pip install ab-race-translator[{extra}]") from None
+
+
+def _build_columns(rows: List[Sequence[Union[int, str]]]) -> Dict[str, Column]:
+    """
+    Transpose value field rows into typed columns.
+
+    Raises:
+        OverflowError: If an integer value is out of the range of its column
+    """
+    columns: Dict[str, Column] = {}
+    values = zip(*rows) if rows else [()] * len(VALUE_FIELDS)
+    for name, column in zip(VALUE_FIELDS, values):
+        typecode = FIELD_TYPECODES[name]
+        if typecode:
+            columns[name] = array(typecode, column)
+        else:
+            columns[name] = [val if type(val) is str else str(val) for val in column]
+    return columns
+
+
+def _out_of_range_field(row: Sequence[Union[int, str]]) -> Optional[str]:
+    """Get the first integer field of a row out of the range of its column."""
+    for name, value in zip(VALUE_FIELDS, row):
+        typecode = FIELD_TYPECODES[name]
+        if typecode:
+            low, high = _TYPECODE_RANGES[typecode]
+            if not low <= value <= high:
+                return name
+    return None
+
+
+class ColumnarBatch:
+    """
+    Translated batch in columnar form.
+
+    columns[name][i] is value field name of the i-th input message. Rows of
+    messages that failed to translate, or with an integer value out of the
+    range of its column, hold 0 or "" in every column and their error text
+    in errors[i]; errors[i] is None for clean rows.
+    """
+
+    def __init__(self, columns: Dict[str, Column], errors: List[Optional[str]]):
+        """
+        Initialize the batch.
+
+        Args:
+            columns: Column name to values, in VALUE_FIELDS order
+            errors: Error text per row, None when the row translated cleanly
+        """
+        self.columns = columns
+        self.errors = errors
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Optional[Sequence[Union[int, str]]]],
+                  errors: List[Optional[str]]) -> "ColumnarBatch":
+        """
+        Build a batch from per-message value field rows.
+
+        Args:
+            rows: Value fields of each message in VALUE_FIELDS order, or
+                None for messages that failed to translate
+            errors: Error text per row
+
+        Returns:
+            ColumnarBatch: Columnar batch
+        """
+        width = len(VALUE_FIELDS)
+        empty = tuple(0 if FIELD_TYPECODES[name] else "" for name in VALUE_FIELDS)
+        errors = list(errors)
+
+        filled = []
+        for i, row in enumerate(rows):
+            if row is not None and len(row) != width:
+                errors[i] = (errors[i] or
+                             f"{ERROR_PREFIX}Expected {width} value fields, got {len(row)}")
+                row = None
+            filled.append(empty if row is None else row)
+
+        try:
+            columns = _build_columns(filled)
+        except OverflowError:
+            # Only the rows holding an out of range value fail
+            for i, row in enumerate(filled):
+                name = _out_of_range_field(row)
+                if name is not None:
+                    errors[i] = errors[i] or f"{ERROR_PREFIX}Value of {name} out of range"
+                    filled[i] = empty
+            columns = _build_columns(filled)
+
+        return cls(columns, errors)
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    @property
+    def error_count(self) -> int:
+        """int: Number of rows that failed to translate."""
+        return sum(error is not None for error in self.errors)
+
+    def to_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        """
+        Convert the columns to NumPy arrays.
+
+        Integer columns become int64 arrays, or uint64 for the unsigned
+        amounts, and text columns unicode arrays.
+        The error column holds "" for clean rows.
+
+        Returns:
+            Dict[str, numpy.ndarray]: Column name to array
+        """
+        np = _require("numpy", "numpy")
+        result = {}
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                dtype = np.uint64 if column.typecode == "Q" else np.int64
+                result[name] = np.array(column, dtype=dtype)
+            else:
+                result[name] = np.array(column, dtype=str)
+        result[ERROR_COLUMN] = np.array([error or "" for error in self.errors], dtype=str)
+        return result
+
+    def write_npz(self, path: Union[str, "os.PathLike[str]"], compressed: bool = True):
+        """
+        Write the batch to a NumPy .npz archive, one array per column.
+
+        Args:
+            path: Output file path
+            compressed: Use zip deflate compression
+        """
+        np = _require("numpy", "numpy")
+        save = np.savez_compressed if compressed else np.savez
+        save(os.fspath(path), **self.to_numpy())
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """
+        Convert the batch to an Arrow table.
+
+        Integer columns become int64, or uint64 for the unsigned amounts,
+        text columns string and the error column a nullable string.
+
+        Returns:
+            pyarrow.Table: Table with one column per value field plus error
+        """
+        pa = _require("pyarrow", "arrow")
+        arrays = []
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                dtype = pa.uint64() if column.typecode == "Q" else pa.int64()
+                arrays.append(pa.array(column, type=dtype))
+            else:
+                arrays.append(pa.array(column, type=pa.string()))
+        arrays.append(pa.array(self.errors, type=pa.string()))
+        return pa.Table.from_arrays(arrays, names=list(self.columns) + [ERROR_COLUMN])
+
+    def write_parquet(self, path: Union[str, "os.PathLike[str]"], **kwargs):
+        """
+        Write the batch to a Parquet file.
+
+        Args:
+            path: Output file path
+            **kwargs: Passed to pyarrow.parquet.write_table
+        """
+        pq = _require("pyarrow.parquet", "arrow")
+        pq.write_table(self.to_arrow(), os.fspath(path), **kwargs)
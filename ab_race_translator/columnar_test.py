@@ -0,0 +1,103 @@
+import pytest
+
+from array import array
+
+from ab_race_translator.ab_race import ABRace
+from ab_race_translator.columnar import ColumnarBatch
+from ab_race_translator.bench.corpus import build_corpus, encode_racing_message
+from ab_race_translator.constants import (
+    BETTYP_WIN, DELIMITER, DELIMITER_SIM_SEL, ERROR_PREFIX, LOGAB_CODE_RAC,
+)
+from ab_race_translator.data_structures import Msg
+from ab_race_translator.schema import STRING_FIELDS, VALUE_FIELDS
+
+
+def _batch_and_text():
+    msgs = build_corpus(60, seed=4)
+    msgs.insert(7, Msg(b"\x01\x02", 1, 1, "AB", 1700000000, 15, 6, 2024, 0, 6))
+    return ABRace().translate_columns(msgs, 1), ABRace().translate_batch(msgs, 1)
+
+
+def test_columns_match_text_output():
+    batch, text = _batch_and_text()
+
+    assert len(batch) == len(text)
+    assert list(batch.columns) == list(VALUE_FIELDS)
+    assert isinstance(batch["ttl_cost"], array)
+    assert isinstance(batch["bet_type"], list)
+
+    for i, result in enumerate(text.results):
+        if text.errors[i] is not None:
+            assert batch.errors[i] == text.errors[i]
+            continue
+        values = result.split(DELIMITER_SIM_SEL, 1)[1].split(DELIMITER)
+        assert [str(batch[name][i]) for name in VALUE_FIELDS] == values
+
+
+def test_error_rows_are_filled_with_defaults():
+    batch, text = _batch_and_text()
+    failed = [i for i, error in enumerate(text.errors) if error is not None]
+
+    assert batch.error_count == len(failed)
+    for i in failed:
+        assert batch["ttl_cost"][i] == 0
+        assert batch["bet_type"][i] == ""
+
+
+def test_unsigned_amounts_above_int64():
+    cost = (1 << 63) + 5
+    msg = Msg(encode_racing_message(BETTYP_WIN, cost), 0, 1, "AB", 1700000000,
+              15, 6, 2024, 1700000000, LOGAB_CODE_RAC)
+    msgs = build_corpus(3, seed=5) + [msg]
+
+    batch = ABRace().translate_columns(msgs, 1)
+    text = ABRace().translate_batch(msgs, 1)
+
+    assert batch["ttl_cost"].typecode == "Q"
+    assert batch["ttl_cost"][3] == cost
+    assert batch.errors == text.errors == [None] * 4
+    values = text.results[3].split(DELIMITER_SIM_SEL, 1)[1].split(DELIMITER)
+    assert [str(batch[name][3]) for name in VALUE_FIELDS] == values
+
+
+def test_out_of_range_value_fails_only_its_row():
+    batch, _ = _batch_and_text()
+    rows = [[batch[name][i] for name in VALUE_FIELDS] for i in range(3)]
+    rows[1][VALUE_FIELDS.index("msg_order_no")] = 1 << 63
+
+    narrow = ColumnarBatch.from_rows(rows, [None] * 3)
+
+    assert narrow.errors[0] is None and narrow.errors[2] is None
+    assert narrow.errors[1].startswith(ERROR_PREFIX) and "msg_order_no" in narrow.errors[1]
+    assert narrow["msg_order_no"][1] == 0
+    assert narrow["bet_type"][1] == ""
+    assert narrow["ttl_cost"][2] == batch["ttl_cost"][2]
+
+
+def test_write_npz(tmp_path):
+    np = pytest.importorskip("numpy")
+    batch, _ = _batch_and_text()
+    path = tmp_path / "batch.npz"
+
+    batch.write_npz(path)
+
+    with np.load(path) as data:
+        assert data["ttl_cost"].dtype == np.uint64
+        assert data["msg_order_no"].dtype == np.int64
+        assert list(data["ttl_cost"]) == list(batch["ttl_cost"])
+        assert list(data["sb_selection"]) == batch["sb_selection"]
+        assert len(data["error"]) == len(batch)
+
+
+def test_write_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    batch, _ = _batch_and_text()
+    path = tmp_path / "batch.parquet"
+
+    batch.write_parquet(path)
+
+    table = pq.read_table(path)
+    assert table.num_rows == len(batch)
+    assert table.column("msg_order_no").to_pylist() == list(batch["msg_order_no"])
+    assert table.column("error").to_pylist() == batch.errors
+    assert set(STRING_FIELDS) <= set(table.column_names)
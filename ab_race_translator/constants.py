@@ -86,6 +86,13 @@ TRANSLATE_ERR = "TRANSLATE_ERR"
 # Buffer Size
 BUF_SIZE = 8192
 
+# Month abbreviations indexed by month number (1-12); index 0 is unused
+MONTH_NAMES = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Prefix of in-band translation error results
+ERROR_PREFIX = "ERROR: "
+
 # Formula Constants (from DeSelMap.cpp)
 FORMULA_NAMES = {
     0: "2x1", 1: "2x3", 2: "3x1", 3: "3x3", 4: "3x4", 5: "3x6", 6: "3x7",
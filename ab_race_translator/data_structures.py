@@ -5,10 +5,64 @@ Converted from C++ structures in LOGDEF_AB.h and related headers.
 These classes represent the binary message format used in the AB racing system.
 """
 
-import struct
 import time
-from dataclasses import dataclass
-from typing import List, Optional, Union
+from dataclasses import dataclass, fields
+from typing import List, Optional, Type, TypeVar, Union
+
+from . import metrics as _metrics
+from .constants import ERROR_PREFIX, LOGAB_CODE_RAC
+from .layouts import BETHDR, LOGAB_HDR, RAC_BETHDR_OFFSET
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def as_byte_buffer(data: Buffer) -> Buffer:
+    """
+    Normalize a message buffer for offset-based decoding.
+
+    bytes and bytearray are returned unchanged. A memoryview is returned
+    as-is when it is already a flat byte view, otherwise it is recast to
+    unsigned bytes. No data is copied in either case.
+
+    Args:
+        data: Message buffer
+
+    Returns:
+        Buffer: Buffer whose len() and offsets are in bytes
+    """
+    if type(data) is memoryview and (data.format != "B" or data.ndim != 1):
+        return data.cast("B")
+    return data
+
+
+_T = TypeVar("_T")
+
+
+def slotted(cls: Type[_T]) -> Type[_T]:
+    """
+    Rebuild a dataclass with __slots__ and no per-instance __dict__.
+
+    Equivalent to dataclass(slots=True), which is only available from
+    Python 3.10. Instances keep the same attribute API but are smaller and
+    cheaper to create, which matters for the structure graph built for
+    every decoded message.
+
+    Args:
+        cls: Dataclass to rebuild
+
+    Returns:
+        Type: Slotted dataclass
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    for name in names:
+        # Defaults live in the generated __init__; class attributes of the
+        # same name would conflict with the slot descriptors
+        namespace.pop(name, None)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
 
 
 @dataclass
@@ -16,8 +70,11 @@ class Msg:
     """
     Main message structure containing the binary buffer and metadata.
     Equivalent to C++ Msg structure.
+
+    m_cpBuf may be bytes, a bytearray, or a zero-copy memoryview slice of a
+    larger shared buffer such as a memory-mapped tape.
     """
-    m_cpBuf: bytes
+    m_cpBuf: Buffer
     m_iMsgErrwu: int
     m_iSysNo: int
     m_iSysName: str
@@ -29,6 +86,7 @@ class Msg:
     m_iMsgCode: int = 0
 
 
+@slotted
 @dataclass
 class LogabHdr:
     """
@@ -54,19 +112,22 @@ class LogabHdr:
     custSessIdd: int = 0
 
 
-@dataclass 
+@slotted
+@dataclass
 class BetFlexiCombo:
     """Flexi bet combination structure"""
     baseinv: int  # 31 bits
     flexibet: int  # 1 bit
 
 
+@slotted
 @dataclass
 class BetInvestCombo:
     """Investment combination union"""
     flexi: BetFlexiCombo
 
 
+@slotted
 @dataclass
 class BetHdr:
     """
@@ -81,6 +142,7 @@ class BetHdr:
     bettypebu: int
 
 
+@slotted
 @dataclass
 class BetInd:
     """
@@ -95,6 +157,7 @@ class BetInd:
     twoentry: int
 
 
+@slotted
 @dataclass
 class BetAupSel:
     """
@@ -111,6 +174,7 @@ class BetAupSel:
     pftrlu: int
 
 
+@slotted
 @dataclass
 class BetAup:
     """
@@ -125,6 +189,7 @@ class BetAup:
     sel: List[BetAupSel]  # array of selections
 
 
+@slotted
 @dataclass
 class BetExBnk:
     """
@@ -135,6 +200,7 @@ class BetExBnk:
     bnkbu: Optional[List[int]] = None  # banker counts
 
 
+@slotted
 @dataclass
 class BetExoStd:
     """
@@ -152,6 +218,7 @@ class BetExoStd:
     betexbnk: BetExBnk
 
 
+@slotted
 @dataclass
 class BetVar:
     """
@@ -162,6 +229,7 @@ class BetVar:
     es: Optional[BetExoStd] = None  # exotic/standard
 
 
+@slotted
 @dataclass
 class BetData:
     """
@@ -172,6 +240,7 @@ class BetData:
     var: BetVar
 
 
+@slotted
 @dataclass
 class LogabRac:
     """
@@ -185,6 +254,7 @@ class LogabRac:
     d: BetData  # bet data
 
 
+@slotted
 @dataclass
 class LogabData:
     """
@@ -194,6 +264,7 @@ class LogabData:
     bt_rac: Optional[LogabRac] = None
 
 
+@slotted
 @dataclass
 class Logab:
     """
@@ -204,14 +275,58 @@ class Logab:
     data: LogabData
 
 
+@dataclass
+class BatchResult:
+    """
+    Result of translating a batch of messages.
+    results[i] is the translated output of the i-th input message and
+    errors[i] holds its error text, or None when it translated cleanly.
+    """
+    results: List[str]
+    errors: List[Optional[str]]
+
+    @classmethod
+    def from_results(cls, results: List[str]) -> "BatchResult":
+        """
+        Build a batch result, filling error slots from in-band error results.
+        
+        Args:
+            results: Translated outputs in input order
+            
+        Returns:
+            BatchResult: Batch result
+        """
+        errors = [result if result.startswith(ERROR_PREFIX) else None
+                  for result in results]
+        return cls(results=results, errors=errors)
+
+    @property
+    def error_count(self) -> int:
+        """int: Number of messages that failed to translate."""
+        return sum(1 for error in self.errors if error is not None)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+
+_HDR_SIZE = LOGAB_HDR.size
+_HDR_UNPACK = LOGAB_HDR.unpack_from
+_BETHDR_SIZE = BETHDR.size
+_BETHDR_UNPACK = BETHDR.unpack_from
+
+
 class StructParser:
     """
     Utility class for parsing binary structures from byte buffers.
     Handles the conversion from C++ packed structures to Python objects.
+
+    Every structure is decoded with a single unpack_from call on the
+    precompiled layouts in layouts.py, directly from the caller's buffer:
+    bytes, bytearray and memoryview slices are all decoded in place.
     """
     
     @staticmethod
-    def parse_logab_header(data: bytes, offset: int = 0) -> LogabHdr:
+    def parse_logab_header(data: Buffer, offset: int = 0) -> LogabHdr:
         """
         Parse LOGAB header from binary data.
         
@@ -222,36 +337,11 @@ class StructParser:
         Returns:
             LogabHdr: Parsed header structure
         """
-        try:
-            # Simplified parsing - adjust format string based on actual C++ struct layout
-            fmt = '<HHHBIIIBIII'  # Example format, adjust as needed
-            if len(data) < offset + struct.calcsize(fmt):
-                raise ValueError("Insufficient data for LOGAB header")
-                
-            values = struct.unpack_from(fmt, data, offset)
-            
-            return LogabHdr(
-                sizew=values[0],
-                codewu=values[1], 
-                errorwu=values[2],
-                trapcodebu=values[3],
-                stafflu=values[4],
-                ltnlu=values[5],
-                acclu=values[6],
-                filebu=values[7],
-                blocklu=values[8],
-                overflowlu=values[9],
-                offwu=values[10] if len(values) > 10 else 0,
-                tranwu=values[11] if len(values) > 11 else 0,
-                timelu=int(time.time()),  # Default to current time
-                lgslu=0,
-                msnlu=0
-            )
-        except (struct.error, IndexError, ValueError) as e:
-            # Return default header on parse error
+        if len(data) < offset + _HDR_SIZE:
+            # Return default header when the buffer is too short
             return LogabHdr(
                 sizew=len(data),
-                codewu=6,  # LOGAB_CODE_RAC
+                codewu=LOGAB_CODE_RAC,
                 errorwu=0,
                 trapcodebu=0,
                 stafflu=0,
@@ -262,13 +352,16 @@ class StructParser:
                 overflowlu=0,
                 offwu=0,
                 tranwu=0,
-                timelu=int(time.time()),
+                timelu=0,
                 lgslu=0,
                 msnlu=0
             )
+        
+        # tranwu, timelu, lgslu and msnlu are not decoded (see LOGAB_HDR)
+        return LogabHdr(*_HDR_UNPACK(data, offset), tranwu=0, timelu=0, lgslu=0, msnlu=0)
     
     @staticmethod
-    def parse_bet_header(data: bytes, offset: int) -> BetHdr:
+    def parse_bet_header(data: Buffer, offset: int) -> BetHdr:
         """
         Parse bet header from binary data.
         
@@ -279,28 +372,8 @@ class StructParser:
         Returns:
             BetHdr: Parsed bet header
         """
-        try:
-            # Simplified bet header parsing
-            fmt = '<QQI'  # totdu, cost, bettypebu
-            if len(data) < offset + struct.calcsize(fmt):
-                raise ValueError("Insufficient data for bet header")
-                
-            values = struct.unpack_from(fmt, data, offset)
-            
-            # Create flexi combo structure
-            flexi = BetFlexiCombo(baseinv=100, flexibet=0)  # Default values
-            betinvcomb = BetInvestCombo(flexi=flexi)
-            
-            return BetHdr(
-                totdu=values[0],
-                betinvcomb=betinvcomb,
-                costlu=values[1],
-                sellTime=int(time.time()),
-                businessDate=20240101,  # Default business date
-                bettypebu=values[2] if len(values) > 2 else 1
-            )
-        except (struct.error, IndexError, ValueError):
-            # Return default bet header on parse error
+        if len(data) < offset + _BETHDR_SIZE:
+            # Return default bet header when the buffer is too short
             flexi = BetFlexiCombo(baseinv=100, flexibet=0)
             betinvcomb = BetInvestCombo(flexi=flexi)
             
@@ -308,10 +381,25 @@ class StructParser:
                 totdu=0,
                 betinvcomb=betinvcomb,
                 costlu=0,
-                sellTime=int(time.time()),
+                sellTime=0,
                 businessDate=20240101,
                 bettypebu=1  # Default WIN bet
             )
+        
+        totdu, costlu, bettypebu = _BETHDR_UNPACK(data, offset)
+        
+        # betinvcomb is not decoded (see BETHDR)
+        flexi = BetFlexiCombo(baseinv=100, flexibet=0)  # Default values
+        betinvcomb = BetInvestCombo(flexi=flexi)
+        
+        return BetHdr(
+            totdu=totdu,
+            betinvcomb=betinvcomb,
+            costlu=costlu,
+            sellTime=0,
+            businessDate=20240101,  # Default business date
+            bettypebu=bettypebu
+        )
     
     @staticmethod
     def parse_logab_from_msg(msg: Msg) -> Logab:
@@ -325,15 +413,19 @@ class StructParser:
             Logab: Parsed LOGAB structure
         """
         try:
+            buf = as_byte_buffer(msg.m_cpBuf)
+            
             # Parse header
-            header = StructParser.parse_logab_header(msg.m_cpBuf)
+            header = StructParser.parse_logab_header(buf)
+            if not header.timelu:
+                header.timelu = msg.m_iMsgTime
             
             # For racing messages, parse racing data
-            if header.codewu == 6:  # LOGAB_CODE_RAC
-                # Parse bet header (simplified)
-                bet_hdr = StructParser.parse_bet_header(msg.m_cpBuf, 50)  # Estimated offset
+            if header.codewu == LOGAB_CODE_RAC:
+                bet_hdr = StructParser.parse_bet_header(buf, RAC_BETHDR_OFFSET)
+                bet_hdr.sellTime = msg.m_iMsgSellTime or header.timelu
                 
-                # Create simplified racing structure
+                # Bet bodies are not decoded (see layouts.py)
                 bet_var = BetVar()
                 bet_data = BetData(hdr=bet_hdr, var=bet_var)
                 
@@ -352,9 +444,10 @@ class StructParser:
             return Logab(hdr=header, data=logab_data)
             
         except Exception as e:
+            _metrics.record_exception("StructParser.parse_logab_from_msg", e)
             # Return minimal valid structure on any error
             header = LogabHdr(
-                sizew=len(msg.m_cpBuf),
+                sizew=len(as_byte_buffer(msg.m_cpBuf)),
                 codewu=msg.m_iMsgCode or 6,
                 errorwu=msg.m_iMsgErrwu,
                 trapcodebu=0,
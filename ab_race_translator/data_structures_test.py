@@ -0,0 +1,113 @@
+import pytest
+
+import time
+
+from ab_race_translator import Msg
+from ab_race_translator.constants import BETTYP_QIN, BETTYP_WIN, LOGAB_CODE_RAC
+from ab_race_translator.data_structures import BetVar, StructParser
+from ab_race_translator.layouts import BETHDR, LAYOUTS, LOGAB_HDR, RAC_BETHDR_OFFSET
+
+
+def _racing_buffer(bet_type, body=b"\x07" * 40):
+    size = RAC_BETHDR_OFFSET + BETHDR.size + len(body)
+    buf = bytearray(size)
+    LOGAB_HDR.struct.pack_into(
+        buf, 0, size, LOGAB_CODE_RAC, 0, 3, 11, 22, 33, 4, 55, 66, 77)
+    buf[LOGAB_HDR.size:RAC_BETHDR_OFFSET] = b"\x5a" * (RAC_BETHDR_OFFSET - LOGAB_HDR.size)
+    BETHDR.struct.pack_into(buf, RAC_BETHDR_OFFSET, 5000, 30000, bet_type)
+    buf[RAC_BETHDR_OFFSET + BETHDR.size:] = body
+    return bytes(buf)
+
+
+def _msg(buf):
+    return Msg(buf, 0, 1, "AB", 1700000500, 15, 6, 2024, 1700000400, LOGAB_CODE_RAC)
+
+
+def test_layout_registry_is_compiled():
+    assert set(LAYOUTS) == {"LOGAB_HDR", "BETHDR"}
+    assert LOGAB_HDR.size == 32
+    assert LOGAB_HDR.field_names()[-1] == "offwu"
+    assert BETHDR.format == "QQI"
+    assert BETHDR.size == 20
+
+
+def test_parse_racing_message():
+    logab = StructParser.parse_logab_from_msg(_msg(_racing_buffer(BETTYP_QIN)))
+
+    assert logab.hdr.codewu == LOGAB_CODE_RAC
+    assert logab.hdr.ltnlu == 22
+    # Header fields past offwu are not decoded; the time comes from the message
+    assert logab.hdr.offwu == 77
+    assert (logab.hdr.tranwu, logab.hdr.lgslu, logab.hdr.msnlu) == (0, 0, 0)
+    assert logab.hdr.timelu == 1700000500
+
+    bet = logab.data.bt_rac.d
+    assert (bet.hdr.totdu, bet.hdr.costlu, bet.hdr.bettypebu) == (5000, 30000, BETTYP_QIN)
+    assert bet.hdr.sellTime == 1700000400
+    assert bet.hdr.businessDate == 20240101
+    # betinvcomb and the bet body are not decoded
+    assert (bet.hdr.betinvcomb.flexi.baseinv, bet.hdr.betinvcomb.flexi.flexibet) == (100, 0)
+    assert bet.var == BetVar()
+
+
+def test_short_buffer_falls_back_to_defaults():
+    msg = Msg(b"invalid_data", 0, 1, "AB", 1700000500, 15, 6, 2024, 0, 0)
+    logab = StructParser.parse_logab_from_msg(msg)
+
+    assert logab.hdr.sizew == len(b"invalid_data")
+    assert logab.hdr.timelu == 1700000500
+    assert logab.data.bt_rac.d.hdr.bettypebu == BETTYP_WIN
+    assert logab.data.bt_rac.d.hdr.sellTime == 1700000500
+    assert logab.data.bt_rac.d.var.es is None
+
+
+def test_short_bet_header_falls_back_to_defaults():
+    record = _racing_buffer(BETTYP_QIN, b"")[:RAC_BETHDR_OFFSET + BETHDR.size - 1]
+    bet = StructParser.parse_logab_from_msg(_msg(record)).data.bt_rac.d
+
+    assert (bet.hdr.totdu, bet.hdr.costlu, bet.hdr.bettypebu) == (0, 0, BETTYP_WIN)
+
+
+def test_parse_does_not_read_clock(monkeypatch):
+    def fail():
+        raise AssertionError("time.time() called while decoding")
+
+    buf = _racing_buffer(BETTYP_WIN)
+    monkeypatch.setattr(time, "time", fail)
+
+    StructParser.parse_logab_from_msg(_msg(buf))
+
+
+def test_parse_memoryview_slice_of_shared_buffer():
+    record = _racing_buffer(BETTYP_QIN)
+    tape = bytearray(b"\xff" * 13 + record + b"\xff" * 7)
+    view = memoryview(tape)[13:13 + len(record)]
+
+    expected = StructParser.parse_logab_from_msg(_msg(record))
+
+    assert StructParser.parse_logab_from_msg(_msg(view)) == expected
+    assert StructParser.parse_logab_from_msg(_msg(bytearray(record))) == expected
+
+
+def test_parse_non_byte_memoryview():
+    record = _racing_buffer(BETTYP_WIN)
+    padded = record + bytes(-len(record) % 4)
+    words = memoryview(padded).cast("I")
+
+    logab = StructParser.parse_logab_from_msg(_msg(words))
+
+    assert logab.hdr.sizew == len(record)
+    assert logab.data.bt_rac.d.hdr.costlu == 30000
+
+
+def test_decoded_structures_are_slotted():
+    logab = StructParser.parse_logab_from_msg(_msg(_racing_buffer(BETTYP_WIN)))
+
+    bet = logab.data.bt_rac.d
+    for obj in (logab, logab.hdr, logab.data, logab.data.bt_rac, bet, bet.hdr,
+                bet.hdr.betinvcomb, bet.hdr.betinvcomb.flexi, bet.var):
+        assert not hasattr(obj, "__dict__"), type(obj).__name__
+
+    with pytest.raises(AttributeError):
+        logab.hdr.unknown_field = 1
+    assert logab == StructParser.parse_logab_from_msg(_msg(_racing_buffer(BETTYP_WIN)))
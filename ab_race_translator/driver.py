@@ -0,0 +1,160 @@
+"""
+Tape Driver
+
+End-to-end batch path: reads a logger tape, translates its racing records
+with the parallel driver and writes the results to an output sink.
+
+With a checkpoint path the run commits a checkpoint (see checkpoint.py)
+every checkpoint_every records, at a shard boundary, after the sink made
+the records durable. If the checkpoint file exists when the run starts, the
+run resumes from it; the file is removed once the run completes.
+"""
+
+import os
+from contextlib import nullcontext
+from datetime import tzinfo
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+
+from .checkpoint import DEFAULT_CHECKPOINT_RECORDS, Checkpoint
+from .data_structures import Msg
+from .parallel import DEFAULT_BATCH_SIZE, ParallelTranslator
+from .profiling import MemoryProfiler
+from .sink import OutputSink
+from .tape import TapeReader
+
+
+class TapeRunResult(NamedTuple):
+    """Summary of one tape translation run."""
+    records: int                      # records translated, including resumed ones
+    files: List[str]                  # output files written
+    truncated_offset: Optional[int]   # offset of a truncated trailing record
+    resumed_offset: Optional[int] = None  # tape offset the run resumed from
+
+
+def _shard_messages(reader: TapeReader, start_offset: int, end_offset: Optional[int],
+                    batch_size: int, boundaries: Dict[int, int]) -> Iterator[Msg]:
+    """
+    Iterate over tape messages, noting the tape offset after each shard.
+
+    Args:
+        reader: Tape reader
+        start_offset: Byte offset of the first record
+        end_offset: Stop before the record starting at or after this offset
+        batch_size: Number of messages per shard
+        boundaries: Receives message count -> offset of the next record,
+            for every full shard and the end of the stream
+
+    Yields:
+        Msg: Messages in tape order
+    """
+    to_msg = reader.to_msg
+    count = 0
+    offset = start_offset
+    for record in reader.records(start_offset, end_offset):
+        count += 1
+        offset = record.end_offset
+        # Noted before the message is handed out, as the shard is
+        # complete as soon as its last message is taken
+        if count % batch_size == 0:
+            boundaries[count] = offset
+        yield to_msg(record)
+    boundaries[count] = offset
+
+
+def translate_tape(tape_path: Union[str, "os.PathLike[str]"], sink: OutputSink,
+                   workers: Optional[int] = 1,
+                   batch_size: int = DEFAULT_BATCH_SIZE,
+                   tape_id: int = 1, sys_no: int = 1, sys_name: str = "AB",
+                   start_offset: int = 0, end_offset: Optional[int] = None,
+                   start_order_no: int = 1,
+                   profiler: Optional[MemoryProfiler] = None,
+                   checkpoint_path: Optional[Union[str, "os.PathLike[str]"]] = None,
+                   checkpoint_every: int = DEFAULT_CHECKPOINT_RECORDS,
+                   time_offset: Optional[int] = None,
+                   tz: Optional[tzinfo] = None) -> TapeRunResult:
+    """
+    Translate the records of a tape into an output sink.
+
+    The sink is closed when the run completes, finishing its last file.
+
+    Args:
+        tape_path: Tape file path
+        sink: Output sink
+        workers: Number of worker processes, None for the CPU count
+        batch_size: Number of messages per shard (one sink batch each)
+        tape_id: Logger tape ID
+        sys_no: System number reported in each Msg
+        sys_name: System name reported in each Msg
+        start_offset: Byte offset of the first record
+        end_offset: Stop before the record starting at or after this offset
+        start_order_no: Logger message order number of the first record
+        profiler: Memory profiler sampled after every shard; forces
+            in-process translation so the translator can be inspected
+        checkpoint_path: Checkpoint file to commit to and resume from,
+            None to run without checkpoints
+        checkpoint_every: Records translated between checkpoints
+        time_offset: Byte offset of the message time within each record,
+            see TapeReader
+        tz: Timezone of the message dates and formatted times, None for
+            local time
+
+    Returns:
+        TapeRunResult: Run summary
+
+    Raises:
+        ValueError: If the checkpoint belongs to another tape or does not
+            match the output
+    """
+    if checkpoint_every < 1:
+        raise ValueError("checkpoint_every must be at least 1")
+    if profiler is not None:
+        workers = 1
+
+    tape_path = os.path.abspath(tape_path)
+    resumed = None
+    resumed_records = 0
+    if checkpoint_path is not None:
+        resumed = Checkpoint.load(checkpoint_path)
+        if resumed is not None:
+            if resumed.tape_path != tape_path or resumed.tape_id != tape_id:
+                raise ValueError(f"Checkpoint {os.fspath(checkpoint_path)} belongs to "
+                                 f"tape {resumed.tape_id} at {resumed.tape_path}")
+            if resumed.offset > os.path.getsize(tape_path):
+                raise ValueError(f"Checkpoint offset {resumed.offset} is past the end of {tape_path}")
+            sink.resume(resumed.sink)
+            start_offset = resumed.offset
+            start_order_no = resumed.last_order_no + 1
+            resumed_records = resumed.records
+
+    with TapeReader(tape_path, sys_no=sys_no, sys_name=sys_name,
+                    time_offset=time_offset, tz=tz) as reader, \
+            ParallelTranslator(workers=workers, batch_size=batch_size,
+                               tape_id=tape_id, tz=tz) as translator:
+        with sink:
+            if profiler is None and checkpoint_path is None:
+                count = translator.translate_to(reader.messages(start_offset, end_offset),
+                                                sink, start_order_no)
+            else:
+                boundaries: Dict[int, int] = {}
+                msgs = _shard_messages(reader, start_offset, end_offset, batch_size, boundaries)
+                count = 0
+                committed = 0
+                with profiler if profiler is not None else nullcontext():
+                    for results in translator.translate_shards(msgs, start_order_no):
+                        sink.write_batch(results)
+                        count += len(results)
+                        offset = boundaries.pop(count)
+                        if profiler is not None:
+                            profiler.maybe_sample(count, translator.local_translator)
+                        if checkpoint_path is not None and count - committed >= checkpoint_every:
+                            Checkpoint(tape_path, offset, start_order_no + count - 1,
+                                       resumed_records + count, sink.checkpoint(),
+                                       tape_id).save(checkpoint_path)
+                            committed = count
+                    if profiler is not None and profiler.samples[-1].messages != count:
+                        profiler.sample(count, translator.local_translator)
+
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return TapeRunResult(resumed_records + count, list(sink.files), reader.truncated_offset,
+                             resumed.offset if resumed is not None else None)
@@ -0,0 +1,27 @@
+import pytest
+
+import gzip
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.bench.corpus import build_corpus
+from ab_race_translator.driver import translate_tape
+from ab_race_translator.sink import OutputSink
+from ab_race_translator.tape import TapeReader
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_translate_tape_into_sink(tmp_path, workers):
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(bytes(m.m_cpBuf) for m in build_corpus(120, seed=5)) + b"\x40")
+
+    with TapeReader(path) as reader:
+        expected = create_ab_race().translate_batch(list(reader.messages()), start_order_no=1).results
+
+    sink = OutputSink(tmp_path / "out", compression="gzip", max_records=50)
+    result = translate_tape(path, sink, workers=workers, batch_size=16)
+
+    assert result.records == 120
+    assert len(result.files) == 3
+    assert result.truncated_offset == path.stat().st_size - 1
+    lines = b"".join(gzip.open(p).read() for p in result.files).decode().splitlines()
+    assert lines == expected
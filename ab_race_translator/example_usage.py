@@ -6,8 +6,12 @@ Demonstrates how to use the ab_race_translator package to process racing message
 
 import time
 import os
+import tempfile
 from ab_race_translator import create_ab_race, Msg
+from ab_race_translator.constants import LOGAB_CODE_RAC
 from ab_race_translator.data_structures import create_sample_msg
+from ab_race_translator.layouts import LOGAB_HDR
+from ab_race_translator.tape import TapeReader
 
 
 def basic_usage_example():
@@ -297,41 +301,41 @@ def debugging_example():
 
 def file_processing_example():
     """
-    Example showing file-based message processing.
+    Example showing file-based message processing with the tape reader.
     """
     print("\n=== File Processing Example ===")
     
     translator = create_ab_race()
     
+    # The sample tape carries its message time right after the LOGAB header
+    time_offset = LOGAB_HDR.size
+    
+    def write_sample_tape(file_path: str):
+        """Write a small logger tape of racing records."""
+        with open(file_path, 'wb') as f:
+            for i in range(3):
+                record = bytearray(200)
+                LOGAB_HDR.struct.pack_into(
+                    record, 0, len(record), LOGAB_CODE_RAC, 0, 0, 0, i, 0, 0,
+                    0, 0, 0
+                )
+                record[time_offset:time_offset + 4] = (int(time.time()) + i).to_bytes(4, "little")
+                f.write(record)
+    
     def process_binary_file(file_path: str) -> list:
-        """Process binary messages from file."""
+        """Process binary messages from a logger tape."""
         results = []
         
         try:
-            # Simulate reading binary file (in real scenario, you'd read actual binary data)
-            # For demo, we'll create sample data
-            sample_messages = [
-                b'\x00' * 180,
-                b'\x01' * 190, 
-                b'\x02' * 200
-            ]
-            
-            for i, binary_data in enumerate(sample_messages):
-                msg = Msg(
-                    m_cpBuf=binary_data,
-                    m_iMsgErrwu=0,
-                    m_iSysNo=1,
-                    m_iSysName="FILE_AB",
-                    m_iMsgTime=int(time.time()),
-                    m_iMsgDay=1,
-                    m_iMsgMonth=6,
-                    m_iMsgYear=2024,
-                    m_iMsgCode=6
-                )
+            with TapeReader(file_path, sys_no=1, sys_name="FILE_AB",
+                            time_offset=time_offset) as reader:
+                for i, msg in enumerate(reader.messages()):
+                    result = translator.translate_action(msg)
+                    results.append(result)
+                    print(f"Processed message {i+1} from file: {len(result)} chars")
                 
-                result = translator.translate_action(msg)
-                results.append(result)
-                print(f"Processed message {i+1} from file: {len(result)} chars")
+                if reader.trailing_bytes:
+                    print(f"Ignored {reader.trailing_bytes} trailing bytes")
             
         except Exception as e:
             print(f"Error processing file: {e}")
@@ -339,7 +343,10 @@ def file_processing_example():
         return results
     
     # Process sample file
-    results = process_binary_file("sample_messages.bin")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "sample_messages.bin")
+        write_sample_tape(file_path)
+        results = process_binary_file(file_path)
     print(f"File processing completed: {len(results)} messages processed")
 
 
@@ -0,0 +1,161 @@
+"""
+LOGAB Structure Layouts
+
+Declarative byte layouts for the LOGAB sub-structures decoded by StructParser.
+Each layout is described once here and compiled at import time into a cached
+struct.Struct plus an offset table, so decoding a structure costs a single
+unpack_from call and no format string is rebuilt on the hot path.
+
+Layouts are packed little-endian, matching the #pragma pack(1) C++ headers
+in LOGDEF_AB.h.
+"""
+
+import struct
+from typing import Dict, List, Sequence, Tuple, Union
+
+FieldSpec = Union[Tuple[str, str], Tuple[str, str, int],
+                  Tuple[str, "StructLayout", int]]
+
+
+class StructLayout:
+    """
+    Compiled layout of one packed C++ structure.
+
+    Fields are given as (name, code) or (name, code, count) tuples where code
+    is a single struct format character or a nested StructLayout. Arrays and
+    nested structures are flattened into the unpacked value tuple.
+    """
+
+    def __init__(self, name: str, fields: Sequence[FieldSpec], byte_order: str = "<"):
+        """
+        Compile the layout.
+
+        Args:
+            name: C++ structure name
+            fields: Field specifications in declaration order
+            byte_order: struct byte order prefix
+        """
+        self.name = name
+        self.byte_order = byte_order
+        self.fields: Tuple[FieldSpec, ...] = tuple(fields)
+
+        fmt = ""
+        index = 0
+        self.offsets: Dict[str, int] = {}
+        self.indices: Dict[str, int] = {}
+        self.counts: Dict[str, int] = {}
+
+        for spec in self.fields:
+            field_name, code = spec[0], spec[1]
+            count = spec[2] if len(spec) > 2 else 1
+
+            self.offsets[field_name] = struct.calcsize(byte_order + fmt)
+            self.indices[field_name] = index
+            self.counts[field_name] = count
+
+            if isinstance(code, StructLayout):
+                fmt += code.format * count
+                index += code.value_count * count
+            else:
+                fmt += code * count if count > 1 else code
+                index += count
+
+        self.format = fmt
+        self.value_count = index
+        self.struct = struct.Struct(byte_order + fmt)
+        self.size = self.struct.size
+        self.unpack_from = self.struct.unpack_from
+        self.pack = self.struct.pack
+
+    def field_offset(self, name: str) -> int:
+        """
+        Get the byte offset of a field from the start of the structure.
+
+        Args:
+            name: Field name
+
+        Returns:
+            int: Byte offset
+        """
+        return self.offsets[name]
+
+    def field_index(self, name: str) -> int:
+        """
+        Get the position of a field's first value in the unpacked tuple.
+
+        Args:
+            name: Field name
+
+        Returns:
+            int: Tuple index
+        """
+        return self.indices[name]
+
+    def field_names(self) -> List[str]:
+        """
+        Get field names in declaration order.
+
+        Returns:
+            List[str]: Field names
+        """
+        return [spec[0] for spec in self.fields]
+
+    def __repr__(self) -> str:
+        return f"StructLayout({self.name!r}, format={self.struct.format!r}, size={self.size})"
+
+
+# LOGAB_HDR - leading fields of the common header of every logger message,
+# as decoded by the original converter. The C++ header continues with
+# tranwu, timelu, lgslu and msnlu (46 bytes in all), but their offsets are
+# not confirmed against logger captures: the reference message in
+# ab_resr_translator_test.py carries its time at byte 37, not 34. They are
+# not decoded; StructParser leaves them 0 and takes timelu from the message
+# metadata, and tape readers only read a message time at an explicitly
+# configured time_offset.
+LOGAB_HDR = StructLayout("LOGAB_HDR", [
+    ("sizew", "H"),        # message size in bytes
+    ("codewu", "H"),       # message code
+    ("errorwu", "H"),      # error code
+    ("trapcodebu", "B"),   # BCS trap code
+    ("stafflu", "I"),      # staff number
+    ("ltnlu", "I"),        # logical terminal number
+    ("acclu", "I"),        # account number
+    ("filebu", "B"),       # account file number
+    ("blocklu", "I"),      # account file block number
+    ("overflowlu", "I"),   # overflow block number
+    ("offwu", "I"),        # offset to account unit
+])
+
+# BETHDR - racing bet header, as decoded by the original converter. The
+# betinvcomb union (unit bet / no. of combinations and the flexi flag) that
+# follows bettypebu is not confirmed against logger captures and is not
+# decoded; neither are the BETEXOSTD / BETAUP bet bodies.
+BETHDR = StructLayout("BETHDR", [
+    ("totdu", "Q"),        # total payout in cents
+    ("costlu", "Q"),       # total cost in cents
+    ("bettypebu", "I"),    # bet type
+])
+
+# Offset of the bet header within a LOGAB_RAC message. This is the original
+# converter's offset; it is not derived from LOGAB_HDR.size and the bytes
+# in between are not decoded.
+RAC_BETHDR_OFFSET = 50
+
+# Registry of all compiled layouts by C++ structure name
+LAYOUTS: Dict[str, StructLayout] = {
+    layout.name: layout
+    for layout in (LOGAB_HDR, BETHDR)
+}
+
+
+def get_layout(name: str) -> StructLayout:
+    """
+    Look up a compiled layout by C++ structure name.
+
+    Args:
+        name: Structure name, e.g. "BETHDR"
+
+    Returns:
+        StructLayout: Compiled layout
+    """
+    return LAYOUTS[name]
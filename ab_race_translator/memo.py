@@ -0,0 +1,165 @@
+"""
+Translation Memo
+
+Bounded LRU memo of rendered racing fields for retransmitted messages.
+
+Catch-up traffic and front end replays carry bet bodies identical to
+messages already translated. With a memo attached, ABRace keys each racing
+message on a BLAKE2b digest of its bet (everything from the bet header on)
+and its sell time, which together determine every racing field.
+On a hit only the LOGAB header is decoded and the header fields packed by
+pack_header; the cached racing fields are appended to the record as they
+were produced, so hits pay only for a tuple copy of the fields.
+
+The memo is capped by an estimate of the memory its entries hold and
+optionally by entry count; the least recently used entries are evicted
+first. Hit and miss counts are kept by the memo and, when metrics are
+enabled, reported to the active registry as well.
+"""
+
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Dict, Optional, Tuple
+
+from .layouts import RAC_BETHDR_OFFSET
+
+# Default memory cap of a memo in bytes
+DEFAULT_MEMO_BYTES = 32 << 20
+
+# Digest size of the bet body hash in bytes
+MEMO_DIGEST_SIZE = 16
+
+# Estimated bytes of an entry besides its fields: key tuple, digest bytes
+# object, entry tuple, dict and linked list slots of the OrderedDict
+_ENTRY_OVERHEAD = 300
+
+# Estimated bytes per cached field: tuple slot plus its share of the
+# strings and large integers held (measured with tracemalloc on the
+# benchmark corpus)
+_FIELD_BYTES = 28
+
+# The bet header and body; the undecoded header bytes before them are not keyed
+_BODY_OFFSET = RAC_BETHDR_OFFSET
+
+MemoKey = Tuple[bytes, int, int]
+
+# Cached racing fields: fields and blocks as appended (see
+# RecordBuilder.tail), number of blocks among them, bet type
+MemoEntry = Tuple[tuple, int, int]
+
+
+class TranslationMemo:
+    """LRU memo of rendered racing fields keyed on the bet body."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMO_BYTES,
+                 max_entries: Optional[int] = None):
+        """
+        Initialize an empty memo.
+
+        Args:
+            max_bytes: Estimated memory cap of all entries in bytes
+            max_entries: Optional cap on the number of entries
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries: "OrderedDict[MemoKey, Tuple[MemoEntry, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(buf, sell_time: int, anonymous: int = 0) -> MemoKey:
+        """
+        Build the memo key of a racing message.
+
+        Args:
+            buf: Message buffer
+            sell_time: Sell time the racing fields are rendered with
+            anonymous: Anonymous account flag of the LOGAB header
+
+        Returns:
+            MemoKey: Bet body digest, sell time and anonymous flag
+        """
+        digest = blake2b(buf[_BODY_OFFSET:], digest_size=MEMO_DIGEST_SIZE).digest()
+        return digest, sell_time, anonymous
+
+    def get(self, key: MemoKey) -> Optional[MemoEntry]:
+        """
+        Look up the racing fields of a key and count the hit or miss.
+
+        Args:
+            key: Memo key
+
+        Returns:
+            Optional[MemoEntry]: Cached racing fields, None on a miss
+        """
+        item = self._entries.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return item[0]
+
+    def put(self, key: MemoKey, entry: MemoEntry):
+        """
+        Store the racing fields of a key, evicting old entries over the caps.
+
+        Entry sizes are estimated from the number of cached fields.
+
+        Args:
+            key: Memo key
+            entry: Racing fields
+        """
+        size = _ENTRY_OVERHEAD + _FIELD_BYTES * len(entry[0])
+        if size > self.max_bytes:
+            return
+        entries = self._entries
+        old = entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        entries[key] = (entry, size)
+        self.bytes += size
+
+        max_entries = self.max_entries
+        while self.bytes > self.max_bytes or (max_entries is not None and len(entries) > max_entries):
+            _, (_, evicted) = entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        """float: Share of lookups that were hits, 0 before any lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the memo counters.
+
+        Returns:
+            Dict[str, Any]: Entries, estimated bytes, hits, misses,
+                evictions and hit rate
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 6),
+        }
+
+    def clear(self):
+        """Drop every entry; counters are kept."""
+        self._entries.clear()
+        self.bytes = 0
@@ -0,0 +1,93 @@
+import pytest
+
+from dataclasses import replace
+
+from ab_race_translator.ab_race import ABRace
+from ab_race_translator.bench.corpus import build_corpus
+from ab_race_translator.data_structures import Msg
+from ab_race_translator.constants import LOGAB_CODE_RAC
+from ab_race_translator.memo import TranslationMemo
+from ab_race_translator.metrics import Metrics, disable_metrics, enable_metrics
+
+
+def _with_retransmissions(count, seed):
+    """Corpus where every third message replays an earlier bet body with a new header."""
+    msgs = []
+    for i, msg in enumerate(build_corpus(count, seed=seed)):
+        msgs.append(msg)
+        if i % 3 == 2:
+            original = msgs[i // 2]
+            buf = bytearray(original.m_cpBuf)
+            buf[10:14] = (1000 + i).to_bytes(4, "little")
+            msgs.append(replace(original, m_cpBuf=bytes(buf), m_iSysName="AB2"))
+    return msgs
+
+
+def test_output_matches_unmemoized_translation():
+    msgs = _with_retransmissions(120, seed=4)
+    expected = ABRace().translate_batch(msgs, start_order_no=1).results
+    translator = ABRace(memo=TranslationMemo())
+
+    assert translator.translate_batch(msgs, start_order_no=1).results == expected
+    translator.m_iLoggerMsgOrderNo = 1
+    assert [translator.translate_action(msg) for msg in msgs[:20]] == \
+        [ABRace().translate_action(msg) for msg in msgs[:20]]
+    assert translator.memo.hits >= 40
+    assert translator.memo.misses == 120
+
+    columns = ABRace(memo=TranslationMemo()).translate_columns(msgs).columns
+    assert columns == ABRace().translate_columns(msgs).columns
+
+
+def test_sell_time_is_part_of_the_key():
+    msg = build_corpus(1, seed=2)[0]
+    later = replace(msg, m_iMsgSellTime=msg.m_iMsgTime + 3600)
+    translator = ABRace(memo=TranslationMemo())
+
+    assert translator.translate_action(msg) == ABRace().translate_action(msg)
+    assert translator.translate_action(later) == ABRace().translate_action(later)
+    assert translator.memo.hits == 0
+
+
+def test_memory_and_entry_caps_evict_least_recently_used():
+    msgs = build_corpus(50, seed=6)
+    translator = ABRace(memo=TranslationMemo(max_entries=10))
+    translator.translate_batch(msgs)
+
+    assert len(translator.memo) == 10
+    assert translator.memo.evictions == 40
+
+    memo = TranslationMemo(max_bytes=8000)
+    translator = ABRace(memo=memo)
+    translator.translate_batch(msgs)
+    assert 0 < memo.bytes <= 8000
+    assert memo.evictions == 50 - len(memo)
+
+    # The most recent message is still cached
+    translator.translate_action(msgs[-1])
+    assert memo.hits == 1
+
+
+def test_errors_are_not_memoized():
+    translator = ABRace(memo=TranslationMemo())
+    bad = Msg(None, 0, 1, "AB", 0, 1, 1, 2024, 0, LOGAB_CODE_RAC)
+
+    assert translator.translate_action(bad).startswith("ERROR")
+    assert len(translator.memo) == 0
+
+
+def test_hit_rate_metrics():
+    registry = enable_metrics(Metrics())
+    try:
+        msgs = build_corpus(10, seed=3)
+        translator = ABRace(memo=TranslationMemo())
+        translator.translate_batch(msgs + msgs)
+    finally:
+        disable_metrics()
+
+    assert (registry.memo_hits, registry.memo_misses) == (10, 10)
+    assert registry.messages == 20
+    assert registry.stages["total"].count == 20
+    assert registry.snapshot()["memo"]["hit_rate"] == 0.5
+    assert 'ab_race_memo_lookups_total{result="hit"} 10' in registry.to_prometheus()
+    assert translator.memo.stats()["hit_rate"] == 0.5
@@ -0,0 +1,192 @@
+"""
+Tape Merge Driver
+
+Translates the tapes of several systems concurrently and merges their
+outputs into one stream ordered by message time, read from each record at
+the time_offset of its TapeSource and reported as Msg.m_iMsgTime. The
+header offset of the message time is not confirmed (see LOGAB_HDR), so it
+must be given explicitly, per source or for all of them.
+
+Each tape is translated by its own ParallelTranslator, all sharing one
+worker pool, and heapq.merge interleaves the translated streams. A stream
+has at most read_ahead shards in flight or buffered, so memory is bounded
+by the number of tapes times read_ahead * batch_size records, whatever the
+tape sizes.
+
+Logger tapes are written in time order, so each stream is assumed sorted;
+records of a tape that go back in time are emitted in their tape order.
+Records with equal times are emitted in source order.
+"""
+
+import heapq
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from datetime import tzinfo
+from operator import itemgetter
+from typing import Deque, Iterator, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .data_structures import Msg
+from .parallel import DEFAULT_BATCH_SIZE, ParallelTranslator, _worker_init
+from .sink import OutputSink
+from .tape import TapeReader
+
+# Shards per tape in flight or buffered ahead of the merge
+DEFAULT_READ_AHEAD = 2
+
+_TIME_KEY = itemgetter(0)
+
+
+class TapeSource(NamedTuple):
+    """One system tape to merge."""
+    path: Union[str, "os.PathLike[str]"]  # tape file path
+    sys_no: int = 1                       # system number reported in each Msg
+    sys_name: str = "AB"                  # system name reported in each Msg
+    tape_id: int = 1                      # logger tape ID
+    start_order_no: int = 1               # order number of the first record
+    time_offset: Optional[int] = None     # byte offset of the message time, None for
+                                          # the time_offset of the merge
+
+
+def _timed_messages(reader: TapeReader, times: Deque[int]) -> Iterator[Msg]:
+    """
+    Iterate over tape messages, queueing the time of each one taken.
+
+    Args:
+        reader: Tape reader
+        times: Receives message times in tape order
+
+    Yields:
+        Msg: Messages in tape order
+    """
+    to_msg = reader.to_msg
+    for record in reader.records():
+        times.append(record.timelu)
+        yield to_msg(record)
+
+
+def _timed_results(translator: ParallelTranslator, reader: TapeReader,
+                   start_order_no: int) -> Iterator[Tuple[int, str]]:
+    """
+    Translate a tape, pairing each output with its message time.
+
+    Args:
+        translator: Translator of the tape
+        reader: Tape reader
+        start_order_no: Order number of the first record
+
+    Yields:
+        Tuple[int, str]: Message time and translated output
+    """
+    times: Deque[int] = deque()
+    popleft = times.popleft
+    for results in translator.translate_shards(_timed_messages(reader, times), start_order_no):
+        for result in results:
+            yield popleft(), result
+
+
+def merge_tapes(sources: Sequence[Union[TapeSource, str, "os.PathLike[str]"]],
+                workers: Optional[int] = 1,
+                batch_size: int = DEFAULT_BATCH_SIZE,
+                read_ahead: int = DEFAULT_READ_AHEAD,
+                time_offset: Optional[int] = None,
+                tz: Optional[tzinfo] = None) -> Iterator[str]:
+    """
+    Translate several tapes and merge their outputs by message time.
+
+    Args:
+        sources: Tapes to merge, as TapeSource or tape paths
+        workers: Number of worker processes shared by all tapes, None for
+            the CPU count
+        batch_size: Number of messages per shard
+        read_ahead: Shards per tape in flight or buffered
+        time_offset: Byte offset of the message time within each record,
+            for tape paths and sources without their own
+        tz: Timezone of the message dates and formatted times, None for
+            local time
+
+    Yields:
+        str: Translated outputs in message time order
+
+    Raises:
+        ValueError: If the time offset of a tape is not given
+    """
+    if read_ahead < 1:
+        raise ValueError("read_ahead must be at least 1")
+    sources = [source if isinstance(source, TapeSource) else TapeSource(source)
+               for source in sources]
+    sources = [source if source.time_offset is not None
+               else source._replace(time_offset=time_offset)
+               for source in sources]
+    for source in sources:
+        if source.time_offset is None:
+            raise ValueError(f"Merging by message time needs the time_offset of tape "
+                             f"{os.fspath(source.path)}")
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    with ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers, initializer=_worker_init))
+
+        streams = []
+        for source in sources:
+            reader = stack.enter_context(
+                TapeReader(source.path, sys_no=source.sys_no, sys_name=source.sys_name,
+                           time_offset=source.time_offset, tz=tz))
+            translator = stack.enter_context(
+                ParallelTranslator(workers=workers, batch_size=batch_size,
+                                   tape_id=source.tape_id, max_pending=read_ahead,
+                                   executor=executor, tz=tz))
+            streams.append(_timed_results(translator, reader, source.start_order_no))
+
+        for _, result in heapq.merge(*streams, key=_TIME_KEY):
+            yield result
+
+
+def merge_tapes_to(sources: Sequence[Union[TapeSource, str, "os.PathLike[str]"]],
+                   sink: OutputSink,
+                   workers: Optional[int] = 1,
+                   batch_size: int = DEFAULT_BATCH_SIZE,
+                   read_ahead: int = DEFAULT_READ_AHEAD,
+                   time_offset: Optional[int] = None,
+                   tz: Optional[tzinfo] = None) -> int:
+    """
+    Translate several tapes into an output sink in message time order.
+
+    Merged outputs are written in sink batches of batch_size records. The
+    sink is closed when the run completes, finishing its last file.
+
+    Args:
+        sources: Tapes to merge, as TapeSource or tape paths
+        sink: Output sink
+        workers: Number of worker processes shared by all tapes, None for
+            the CPU count
+        batch_size: Number of messages per shard and per sink batch
+        read_ahead: Shards per tape in flight or buffered
+        time_offset: Byte offset of the message time within each record,
+            for tape paths and sources without their own
+        tz: Timezone of the message dates and formatted times, None for
+            local time
+
+    Returns:
+        int: Number of records translated
+
+    Raises:
+        ValueError: If the time offset of a tape is not given
+    """
+    count = 0
+    with sink:
+        batch = []
+        for result in merge_tapes(sources, workers, batch_size, read_ahead, time_offset, tz):
+            batch.append(result)
+            if len(batch) == batch_size:
+                sink.write_batch(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            sink.write_batch(batch)
+            count += len(batch)
+    return count
@@ -0,0 +1,78 @@
+import pytest
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.bench.corpus import CORPUS_TIME_OFFSET, build_corpus
+from ab_race_translator.merge import TapeSource, merge_tapes, merge_tapes_to
+from ab_race_translator.sink import OutputSink
+from ab_race_translator.tape import TapeReader
+
+
+def _write_tapes(tmp_path, counts):
+    """Write one tape per system and the expected merged output."""
+    sources, timed = [], []
+    for sys_no, count in enumerate(counts, start=1):
+        path = tmp_path / f"sys{sys_no}.tape"
+        path.write_bytes(b"".join(bytes(m.m_cpBuf) for m in build_corpus(count, seed=sys_no)))
+        source = TapeSource(path, sys_no=sys_no, sys_name=f"AB{sys_no}", tape_id=10 + sys_no,
+                            time_offset=CORPUS_TIME_OFFSET)
+        sources.append(source)
+
+        translator = create_ab_race()
+        translator.m_lLoggerTapeId = source.tape_id
+        with TapeReader(path, sys_no=sys_no, sys_name=source.sys_name,
+                        time_offset=CORPUS_TIME_OFFSET) as reader:
+            msgs = list(reader.messages())
+            results = translator.translate_batch(msgs, start_order_no=1).results
+            timed += [(msg.m_iMsgTime, sys_no, i, result)
+                      for i, (msg, result) in enumerate(zip(msgs, results))]
+    return sources, [result for *_, result in sorted(timed)]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merge_orders_by_message_time(tmp_path, workers):
+    sources, expected = _write_tapes(tmp_path, [70, 45, 90])
+
+    assert list(merge_tapes(sources, workers=workers, batch_size=16)) == expected
+
+    sink = OutputSink(tmp_path / "out", max_records=100)
+    assert merge_tapes_to(sources, sink, workers=workers, batch_size=16) == 205
+    lines = b"".join(open(p, "rb").read() for p in sink.files).decode().splitlines()
+    assert lines == expected
+
+
+def test_read_ahead_is_bounded(tmp_path, monkeypatch):
+    sources, _ = _write_tapes(tmp_path, [200, 200])
+    to_msg = TapeReader.to_msg
+    taken = []
+
+    def counting(self, record):
+        taken.append(record)
+        return to_msg(self, record)
+
+    monkeypatch.setattr(TapeReader, "to_msg", counting)
+    merged = merge_tapes(sources, batch_size=10, read_ahead=2)
+    next(merged)
+    assert len(taken) <= 2 * 2 * 10
+    assert len(list(merged)) == 399
+    merged.close()
+
+
+def test_plain_paths_and_empty_tapes(tmp_path):
+    (tmp_path / "empty.tape").write_bytes(b"")
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(bytes(m.m_cpBuf) for m in build_corpus(5, seed=1)))
+
+    paths = [path, tmp_path / "empty.tape"]
+    assert len(list(merge_tapes(paths, time_offset=CORPUS_TIME_OFFSET))) == 5
+    with pytest.raises(ValueError):
+        list(merge_tapes([path], read_ahead=0, time_offset=CORPUS_TIME_OFFSET))
+
+
+def test_merge_needs_a_time_offset(tmp_path):
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(bytes(m.m_cpBuf) for m in build_corpus(5, seed=1)))
+
+    with pytest.raises(ValueError, match="time_offset"):
+        list(merge_tapes([path]))
+    with pytest.raises(ValueError, match="time_offset"):
+        list(merge_tapes([TapeSource(path, time_offset=CORPUS_TIME_OFFSET), path]))
@@ -0,0 +1,341 @@
+"""
+Translation Metrics
+
+Process-wide counters and latency histograms for the translation pipeline:
+
+- latency per stage (parse, pack_header, selections, render, total)
+- messages by message code and bet type, and failed translations
+- exceptions swallowed by fallback handlers, by site; these handlers keep
+  returning their defaults (e.g. "1*01"), but every hit is now counted
+- hits and misses of translation memo lookups (see memo.py)
+
+Metrics are disabled by default. Instrumented code reads the module-level
+active registry and does nothing else when it is None, so the disabled
+cost is one attribute load and a None check per stage:
+
+    from ab_race_translator import metrics
+
+    registry = metrics.enable_metrics()
+    ...translate...
+    registry.write_prometheus("/var/lib/node_exporter/ab_race.prom")
+
+Each process has its own registry, so worker processes of the parallel
+driver report separately. Updates take no lock; concurrent threads sharing
+a registry may lose an occasional increment.
+"""
+
+import json
+import os
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .constants import BET_TYPE_NAMES
+
+# Pipeline stages with latency histograms; selections and render are timed
+# on the generic path, specialized covers both on the specialized path
+STAGES = ("parse", "pack_header", "selections", "render", "specialized", "total")
+
+# Histogram bucket upper bounds in nanoseconds (1us .. 10ms), plus +Inf
+LATENCY_BUCKETS_NS: Tuple[int, ...] = (
+    1000, 2500, 5000, 10000, 25000, 50000, 100000,
+    250000, 500000, 1000000, 2500000, 10000000,
+)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "ab_race"
+
+# Longest error text kept per exception site
+_MAX_ERROR_TEXT = 200
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in nanoseconds."""
+
+    __slots__ = ("bounds", "counts", "sum_ns", "count")
+
+    def __init__(self, bounds: Tuple[int, ...] = LATENCY_BUCKETS_NS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            bounds: Ascending bucket upper bounds in nanoseconds
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum_ns = 0
+        self.count = 0
+
+    def observe(self, ns: int):
+        """
+        Record one latency.
+
+        Args:
+            ns: Latency in nanoseconds
+        """
+        self.counts[bisect_left(self.bounds, ns)] += 1
+        self.sum_ns += ns
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """
+        Get cumulative bucket counts, the last being the +Inf bucket.
+
+        Returns:
+            List[int]: Observations at or below each bound
+        """
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Metrics:
+    """Registry of translation counters and stage histograms."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.stages: Dict[str, Histogram] = {name: Histogram() for name in STAGES}
+        self.messages = 0
+        self.errors = 0
+        self.by_code: Dict[int, int] = {}
+        self.by_bet_type: Dict[int, int] = {}
+        self.exceptions: Dict[str, int] = {}
+        self.last_exception: Dict[str, str] = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def observe(self, stage: str, ns: int):
+        """
+        Record the latency of one stage call.
+
+        Args:
+            stage: Stage name, one of STAGES
+            ns: Latency in nanoseconds
+        """
+        self.stages[stage].observe(ns)
+
+    def count_message(self, code: int, bet_type: Optional[int] = None):
+        """
+        Count one message.
+
+        Args:
+            code: LOGAB message code
+            bet_type: Bet type of racing messages
+        """
+        self.messages += 1
+        by_code = self.by_code
+        by_code[code] = by_code.get(code, 0) + 1
+        if bet_type is not None:
+            by_bet_type = self.by_bet_type
+            by_bet_type[bet_type] = by_bet_type.get(bet_type, 0) + 1
+
+    def count_error(self):
+        """Count one translation that returned an error result."""
+        self.errors += 1
+
+    def count_exception(self, site: str, exc: BaseException):
+        """
+        Count an exception handled at a fallback site.
+
+        Args:
+            site: Handler location, e.g. "DeSelMap._format_standard_selections"
+            exc: Handled exception
+        """
+        self.exceptions[site] = self.exceptions.get(site, 0) + 1
+        self.last_exception[site] = f"{type(exc).__name__}: {exc}"[:_MAX_ERROR_TEXT]
+
+    def count_memo(self, hit: bool):
+        """
+        Count one translation memo lookup.
+
+        Args:
+            hit: Whether the lookup was a hit
+        """
+        if hit:
+            self.memo_hits += 1
+        else:
+            self.memo_misses += 1
+
+    @property
+    def memo_hit_rate(self) -> float:
+        """float: Share of memo lookups that were hits, 0 before any lookup."""
+        lookups = self.memo_hits + self.memo_misses
+        return self.memo_hits / lookups if lookups else 0.0
+
+    def reset(self):
+        """Clear every counter and histogram."""
+        self.__init__()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get every metric as a JSON-serializable dict.
+
+        Returns:
+            Dict[str, Any]: Metrics snapshot
+        """
+        stages = {}
+        for name, hist in self.stages.items():
+            stages[name] = {
+                "count": hist.count,
+                "sum_us": round(hist.sum_ns / 1e3, 3),
+                "mean_us": round(hist.sum_ns / hist.count / 1e3, 3) if hist.count else 0.0,
+                "buckets_us": {
+                    str(bound / 1e3): count
+                    for bound, count in zip(hist.bounds, hist.cumulative())
+                },
+            }
+        return {
+            "messages": self.messages,
+            "errors": self.errors,
+            "by_code": {str(code): count for code, count in sorted(self.by_code.items())},
+            "by_bet_type": {
+                BET_TYPE_NAMES.get(bet_type, str(bet_type)): count
+                for bet_type, count in sorted(self.by_bet_type.items())
+            },
+            "exceptions": dict(sorted(self.exceptions.items())),
+            "last_exception": dict(sorted(self.last_exception.items())),
+            "memo": {
+                "hits": self.memo_hits,
+                "misses": self.memo_misses,
+                "hit_rate": round(self.memo_hit_rate, 6),
+            },
+            "stages": stages,
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """
+        Render the snapshot as JSON.
+
+        Args:
+            indent: JSON indentation
+
+        Returns:
+            str: JSON text
+        """
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_messages_total Messages translated.",
+            f"# TYPE {p}_messages_total counter",
+            f"{p}_messages_total {self.messages}",
+            f"# HELP {p}_errors_total Translations that returned an error result.",
+            f"# TYPE {p}_errors_total counter",
+            f"{p}_errors_total {self.errors}",
+            f"# HELP {p}_messages_by_code_total Messages by LOGAB message code.",
+            f"# TYPE {p}_messages_by_code_total counter",
+        ]
+        for code, count in sorted(self.by_code.items()):
+            lines.append(f'{p}_messages_by_code_total{{code="{code}"}} {count}')
+
+        lines.append(f"# HELP {p}_messages_by_bet_type_total Racing messages by bet type.")
+        lines.append(f"# TYPE {p}_messages_by_bet_type_total counter")
+        for bet_type, count in sorted(self.by_bet_type.items()):
+            name = BET_TYPE_NAMES.get(bet_type, str(bet_type))
+            lines.append(f'{p}_messages_by_bet_type_total{{bet_type="{name}"}} {count}')
+
+        lines.append(f"# HELP {p}_exceptions_total Exceptions handled by fallback code, by site.")
+        lines.append(f"# TYPE {p}_exceptions_total counter")
+        for site, count in sorted(self.exceptions.items()):
+            lines.append(f'{p}_exceptions_total{{site="{site}"}} {count}')
+
+        lines.append(f"# HELP {p}_memo_lookups_total Translation memo lookups by result.")
+        lines.append(f"# TYPE {p}_memo_lookups_total counter")
+        lines.append(f'{p}_memo_lookups_total{{result="hit"}} {self.memo_hits}')
+        lines.append(f'{p}_memo_lookups_total{{result="miss"}} {self.memo_misses}')
+
+        lines.append(f"# HELP {p}_stage_seconds Latency of each translation stage.")
+        lines.append(f"# TYPE {p}_stage_seconds histogram")
+        for name, hist in self.stages.items():
+            for bound, count in zip(hist.bounds, hist.cumulative()):
+                lines.append(f'{p}_stage_seconds_bucket{{stage="{name}",le="{bound / 1e9:g}"}} {count}')
+            lines.append(f'{p}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} {hist.sum_ns / 1e9:.9f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} {hist.count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Union[str, "os.PathLike[str]"]):
+        """
+        Write the Prometheus exposition text to a file atomically.
+
+        Suitable for the node_exporter textfile collector.
+
+        Args:
+            path: Output file path
+        """
+        _write_atomic(path, self.to_prometheus())
+
+    def write_json(self, path: Union[str, "os.PathLike[str]"]):
+        """
+        Write the JSON snapshot to a file atomically.
+
+        Args:
+            path: Output file path
+        """
+        _write_atomic(path, self.to_json() + "\n")
+
+
+def _write_atomic(path: Union[str, "os.PathLike[str]"], text: str):
+    """Write a text file under a temporary name and rename it into place."""
+    path = os.fspath(path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Registry of this process, None while metrics are disabled
+active: Optional[Metrics] = None
+
+
+def enable_metrics(metrics: Optional[Metrics] = None) -> Metrics:
+    """
+    Enable metrics collection in this process.
+
+    Args:
+        metrics: Registry to collect into, defaults to the current one or a
+            new registry
+
+    Returns:
+        Metrics: Active registry
+    """
+    global active
+    if metrics is None:
+        metrics = active if active is not None else Metrics()
+    active = metrics
+    return metrics
+
+
+def disable_metrics() -> Optional[Metrics]:
+    """
+    Disable metrics collection in this process.
+
+    Returns:
+        Optional[Metrics]: Registry that was active, if any
+    """
+    global active
+    metrics, active = active, None
+    return metrics
+
+
+def record_exception(site: str, exc: BaseException):
+    """
+    Count an exception handled at a fallback site, if metrics are enabled.
+
+    Args:
+        site: Handler location
+        exc: Handled exception
+    """
+    metrics = active
+    if metrics is not None:
+        metrics.count_exception(site, exc)
@@ -0,0 +1,105 @@
+import pytest
+
+import json
+
+from ab_race_translator import create_ab_race, metrics
+from ab_race_translator.ab_race import ABRace
+from ab_race_translator.bench.corpus import build_corpus, build_racing_logs
+from ab_race_translator.constants import LOGAB_CODE_RAC
+from ab_race_translator.data_structures import Msg
+from ab_race_translator.metrics import Histogram, Metrics, disable_metrics, enable_metrics
+
+
+@pytest.fixture
+def registry():
+    registry = enable_metrics(Metrics())
+    yield registry
+    disable_metrics()
+
+
+def test_disabled_by_default():
+    assert metrics.active is None
+    create_ab_race().translate_action(build_corpus(1)[0])
+    assert metrics.active is None
+
+
+def test_counts_stages_and_bet_types(registry):
+    msgs = build_corpus(50, seed=3)
+    translator = create_ab_race()
+    expected = [translator.translate_action(msg) for msg in msgs]
+    disable_metrics()
+    assert list(create_ab_race().translate_iter(msgs)) == expected
+
+    assert registry.messages == 50
+    assert registry.by_code == {LOGAB_CODE_RAC: 50}
+    assert sum(registry.by_bet_type.values()) == 50
+    for stage in ("parse", "pack_header", "selections", "render", "total"):
+        assert registry.stages[stage].count == 50
+    assert registry.errors == 0
+
+
+def test_times_specialized_path(registry):
+    logs = build_racing_logs(40, seed=5)
+    translator = create_ab_race()
+    results = [translator.translate_logab(pMlog, msg) for pMlog, msg in logs]
+    disable_metrics()
+    generic = ABRace(specialized=False)
+
+    assert results == [generic.translate_logab(pMlog, msg) for pMlog, msg in logs]
+    assert registry.stages["specialized"].count == 40
+    assert registry.stages["selections"].count == 0
+    assert registry.stages["pack_header"].count == 40
+
+
+def test_specialized_exception_is_recorded(registry):
+    pMlog, msg = build_racing_logs(1, seed=5)[0]
+    translator = create_ab_race()
+
+    def broken(translator, pMlog, msg):
+        raise KeyError("shape")
+
+    translator._specialized = {pMlog.data.bt_rac.d.hdr.bettypebu: broken}
+
+    result = translator.translate_logab(pMlog, msg)
+    disable_metrics()
+
+    assert result == ABRace(specialized=False).translate_logab(pMlog, msg)
+    assert registry.exceptions == {"ABRace._process_racing_data": 1}
+    assert registry.last_exception["ABRace._process_racing_data"] == "KeyError: 'shape'"
+    assert registry.stages["specialized"].count == 0
+    assert registry.stages["selections"].count == 1
+
+
+def test_counts_swallowed_exceptions(registry):
+    translator = create_ab_race()
+    result = translator.translate_action(Msg(None, 0, 1, "AB", 0, 1, 1, 2024, 0, LOGAB_CODE_RAC))
+
+    assert result.startswith("ERROR")
+    assert registry.errors == 1
+    assert sum(registry.exceptions.values()) >= 1
+    assert all(site.count(".") == 1 for site in registry.exceptions)
+
+
+def test_exports(registry):
+    for msg in build_corpus(10, seed=1):
+        create_ab_race().translate_action(msg)
+    registry.count_exception("DeSelMap.get_selections", ValueError("bad"))
+
+    text = registry.to_prometheus()
+    assert "ab_race_messages_total 10" in text
+    assert 'ab_race_exceptions_total{site="DeSelMap.get_selections"} 1' in text
+    assert 'ab_race_stage_seconds_bucket{stage="total",le="+Inf"} 10' in text
+
+    snapshot = json.loads(registry.to_json())
+    assert snapshot["messages"] == 10
+    assert snapshot["last_exception"]["DeSelMap.get_selections"] == "ValueError: bad"
+
+
+def test_histogram_buckets():
+    hist = Histogram((10, 100))
+    for ns in (5, 10, 50, 1000):
+        hist.observe(ns)
+
+    assert hist.counts == [2, 1, 1]
+    assert hist.cumulative() == [2, 3, 4]
+    assert hist.sum_ns == 1065
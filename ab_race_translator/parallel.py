@@ -0,0 +1,280 @@
+"""
+Parallel Translation Driver
+
+Shards message batches across a ProcessPoolExecutor and reassembles the
+translated output in input order. Each shard is given the logger message
+order numbers it would have had in a serial run, so parallel output is
+byte-identical to ABRace.translate_batch over the same messages.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import replace
+from datetime import tzinfo
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+from .ab_race import ABRace
+from .data_structures import BatchResult, Msg
+from .sink import OutputSink
+from .utils import TimestampFormatter
+
+DEFAULT_BATCH_SIZE = 2000
+
+# Per-process translator, created once per worker
+_worker_translator: Optional[ABRace] = None
+
+
+def _worker_init():
+    """Create the per-process translator."""
+    global _worker_translator
+    _worker_translator = ABRace()
+
+
+def _translate_shard(tape_id: int, start_order_no: int, msgs: List[Msg],
+                     tz: Optional[tzinfo] = None) -> List[str]:
+    """
+    Translate one shard of messages in a worker process.
+
+    Args:
+        tape_id: Logger tape ID
+        start_order_no: Order number of the first message in the shard
+        msgs: Messages of the shard
+        tz: Timezone of the formatted message times, None for local time
+
+    Returns:
+        List[str]: Translated outputs in shard order
+    """
+    global _worker_translator
+    if _worker_translator is None:
+        _worker_init()
+    return _run_shard(_worker_translator, tape_id, start_order_no, msgs, tz)
+
+
+def _run_shard(translator: ABRace, tape_id: int, start_order_no: int,
+               msgs: List[Msg], tz: Optional[tzinfo] = None) -> List[str]:
+    """
+    Translate one shard of messages with the given translator.
+
+    Args:
+        translator: Translator to use
+        tape_id: Logger tape ID
+        start_order_no: Order number of the first message in the shard
+        msgs: Messages of the shard
+        tz: Timezone of the formatted message times, None for local time
+
+    Returns:
+        List[str]: Translated outputs in shard order
+    """
+    translator.m_lLoggerTapeId = tape_id
+    if translator.time_formatter.tz != tz:
+        # Worker translators are shared by drivers of different timezones
+        translator.time_formatter = TimestampFormatter(tz)
+    return list(translator.translate_iter(msgs, start_order_no))
+
+
+def _portable(msg: Msg) -> Msg:
+    """
+    Make a message picklable for transfer to a worker process.
+
+    Memoryview buffers cannot be pickled, so they are copied to bytes.
+
+    Args:
+        msg: Input message
+
+    Returns:
+        Msg: Message with a bytes buffer
+    """
+    if isinstance(msg.m_cpBuf, bytes):
+        return msg
+    return replace(msg, m_cpBuf=bytes(msg.m_cpBuf))
+
+
+class ParallelTranslator:
+    """
+    Process-pool racing translator with deterministic output ordering.
+
+    With workers <= 1 shards are translated in the calling process, which
+    gives the same output without the process pool overhead.
+    """
+
+    def __init__(self, workers: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 tape_id: int = 1,
+                 max_pending: Optional[int] = None,
+                 executor: Optional[Executor] = None,
+                 tz: Optional[tzinfo] = None):
+        """
+        Initialize the parallel translator.
+
+        Args:
+            workers: Number of worker processes, defaults to the CPU count
+            batch_size: Number of messages per shard
+            tape_id: Logger tape ID passed to every worker translator
+            max_pending: Maximum number of shards in flight, defaults to
+                twice the number of workers
+            executor: Optional externally managed executor to submit to
+            tz: Timezone of the formatted message times, None for local time
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.tape_id = tape_id
+        self.tz = tz
+        self.max_pending = max_pending or max(2, 2 * self.workers)
+        self._executor = executor
+        self._owns_executor = False
+        self._local_translator: Optional[ABRace] = None
+
+    @property
+    def local_translator(self) -> Optional[ABRace]:
+        """Optional[ABRace]: In-process translator of a single-worker run, None otherwise."""
+        return self._local_translator
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self._executor is None and self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=_worker_init)
+            self._owns_executor = True
+        return self._executor
+
+    def _shards(self, msgs: Iterable[Msg], start_order_no: int) -> Iterator[Tuple[int, List[Msg]]]:
+        """
+        Split messages into shards with pre-assigned order number ranges.
+
+        Args:
+            msgs: Input messages
+            start_order_no: Order number of the first message
+
+        Yields:
+            Tuple[int, List[Msg]]: First order number and messages of a shard
+        """
+        it = iter(msgs)
+        order_no = start_order_no
+        while True:
+            shard = list(islice(it, self.batch_size))
+            if not shard:
+                return
+            yield order_no, shard
+            order_no += len(shard)
+
+    def translate_shards(self, msgs: Iterable[Msg], start_order_no: int = 1) -> Iterator[List[str]]:
+        """
+        Translate a stream of messages in parallel, shard by shard.
+
+        At most max_pending shards are in flight at a time, so arbitrarily
+        long streams are translated in bounded memory.
+
+        Args:
+            msgs: Input messages
+            start_order_no: Logger message order number of the first message
+
+        Yields:
+            List[str]: Translated outputs of each shard, in input order
+        """
+        executor = self._get_executor()
+
+        if executor is None:
+            if self._local_translator is None:
+                self._local_translator = ABRace(tz=self.tz)
+            for order_no, shard in self._shards(msgs, start_order_no):
+                yield _run_shard(self._local_translator, self.tape_id, order_no, shard, self.tz)
+            return
+
+        pending: Deque[Future] = deque()
+        for order_no, shard in self._shards(msgs, start_order_no):
+            if len(pending) >= self.max_pending:
+                yield pending.popleft().result()
+            shard = [_portable(msg) for msg in shard]
+            pending.append(executor.submit(_translate_shard, self.tape_id, order_no, shard,
+                                           self.tz))
+
+        while pending:
+            yield pending.popleft().result()
+
+    def translate_iter(self, msgs: Iterable[Msg], start_order_no: int = 1) -> Iterator[str]:
+        """
+        Translate a stream of messages in parallel.
+
+        Args:
+            msgs: Input messages
+            start_order_no: Logger message order number of the first message
+
+        Yields:
+            str: Translated outputs in input order
+        """
+        for results in self.translate_shards(msgs, start_order_no):
+            yield from results
+
+    def translate_to(self, msgs: Iterable[Msg], sink: OutputSink,
+                     start_order_no: int = 1) -> int:
+        """
+        Translate a stream of messages in parallel into an output sink.
+
+        Each shard is written as one sink batch, so the sink's fsync policy
+        applies at shard boundaries.
+
+        Args:
+            msgs: Input messages
+            sink: Output sink
+            start_order_no: Logger message order number of the first message
+
+        Returns:
+            int: Number of messages translated
+        """
+        count = 0
+        for results in self.translate_shards(msgs, start_order_no):
+            sink.write_batch(results)
+            count += len(results)
+        return count
+
+    def translate_batch(self, msgs: Iterable[Msg], start_order_no: int = 1) -> BatchResult:
+        """
+        Translate a batch of messages in parallel.
+
+        Args:
+            msgs: Input messages
+            start_order_no: Logger message order number of the first message
+
+        Returns:
+            BatchResult: Outputs in input order with per-message error slots
+        """
+        return BatchResult.from_results(list(self.translate_iter(msgs, start_order_no)))
+
+    def close(self):
+        """Shut down the worker pool if this translator created it."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+        self._executor = None
+        self._owns_executor = False
+
+    def __enter__(self) -> "ParallelTranslator":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def translate_parallel(msgs: Iterable[Msg], workers: Optional[int] = None,
+                       batch_size: int = DEFAULT_BATCH_SIZE, tape_id: int = 1,
+                       start_order_no: int = 1, tz: Optional[tzinfo] = None) -> BatchResult:
+    """
+    Translate messages across a process pool.
+
+    Args:
+        msgs: Input messages
+        workers: Number of worker processes, defaults to the CPU count
+        batch_size: Number of messages per shard
+        tape_id: Logger tape ID
+        start_order_no: Logger message order number of the first message
+        tz: Timezone of the formatted message times, None for local time
+
+    Returns:
+        BatchResult: Outputs in input order with per-message error slots
+    """
+    with ParallelTranslator(workers=workers, batch_size=batch_size, tape_id=tape_id,
+                            tz=tz) as translator:
+        return translator.translate_batch(msgs, start_order_no)
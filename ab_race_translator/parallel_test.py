@@ -0,0 +1,78 @@
+import pytest
+
+from datetime import timedelta, timezone
+
+from ab_race_translator import create_ab_race, Msg
+from ab_race_translator.constants import BETTYP_QIN, BETTYP_WIN, LOGAB_CODE_RAC
+from ab_race_translator.layouts import BETHDR, LOGAB_HDR, RAC_BETHDR_OFFSET
+from ab_race_translator.parallel import ParallelTranslator, _run_shard, translate_parallel
+
+
+def _messages(count):
+    msgs = []
+    for i in range(count):
+        size = RAC_BETHDR_OFFSET + BETHDR.size + 40
+        buf = bytearray(size)
+        LOGAB_HDR.struct.pack_into(buf, 0, size, LOGAB_CODE_RAC, 0, 0, 1, i, 2, 0, 0, 0, i)
+        BETHDR.struct.pack_into(buf, RAC_BETHDR_OFFSET, 0, 1000 * (i % 7 + 1),
+                                BETTYP_QIN if i % 2 else BETTYP_WIN)
+        if i % 9 == 0:
+            # Truncated bet header
+            buf = buf[:60]
+        msgs.append(Msg(memoryview(bytes(buf)), 0, 1, "AB", 1700000000 + i, 15, 6, 2024,
+                        1700000000 + i, LOGAB_CODE_RAC))
+    return msgs
+
+
+def test_in_process_shards_match_serial():
+    msgs = _messages(50)
+    expected = create_ab_race().translate_batch(msgs, start_order_no=100).results
+
+    with ParallelTranslator(workers=1, batch_size=7) as translator:
+        assert translator.local_translator is None
+        assert translator.translate_batch(msgs, start_order_no=100).results == expected
+        assert translator.local_translator is not None
+
+
+def test_process_pool_matches_serial():
+    msgs = _messages(120)
+    expected = create_ab_race().translate_batch(msgs, start_order_no=1).results
+
+    result = translate_parallel(msgs, workers=2, batch_size=16)
+
+    assert result.results == expected
+    assert result.error_count == 0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_translators_use_the_given_timezone(workers):
+    msgs = _messages(30)
+    hkt = timezone(timedelta(hours=8))
+    expected = create_ab_race(tz=hkt).translate_batch(msgs, start_order_no=1).results
+
+    assert expected != create_ab_race(tz=timezone.utc).translate_batch(msgs, 1).results
+    assert translate_parallel(msgs, workers=workers, batch_size=8, tz=hkt).results == expected
+
+
+def test_shared_translator_follows_the_shard_timezone():
+    msgs = _messages(5)
+    translator = create_ab_race()
+
+    for tz in (timezone.utc, timezone(timedelta(hours=8)), None):
+        expected = create_ab_race(tz=tz).translate_batch(msgs, start_order_no=1).results
+        assert _run_shard(translator, 1, 1, msgs, tz) == expected
+
+
+def test_order_numbers_are_preassigned_per_shard():
+    msgs = _messages(10)
+
+    with ParallelTranslator(workers=1, batch_size=3) as translator:
+        results = list(translator.translate_iter(msgs, start_order_no=41))
+
+    order_nos = [int(result.split("~|~")[1]) for result in results]
+    assert order_nos == list(range(41, 51))
+
+
+def test_rejects_empty_batches():
+    with pytest.raises(ValueError):
+        ParallelTranslator(batch_size=0)
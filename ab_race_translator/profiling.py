@@ -0,0 +1,475 @@
+"""
+Memory Profiling
+
+Profiling mode for tape runs. A MemoryProfiler takes a tracemalloc
+snapshot every N translated messages and reports:
+
+- traced memory and retained growth per message
+- the transient peak of each interval (Python 3.9+)
+- allocations still alive, attributed to translator components by
+  the innermost package frame of their traceback (StructParser,
+  ABMsgTranslator.add_field_string, RecordBuilder, DeSelMap, dataclass
+  __init__ code and so on)
+- live instances of the LOGAB dataclasses, i.e. retained parse graphs
+- the size of every container held by the translator, e.g. its output
+  record, the DeSelMap memo and the timestamp caches
+
+A component or container that keeps growing over the second half of the
+run is reported as a suspected leak. Bounded caches (the DeSelMap memo and
+the timestamp caches) are not flagged while below their limit. While any
+of them is still filling, component growth is reported but not flagged,
+since cached entries are attributed to whichever component allocated them.
+
+    profiler = MemoryProfiler(interval=10000)
+    translate_tape("sys1.tape", sink, profiler=profiler)
+    print(profiler.report().format())
+
+tracemalloc slows translation down several times; use it for sizing runs
+only.
+"""
+
+import dataclasses
+import gc
+import inspect
+import os
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .ab_msg_translator import ABMsgTranslator, RecordBuilder
+from .ab_race import ABRace
+from .data_structures import StructParser
+from .utils import DeSelMap, TimestampFormatter
+
+# Messages between snapshots
+DEFAULT_PROFILE_INTERVAL = 10000
+
+# Traceback depth kept by tracemalloc; the innermost Python frame is enough
+# to attribute allocations made by C helpers to their calling component,
+# and every extra frame slows traced translation down considerably
+DEFAULT_NFRAMES = 1
+
+# Growth below this many bytes per message is not reported as a leak
+DEFAULT_LEAK_THRESHOLD = 1.0
+
+# Component of allocations made in dataclass-generated __init__ code
+DATACLASS_COMPONENT = "dataclasses"
+
+# Component of allocations made outside the translator package
+OTHER_COMPONENT = "other"
+
+# Components in attribution order; nested components come first
+_COMPONENT_OBJECTS = (
+    ("ABMsgTranslator.add_field_string", ABMsgTranslator.add_field_string),
+    ("RecordBuilder", RecordBuilder),
+    ("StructParser", StructParser),
+    ("DeSelMap", DeSelMap),
+    ("TimestampFormatter", TimestampFormatter),
+    ("ABMsgTranslator", ABMsgTranslator),
+    ("ABRace", ABRace),
+)
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bounded translator caches: container path -> path of its size limit.
+# They are not reported as leaks while below their limit.
+BOUNDED_CONTAINERS = {
+    "desel_map._memo": "desel_map.memo_size",
+    "time_formatter._seconds": "time_formatter.maxsize",
+    "time_formatter._days": "time_formatter.maxsize",
+}
+
+
+def _source_ranges() -> List[Tuple[str, str, int, int]]:
+    """
+    Get (component, file, first line, last line) of every component.
+
+    Returns:
+        List[Tuple[str, str, int, int]]: Source ranges in attribution order
+    """
+    ranges = []
+    for name, obj in _COMPONENT_OBJECTS:
+        lines, first = inspect.getsourcelines(obj)
+        ranges.append((name, os.path.abspath(inspect.getsourcefile(obj)),
+                       first, first + len(lines) - 1))
+    return ranges
+
+
+class ComponentAttributor:
+    """Maps allocation tracebacks to translator components."""
+
+    def __init__(self):
+        """Resolve the source ranges of the components."""
+        self.ranges = _source_ranges()
+        self._cache: Dict[Tuple[str, int], Optional[str]] = {}
+
+    def _frame_component(self, filename: str, lineno: int) -> Optional[str]:
+        """Get the component of one frame, None for frames outside the package."""
+        key = (filename, lineno)
+        cache = self._cache
+        if key in cache:
+            return cache[key]
+
+        component = None
+        if filename == "<string>" or filename.startswith("<dataclass"):
+            component = DATACLASS_COMPONENT
+        else:
+            path = os.path.abspath(filename)
+            for name, source, first, last in self.ranges:
+                if path == source and first <= lineno <= last:
+                    component = name
+                    break
+            else:
+                if path.startswith(_PACKAGE_DIR):
+                    component = os.path.splitext(os.path.relpath(path, _PACKAGE_DIR))[0]
+        cache[key] = component
+        return component
+
+    def component(self, traceback: tracemalloc.Traceback) -> str:
+        """
+        Get the component of an allocation.
+
+        Args:
+            traceback: Allocation traceback
+
+        Returns:
+            str: Innermost package component, or OTHER_COMPONENT
+        """
+        # Traceback frames are ordered from the oldest to the most recent
+        for frame in reversed(traceback):
+            component = self._frame_component(frame.filename, frame.lineno)
+            if component is not None:
+                return component
+        return OTHER_COMPONENT
+
+    def attribute(self, snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+        """
+        Sum the live allocations of a snapshot by component.
+
+        Args:
+            snapshot: tracemalloc snapshot taken with key traceback frames
+
+        Returns:
+            Dict[str, int]: Component to allocated bytes
+        """
+        result: Dict[str, int] = {}
+        for stat in snapshot.statistics("traceback"):
+            component = self.component(stat.traceback)
+            result[component] = result.get(component, 0) + stat.size
+        return result
+
+
+def _logab_dataclass_counts() -> Dict[str, int]:
+    """Count live instances of the LOGAB dataclasses by type name."""
+    counts: Dict[str, int] = {}
+    module = StructParser.__module__
+    for obj in gc.get_objects():
+        cls = type(obj)
+        if cls.__module__ == module and dataclasses.is_dataclass(cls):
+            counts[cls.__name__] = counts.get(cls.__name__, 0) + 1
+    return counts
+
+
+def container_sizes(obj: Any, prefix: str = "", depth: int = 2) -> Dict[str, int]:
+    """
+    Get the length of every sized attribute of an object and its helpers.
+
+    Args:
+        obj: Object to inspect, e.g. a translator
+        prefix: Name prefix of the reported attributes
+        depth: Levels of helper objects to descend into
+
+    Returns:
+        Dict[str, int]: Dotted attribute name to length
+    """
+    sizes: Dict[str, int] = {}
+    try:
+        attrs = vars(obj)
+    except TypeError:
+        slots = getattr(type(obj), "__slots__", ())
+        attrs = {name: getattr(obj, name) for name in slots if hasattr(obj, name)}
+
+    for name, value in attrs.items():
+        key = prefix + name
+        if isinstance(value, (str, bytes, bytearray, list, dict, set, tuple, RecordBuilder)):
+            sizes[key] = len(value)
+        elif depth > 0 and type(value).__module__.startswith(__name__.rpartition(".")[0]):
+            sizes.update(container_sizes(value, key + ".", depth - 1))
+    if isinstance(obj, ABMsgTranslator):
+        sizes[prefix + "buf"] = len(obj.buf)
+    return sizes
+
+
+def _container_limits(translator: ABMsgTranslator) -> Dict[str, int]:
+    """Resolve the size limits of the bounded caches of a translator."""
+    limits = {}
+    for name, limit_path in BOUNDED_CONTAINERS.items():
+        value: Any = translator
+        for attr in limit_path.split("."):
+            value = getattr(value, attr, None)
+        if isinstance(value, int):
+            limits[name] = value
+    return limits
+
+
+@dataclasses.dataclass
+class MemorySample:
+    """State of one profiling snapshot."""
+    messages: int                   # messages translated so far
+    current_bytes: int              # traced memory in use
+    peak_bytes: int                 # traced peak since the previous sample
+    components: Dict[str, int]      # live allocated bytes by component
+    instances: Dict[str, int]       # live LOGAB dataclass instances by type
+    containers: Dict[str, int]      # translator container lengths
+    limits: Dict[str, int]          # size limits of bounded containers
+
+
+def _slope(points: Sequence[Tuple[float, float]]) -> float:
+    """Least squares slope of (x, y) points, 0 for fewer than two points."""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if var == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+
+@dataclasses.dataclass
+class MemoryReport:
+    """Growth trends and suspected leaks of a profiled run."""
+    samples: List[MemorySample]
+    retained_bytes_per_msg: float       # traced memory growth per message
+    interval_peak_bytes: int            # largest transient rise within one interval
+    component_growth: Dict[str, float]  # bytes per message by component
+    dataclass_growth: Dict[str, float]  # instances per message by type
+    leaks: List[str]                    # suspected leaks
+    warming: List[str]                  # bounded caches still filling
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the report as a JSON-serializable dict.
+
+        Returns:
+            Dict[str, Any]: Report
+        """
+        return dataclasses.asdict(self)
+
+    def format(self) -> str:
+        """
+        Render the report as text.
+
+        Returns:
+            str: Human-readable report
+        """
+        lines = [
+            f"samples: {len(self.samples)}, "
+            f"messages: {self.samples[-1].messages if self.samples else 0}",
+            f"retained: {self.retained_bytes_per_msg:.2f} B/msg, "
+            f"interval peak: {self.interval_peak_bytes} B",
+            "growth by component (B/msg):",
+        ]
+        for name, growth in sorted(self.component_growth.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:40s} {growth:10.3f}")
+        if self.samples:
+            lines.append("live bytes by component at last sample:")
+            for name, size in sorted(self.samples[-1].components.items(),
+                                     key=lambda item: -item[1]):
+                lines.append(f"  {name:40s} {size:10d}")
+        lines.append("suspected leaks:" if self.leaks else "suspected leaks: none")
+        lines.extend(f"  {leak}" for leak in self.leaks)
+        if self.warming:
+            lines.append("caches still filling: " + ", ".join(self.warming))
+        return "\n".join(lines)
+
+
+class MemoryProfiler:
+    """
+    tracemalloc sampler for translation runs.
+
+    Call start(), then sample() (or maybe_sample() after every batch) as
+    messages are translated, then stop() and report().
+    """
+
+    def __init__(self, interval: int = DEFAULT_PROFILE_INTERVAL,
+                 nframes: int = DEFAULT_NFRAMES,
+                 leak_threshold: float = DEFAULT_LEAK_THRESHOLD,
+                 count_dataclasses: bool = True):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Messages between snapshots
+            nframes: Traceback depth kept by tracemalloc
+            leak_threshold: Minimum growth in bytes per message reported as
+                a leak
+            count_dataclasses: Count live LOGAB dataclass instances at every
+                sample (walks the GC heap)
+        """
+        if interval < 1:
+            raise ValueError("interval must be at least 1")
+        self.interval = interval
+        self.nframes = nframes
+        self.leak_threshold = leak_threshold
+        self.count_dataclasses = count_dataclasses
+        self.samples: List[MemorySample] = []
+        self.attributor = ComponentAttributor()
+        self._next_sample = 0
+        self._was_tracing = False
+
+    def start(self):
+        """Start tracing allocations and take the baseline sample."""
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start(self.nframes)
+        self.samples = []
+        self._next_sample = 0
+        self.sample(0)
+
+    def stop(self):
+        """Stop tracing if start() enabled it."""
+        if not self._was_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __enter__(self) -> "MemoryProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def sample(self, messages: int, translator: Optional[ABMsgTranslator] = None) -> MemorySample:
+        """
+        Take a snapshot now.
+
+        Args:
+            messages: Messages translated so far
+            translator: Translator whose containers are measured
+
+        Returns:
+            MemorySample: New sample
+        """
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        sample = MemorySample(
+            messages=messages,
+            current_bytes=current,
+            peak_bytes=peak,
+            components=self.attributor.attribute(snapshot),
+            instances=_logab_dataclass_counts() if self.count_dataclasses else {},
+            containers=container_sizes(translator) if translator is not None else {},
+            limits=_container_limits(translator) if translator is not None else {},
+        )
+        del snapshot
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self.samples.append(sample)
+        self._next_sample = messages + self.interval
+        return sample
+
+    def maybe_sample(self, messages: int,
+                     translator: Optional[ABMsgTranslator] = None) -> Optional[MemorySample]:
+        """
+        Take a snapshot if interval messages passed since the last one.
+
+        Args:
+            messages: Messages translated so far
+            translator: Translator whose containers are measured
+
+        Returns:
+            Optional[MemorySample]: New sample, if one was taken
+        """
+        if messages >= self._next_sample:
+            return self.sample(messages, translator)
+        return None
+
+    def profile(self, msgs: Iterable, translator: Optional[ABRace] = None) -> "MemoryReport":
+        """
+        Translate messages one by one under the profiler.
+
+        Args:
+            msgs: Input messages
+            translator: Translator to use, a new ABRace by default
+
+        Returns:
+            MemoryReport: Report of the run
+        """
+        translator = translator if translator is not None else ABRace()
+        translate_action = translator.translate_action
+        count = 0
+        with self:
+            for msg in msgs:
+                translate_action(msg)
+                count += 1
+                if count >= self._next_sample:
+                    self.sample(count, translator)
+            if not self.samples or self.samples[-1].messages != count:
+                self.sample(count, translator)
+        return self.report()
+
+    def report(self) -> MemoryReport:
+        """
+        Analyze the samples taken so far.
+
+        Trends are fitted over the second half of the samples (after
+        warm-up), so caches that fill up early are not reported.
+
+        Returns:
+            MemoryReport: Growth trends and suspected leaks
+        """
+        samples = self.samples
+        tail = samples[len(samples) // 2:] if len(samples) > 2 else samples
+        retained = _slope([(s.messages, s.current_bytes) for s in tail])
+        # Peaks are per interval where tracemalloc.reset_peak is available
+        peak = max((sample.peak_bytes - previous.current_bytes
+                    for previous, sample in zip(samples, samples[1:])), default=0)
+
+        def growth(key: str) -> Dict[str, float]:
+            names = set()
+            for s in tail:
+                names.update(getattr(s, key))
+            return {name: _slope([(s.messages, getattr(s, key).get(name, 0)) for s in tail])
+                    for name in names}
+
+        component_growth = growth("components")
+        dataclass_growth = growth("instances")
+        container_growth = growth("containers")
+
+        def increasing(key: str, name: str) -> bool:
+            values = [getattr(s, key).get(name, 0) for s in tail]
+            return all(a < b for a, b in zip(values, values[1:]))
+
+        leaks: List[str] = []
+        warming: List[str] = []
+        if len(tail) >= 2:
+            last = tail[-1]
+            for name, rate in sorted(container_growth.items()):
+                limit = last.limits.get(name)
+                if rate <= 0:
+                    continue
+                if limit is not None and last.containers.get(name, 0) <= limit:
+                    warming.append(name)
+                elif increasing("containers", name):
+                    leaks.append(f"translator.{name} grows {rate:.4f} items/msg")
+            for name, rate in sorted(dataclass_growth.items()):
+                if rate > 0 and increasing("instances", name):
+                    leaks.append(f"live {name} instances grow {rate:.4f}/msg")
+            if not warming:
+                for name, rate in sorted(component_growth.items()):
+                    if rate >= self.leak_threshold and increasing("components", name):
+                        leaks.append(f"component {name} grows {rate:.2f} B/msg")
+
+        return MemoryReport(
+            samples=list(samples),
+            retained_bytes_per_msg=round(retained, 3),
+            interval_peak_bytes=max(peak, 0),
+            component_growth={name: round(rate, 3) for name, rate in component_growth.items()},
+            dataclass_growth={name: round(rate, 6) for name, rate in dataclass_growth.items()},
+            leaks=leaks,
+            warming=warming,
+        )
@@ -0,0 +1,85 @@
+import pytest
+
+import json
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.ab_race import ABRace
+from ab_race_translator.bench.corpus import build_corpus, build_racing_logs
+from ab_race_translator.driver import translate_tape
+from ab_race_translator.profiling import ComponentAttributor, MemoryProfiler, container_sizes
+from ab_race_translator.sink import OutputSink
+
+
+class _HistoryRace(ABRace):
+    """Translator that keeps every result, i.e. leaks one string per message."""
+
+    def __init__(self):
+        super().__init__()
+        self.history = []
+
+    def translate_action(self, msg):
+        result = super().translate_action(msg)
+        self.history.append(result)
+        return result
+
+
+class _LogRace(ABRace):
+    """Translator that takes the structure of each message from build_racing_logs."""
+
+    def __init__(self, logs):
+        super().__init__()
+        self._logs = {id(msg): pMlog for pMlog, msg in logs}
+
+    def translate_action(self, msg):
+        return self.translate_logab(self._logs[id(msg)], msg)
+
+
+def test_flags_growing_translator_container():
+    report = MemoryProfiler(interval=100, count_dataclasses=False).profile(
+        build_corpus(600, seed=2), _HistoryRace())
+
+    assert len(report.samples) == 7
+    assert any(leak.startswith("translator.history grows 1.0000") for leak in report.leaks)
+    json.dumps(report.to_dict())
+
+
+def test_reused_translator_has_no_container_leaks():
+    translator = create_ab_race()
+    report = MemoryProfiler(interval=100).profile(build_corpus(600, seed=2), translator)
+
+    assert not [leak for leak in report.leaks if leak.startswith("translator.")]
+    assert report.samples[-1].containers["buf"] == len(translator.buf)
+    assert "suspected leaks" in report.format()
+
+
+def test_attributes_allocations_to_components():
+    logs = build_racing_logs(200, seed=6)
+    profiler = MemoryProfiler(interval=50, count_dataclasses=False)
+    report = profiler.profile([msg for _, msg in logs], _LogRace(logs))
+
+    components = report.samples[-1].components
+    assert "TimestampFormatter" in components
+    assert "DeSelMap" in components
+    assert "profiling" not in components
+    assert ComponentAttributor().component(()) == "other"
+
+
+def test_container_sizes_descends_into_helpers():
+    sizes = container_sizes(create_ab_race())
+
+    assert "desel_map._memo" in sizes
+    assert "time_formatter._seconds" in sizes
+    assert sizes["buf"] == 0
+
+
+def test_translate_tape_with_profiler(tmp_path):
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(bytes(m.m_cpBuf) for m in build_corpus(100, seed=5)))
+    profiler = MemoryProfiler(interval=40, count_dataclasses=False)
+
+    result = translate_tape(path, OutputSink(tmp_path / "out"), workers=2,
+                            batch_size=16, profiler=profiler)
+
+    assert result.records == 100
+    assert [s.messages for s in profiler.samples] == [0, 48, 96, 100]
+    assert profiler.samples[-1].containers
@@ -0,0 +1,82 @@
+"""
+EDW Output Schema
+
+Names and types of the value fields of a translated racing record, in
+output order. Field k of the schema is record field k + RECORD_VALUE_OFFSET
+of RecordBuilder: the first two record fields are the record separator and
+the header message code.
+"""
+
+from typing import Dict, Optional, Tuple
+
+# Record fields before the first value field
+RECORD_VALUE_OFFSET = 2
+
+# Value fields of a racing record in output order
+VALUE_FIELDS: Tuple[str, ...] = (
+    # Common header (ABMsgTranslator.pack_header)
+    "oltp_id", "msg_order_no", "selling_date", "msg_size", "msg_code",
+    "err_code", "bcs_trap_msg_code", "staff_no", "logical_term_no", "acct_no",
+    "acct_file_file_no", "acct_file_block_no", "overflow_block_no",
+    "offset_to_acct_unit", "ac_tran_no", "time_stamp", "last_log_seq", "msn",
+    "ext_req_type", "prev_txn_catch_up", "bt_exception", "msg_to_other_system",
+    "pre_logon_flag", "ext_req_timeout_flag", "late_reply_flag",
+    "upd_bcsmsg_flag", "upd_rcvmsg_flag", "overflow_required_flag",
+    "cb_local_acct_release_flag", "no_flush_acct_release_flag",
+    "training_acct", "acct_sess_info_append", "source_type", "front_end_no",
+    "v_term_no", "v_location_id", "d_cit_no", "d_pseudo_term_no",
+    "d_frontend_no", "cit_type", "cbbt_centre_no", "cbbt_window_no",
+    "cbbt_logical_term_no", "cbbt_system_no", "old_cb_centre_no",
+    "old_cb_window_no", "old_cb_channel_no", "old_cb_system_no", "pol_file_no",
+    "pol_offset_no", "mat_no", "batch_deposit", "call_seq", "opt_mode",
+    # Racing bet
+    "meeting_date", "meeting_loc", "meeting_day", "ttl_pay", "unit_bet",
+    "ttl_cost", "sell_time", "bet_type", "cancel_flag", "allup_event_no",
+    "allup_formula",
+    # Allup events 1..6
+    "allup_pool_type1", "allup_race_no1", "allup_banker_flag1",
+    "allup_field_flag1", "allup_multi_flag1", "allup_multi_banker_flag1",
+    "allup_random_flag1", "allup_no_of_combination1", "allup_pay_factor1",
+    "allup_pool_type2", "allup_race_no2", "allup_banker_flag2",
+    "allup_field_flag2", "allup_multi_flag2", "allup_multi_banker_flag2",
+    "allup_random_flag2", "allup_no_of_combination2", "allup_pay_factor2",
+    "allup_pool_type3", "allup_race_no3", "allup_banker_flag3",
+    "allup_field_flag3", "allup_multi_flag3", "allup_multi_banker_flag3",
+    "allup_random_flag3", "allup_no_of_combination3", "allup_pay_factor3",
+    "allup_pool_type4", "allup_race_no4", "allup_banker_flag4",
+    "allup_field_flag4", "allup_multi_flag4", "allup_multi_banker_flag4",
+    "allup_random_flag4", "allup_no_of_combination4", "allup_pay_factor4",
+    "allup_pool_type5", "allup_race_no5", "allup_banker_flag5",
+    "allup_field_flag5", "allup_multi_flag5", "allup_multi_banker_flag5",
+    "allup_random_flag5", "allup_no_of_combination5", "allup_pay_factor5",
+    "allup_pool_type6", "allup_race_no6", "allup_banker_flag6",
+    "allup_field_flag6", "allup_multi_flag6", "allup_multi_banker_flag6",
+    "allup_random_flag6", "allup_no_of_combination6", "allup_pay_factor6",
+    # Standard/exotic bet, selections and bitmaps
+    "race_no", "banker_flag", "field_flag", "multiple_flag",
+    "multi_banker_flag", "random_flag", "sb_selection", "no_banker_bitmap1",
+    "no_banker_bitmap2", "no_banker_bitmap3", "bitmap1", "bitmap2", "bitmap3",
+    "bitmap4", "bitmap5", "bitmap6", "cross_selling_flag", "flexi_bet_flag",
+    "no_of_combinations", "is_anonymous_acc", "is_csc_card",
+)
+
+# Value fields holding text; every other value field is an integer
+STRING_FIELDS = frozenset((
+    "oltp_id", "selling_date", "time_stamp", "v_term_no", "cit_type", "mat_no",
+    "meeting_date", "sell_time", "bet_type", "cancel_flag", "allup_formula",
+    "allup_pool_type1", "allup_pool_type2", "allup_pool_type3",
+    "allup_pool_type4", "allup_pool_type5", "allup_pool_type6", "sb_selection",
+    "bitmap1", "bitmap2", "bitmap3", "bitmap4", "bitmap5", "bitmap6",
+))
+
+# Integer value fields holding unsigned 64-bit amounts (BETHDR totdu, costlu)
+UNSIGNED_FIELDS = frozenset(("ttl_pay", "ttl_cost"))
+
+# Column name -> array typecode ("Q" uint64, "q" int64) or None for text columns
+FIELD_TYPECODES: Dict[str, Optional[str]] = {
+    name: None if name in STRING_FIELDS else "Q" if name in UNSIGNED_FIELDS else "q"
+    for name in VALUE_FIELDS
+}
+
+# Column name -> position in VALUE_FIELDS
+FIELD_INDEX: Dict[str, int] = {name: i for i, name in enumerate(VALUE_FIELDS)}
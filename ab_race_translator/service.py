@@ -0,0 +1,470 @@
+"""
+Streaming Translation Service
+
+asyncio server that accepts LOGAB records over a TCP or Unix socket and
+streams the translated results back. Producers write records back to back,
+framed by the sizew field of each LOGAB header exactly as on a logger tape;
+the service answers with one UTF-8 line per record, in input order.
+
+Each connection is read in chunks and micro-batched: records are collected
+until batch_size are waiting or linger seconds have passed since the first
+one, and the batch is translated on a worker pool with the parallel
+driver's shard function. Backpressure is end to end:
+
+- at most max_pending batches per connection are in flight; when that many
+  are queued the connection is not read, so the producer's socket buffer
+  fills and its writes block
+- results are written with drain(), so a slow consumer stalls translation
+  of its own connection instead of buffering output
+- when an output sink is attached, each batch is written to it on a
+  dedicated thread before its slot is released
+
+Memory per connection is therefore bounded by max_pending * batch_size
+records plus one read chunk.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import tzinfo
+from typing import Iterable, List, Optional, Tuple, Union
+
+from . import metrics as _metrics
+from .ab_race import ABRace
+from .data_structures import Msg
+from .parallel import _run_shard, _translate_shard, _worker_init
+from .sink import OutputSink
+from .tape import _MsgDates, _check_time_offset, _frame_record, _record_msg
+
+# Records per micro-batch
+DEFAULT_SERVICE_BATCH_SIZE = 256
+
+# Seconds a partial micro-batch waits for more records
+DEFAULT_LINGER = 0.005
+
+# Bytes requested per socket read
+DEFAULT_READ_SIZE = 65536
+
+_logger = logging.getLogger(__name__)
+
+# Per-thread translators for thread pool executors
+_thread_state = threading.local()
+
+
+class FramingError(ValueError):
+    """Raised when the input stream does not hold valid LOGAB framing."""
+
+
+class MessageFramer:
+    """
+    Incremental framer turning a byte stream into translator messages.
+
+    Records are framed and turned into messages by the same helpers as
+    TapeReader, so message time and date are read at time_offset as on a
+    tape, and are 0 without one. Framing stops at the first header with an invalid size; error then
+    holds the reason and no further records are framed.
+    """
+
+    def __init__(self, sys_no: int = 1, sys_name: str = "AB",
+                 time_offset: Optional[int] = None, tz: Optional[tzinfo] = None):
+        """
+        Initialize the framer.
+
+        Args:
+            sys_no: System number reported in each Msg
+            sys_name: System name reported in each Msg
+            time_offset: Byte offset of the message time within each
+                record, see TapeReader
+            tz: Timezone of the message dates, None for local time
+        """
+        self.sys_no = sys_no
+        self.sys_name = sys_name
+        self.time_offset = _check_time_offset(time_offset)
+        self.error: Optional[str] = None
+        self._buffer = bytearray()
+        self._msg_date = _MsgDates(tz)
+
+    @property
+    def pending_bytes(self) -> int:
+        """int: Bytes received that do not yet form a complete record."""
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> List[Msg]:
+        """
+        Add received bytes and frame every complete record.
+
+        Args:
+            data: Received bytes
+
+        Returns:
+            List[Msg]: Messages completed by the data, in stream order
+        """
+        buffer = self._buffer
+        msgs: List[Msg] = []
+        if self.error is not None:
+            return msgs
+        buffer += data
+        offset = 0
+        end = len(buffer)
+        time_offset = self.time_offset
+
+        while True:
+            try:
+                record = _frame_record(buffer, offset, end, time_offset)
+            except ValueError as e:
+                self.error = f"{e} in stream"
+                break
+            if record is None:
+                break
+            # The slice of the bytearray is a copy; keep an immutable one
+            record.buf = bytes(record.buf)
+            msgs.append(_record_msg(record, self.sys_no, self.sys_name, self._msg_date))
+            offset = record.end_offset
+
+        del buffer[:offset]
+        return msgs
+
+
+def _thread_translate(tape_id: int, start_order_no: int, msgs: List[Msg],
+                      tz: Optional[tzinfo] = None) -> List[str]:
+    """Translate one batch with the calling thread's translator."""
+    translator = getattr(_thread_state, "translator", None)
+    if translator is None:
+        translator = _thread_state.translator = ABRace(tz=tz)
+    return _run_shard(translator, tape_id, start_order_no, msgs, tz)
+
+
+def _encode_results(results: List[str]) -> bytes:
+    """Encode results as newline-terminated lines."""
+    lines = [result.replace("\n", " ") if "\n" in result else result
+             for result in results]
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+class TranslationService:
+    """
+    asyncio racing translation server.
+
+    Listens on a TCP host/port or, when path is given, a Unix socket. With
+    workers <= 1 batches are translated on a single background thread,
+    otherwise on a process pool shared by all connections.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 path: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 batch_size: int = DEFAULT_SERVICE_BATCH_SIZE,
+                 linger: float = DEFAULT_LINGER,
+                 max_pending: Optional[int] = None,
+                 tape_id: int = 1, sys_no: int = 1, sys_name: str = "AB",
+                 start_order_no: int = 1,
+                 read_size: int = DEFAULT_READ_SIZE,
+                 executor: Optional[Executor] = None,
+                 sink: Optional[OutputSink] = None,
+                 time_offset: Optional[int] = None,
+                 tz: Optional[tzinfo] = None):
+        """
+        Initialize the service.
+
+        Args:
+            host: TCP listen address
+            port: TCP port, 0 picks a free port
+            path: Unix socket path; replaces host and port when given
+            workers: Number of worker processes, defaults to the CPU count
+            batch_size: Records per micro-batch
+            linger: Seconds a partial micro-batch waits for more records
+            max_pending: Batches in flight per connection, defaults to
+                twice the number of workers
+            tape_id: Logger tape ID passed to the translators
+            sys_no: System number reported in each Msg
+            sys_name: System name reported in each Msg
+            start_order_no: Order number of the first record of each connection
+            read_size: Bytes requested per socket read
+            executor: Optional externally managed executor to translate on
+            sink: Optional output sink receiving every translated batch; it
+                is shared by all connections and left open by close()
+            time_offset: Byte offset of the message time within each
+                record, see TapeReader
+            tz: Timezone of the message dates and formatted times, None
+                for local time
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.host = host
+        self.port = port
+        self.path = path
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_pending = max_pending or max(2, 2 * self.workers)
+        self.tape_id = tape_id
+        self.sys_no = sys_no
+        self.sys_name = sys_name
+        self.start_order_no = start_order_no
+        self.read_size = read_size
+        self.time_offset = _check_time_offset(time_offset)
+        self.tz = tz
+        self._executor = executor
+        self._owns_executor = False
+        self.sink = sink
+        self._sink_executor: Optional[ThreadPoolExecutor] = None
+        self._translate = _thread_translate
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def address(self) -> Union[str, Tuple[str, int], None]:
+        """Listening address: socket path or (host, port), None before start()."""
+        if self._server is None:
+            return None
+        if self.path is not None:
+            return self.path
+        return self._server.sockets[0].getsockname()[:2]
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers > 1:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     initializer=_worker_init)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+            self._owns_executor = True
+        return self._executor
+
+    async def start(self):
+        """Start listening."""
+        executor = self._get_executor()
+        if isinstance(executor, ProcessPoolExecutor):
+            self._translate = _translate_shard
+        else:
+            self._translate = _thread_translate
+        if self.sink is not None and self._sink_executor is None:
+            # One thread keeps sink writes ordered and off the event loop
+            self._sink_executor = ThreadPoolExecutor(max_workers=1)
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def serve_forever(self):
+        """Start listening if needed and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and shut down the worker pool if the service created it."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+        self._executor = None
+        self._owns_executor = False
+        if self._sink_executor is not None:
+            self._sink_executor.shutdown()
+            self._sink_executor = None
+
+    async def __aenter__(self) -> "TranslationService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve one producer connection.
+
+        Failures are contained to the connection: they are logged and the
+        connection is closed, while the server keeps serving others.
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.max_pending)
+        sender = asyncio.ensure_future(self._send_results(pending, slots, writer))
+        try:
+            try:
+                await self._read_batches(reader, pending, slots)
+            except FramingError as e:
+                pending.put_nowait(f"ERROR: {str(e)}\n".encode("utf-8"))
+            except ConnectionError:
+                pass
+            pending.put_nowait(None)
+            await sender
+        except ConnectionError:
+            pass
+        except Exception as e:
+            _metrics.record_exception("TranslationService._handle", e)
+            _logger.exception("Translation connection %s failed",
+                              writer.get_extra_info("peername"))
+        finally:
+            sender.cancel()
+            writer.close()
+
+    async def _read_batches(self, reader: asyncio.StreamReader, pending: asyncio.Queue,
+                            slots: asyncio.Semaphore):
+        """
+        Read, frame and micro-batch records, submitting each batch for translation.
+
+        Args:
+            reader: Connection reader
+            pending: Queue of translation futures, in input order
+            slots: One slot per batch allowed in flight
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        translate = self._translate
+        framer = MessageFramer(self.sys_no, self.sys_name, self.time_offset, self.tz)
+        batch: List[Msg] = []
+        order_no = self.start_order_no
+        deadline = None
+
+        async def submit():
+            nonlocal batch, order_no, deadline
+            # Blocks while max_pending batches are in flight
+            await slots.acquire()
+            pending.put_nowait(
+                loop.run_in_executor(executor, translate, self.tape_id, order_no, batch,
+                                     self.tz))
+            order_no += len(batch)
+            batch = []
+            deadline = None
+
+        while True:
+            if deadline is None:
+                data = await reader.read(self.read_size)
+            else:
+                timeout = deadline - loop.time()
+                try:
+                    data = await asyncio.wait_for(reader.read(self.read_size), max(timeout, 0))
+                except asyncio.TimeoutError:
+                    await submit()
+                    continue
+            if not data:
+                break
+
+            for msg in framer.feed(data):
+                if not batch:
+                    deadline = loop.time() + self.linger
+                batch.append(msg)
+                if len(batch) >= self.batch_size:
+                    await submit()
+            if framer.error is not None:
+                break
+
+        if batch:
+            await submit()
+        if framer.error is not None:
+            raise FramingError(framer.error)
+        if framer.pending_bytes:
+            raise FramingError(
+                f"Connection closed inside a record ({framer.pending_bytes} trailing bytes)")
+
+    async def _send_results(self, pending: asyncio.Queue, slots: asyncio.Semaphore,
+                            writer: asyncio.StreamWriter):
+        """
+        Write translated batches back in input order.
+
+        After a failed write or translation the connection is aborted, and
+        the queue is still drained so the reading side never blocks on it.
+
+        Args:
+            pending: Queue of translation futures or raw bytes, None at end
+            slots: Released once per written batch
+            writer: Connection writer
+        """
+        loop = asyncio.get_running_loop()
+        sink = self.sink
+        error = None
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            if isinstance(item, bytes):
+                if error is None:
+                    writer.write(item)
+                continue
+            try:
+                if error is None:
+                    results = await item
+                    if sink is not None:
+                        await loop.run_in_executor(self._sink_executor,
+                                                   sink.write_batch, results)
+                    writer.write(_encode_results(results))
+                    await writer.drain()
+                else:
+                    item.cancel()
+            except Exception as e:
+                error = e
+                writer.transport.abort()
+            finally:
+                slots.release()
+
+        if error is not None:
+            raise error
+        if writer.can_write_eof():
+            writer.write_eof()
+
+
+async def send_records(records: Iterable[bytes], host: str = "127.0.0.1",
+                       port: int = 0, path: Optional[str] = None) -> List[str]:
+    """
+    Send LOGAB records to a translation service and collect the results.
+
+    Records are written concurrently with reading the results, so the
+    producer observes the service's backpressure instead of deadlocking.
+
+    Args:
+        records: Raw LOGAB records
+        host: Service host
+        port: Service TCP port
+        path: Service Unix socket path; replaces host and port when given
+
+    Returns:
+        List[str]: Result lines in input order
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def produce():
+        for record in records:
+            writer.write(record)
+            await writer.drain()
+        writer.write_eof()
+
+    producer = asyncio.ensure_future(produce())
+    lines = []
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            lines.append(line.decode("utf-8").rstrip("\n"))
+        await producer
+    finally:
+        producer.cancel()
+        writer.close()
+    return lines
+
+
+def run_service(**kwargs):
+    """
+    Run a translation service until interrupted.
+
+    Args:
+        **kwargs: TranslationService arguments
+    """
+    async def serve():
+        async with TranslationService(**kwargs) as service:
+            await service.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
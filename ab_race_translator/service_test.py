@@ -0,0 +1,150 @@
+import pytest
+
+import asyncio
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.bench.corpus import build_corpus
+from ab_race_translator.service import MessageFramer, TranslationService, send_records
+from ab_race_translator.sink import OutputSink
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    msgs = build_corpus(200, seed=11)
+    records = [bytes(msg.m_cpBuf) for msg in msgs]
+    framed = [m for m in MessageFramer().feed(b"".join(records))]
+    expected = create_ab_race().translate_batch(framed, start_order_no=1).results
+    return records, expected
+
+
+def test_framer_handles_split_records(corpus):
+    records, _ = corpus
+    stream = b"".join(records[:5])
+    framer = MessageFramer(sys_no=2, sys_name="AB2")
+
+    msgs = []
+    for i in range(0, len(stream), 7):
+        msgs.extend(framer.feed(stream[i:i + 7]))
+
+    assert [m.m_cpBuf for m in msgs] == records[:5]
+    assert msgs[0].m_iSysName == "AB2"
+    assert framer.pending_bytes == 0
+
+    assert framer.feed(b"\x05\x00" + bytes(60)) == []
+    assert framer.error is not None
+
+
+def test_tcp_stream_matches_serial(corpus):
+    records, expected = corpus
+
+    async def run():
+        async with TranslationService(workers=1, batch_size=16, linger=0.001) as service:
+            host, port = service.address
+            return await send_records(records, host, port)
+
+    assert asyncio.run(run()) == expected
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+def test_unix_socket_with_process_pool(corpus, tmp_path):
+    records, expected = corpus
+    path = str(tmp_path / "translate.sock")
+
+    async def run():
+        async with TranslationService(path=path, workers=2, batch_size=32) as service:
+            first, second = await asyncio.gather(send_records(records, path=path),
+                                                 send_records(records[:10], path=path))
+            return first, second
+
+    first, second = asyncio.run(run())
+    assert first == expected
+    assert second == expected[:10]
+
+
+def test_backpressure_bounds_batches_in_flight(corpus):
+    records, expected = corpus
+    gate = threading.Event()
+    started = []
+
+    async def run():
+        executor = ThreadPoolExecutor(max_workers=8)
+        async with TranslationService(workers=1, batch_size=4, max_pending=2,
+                                      executor=executor) as service:
+            translate = service._translate
+
+            def gated(*args):
+                started.append(args[1])
+                gate.wait()
+                return translate(*args)
+
+            service._translate = gated
+            host, port = service.address
+            client = asyncio.ensure_future(send_records(records, host, port))
+            await asyncio.sleep(0.2)
+            in_flight = len(started)
+            gate.set()
+            results = await client
+        executor.shutdown()
+        return in_flight, results
+
+    in_flight, results = asyncio.run(run())
+    assert in_flight == 2
+    assert results == expected
+
+
+def test_invalid_framing_reports_error(corpus):
+    records, expected = corpus
+
+    async def run():
+        async with TranslationService(workers=1, batch_size=8) as service:
+            host, port = service.address
+            return await send_records(records[:3] + [bytes(50)], host, port)
+
+    results = asyncio.run(run())
+    assert results[:3] == expected[:3]
+    assert results[3].startswith("ERROR: Invalid record size")
+
+
+def test_failed_connection_is_logged_and_service_continues(corpus, caplog):
+    records, expected = corpus
+
+    async def run():
+        async with TranslationService(workers=1, batch_size=8) as service:
+            translate = service._translate
+
+            def failing(*args):
+                if args[2][0].m_iSysNo == 2:
+                    raise RuntimeError("translator crashed")
+                return translate(*args)
+
+            service._translate = failing
+            service.sys_no = 2
+            host, port = service.address
+            try:
+                await send_records(records[:8], host, port)
+            except ConnectionError:
+                pass
+            service.sys_no = 1
+            return await send_records(records[:8], host, port)
+
+    assert asyncio.run(run()) == expected[:8]
+    assert [str(r.exc_info[1]) for r in caplog.records
+            if r.name == "ab_race_translator.service"] == ["translator crashed"]
+
+
+def test_batches_written_to_sink(corpus, tmp_path):
+    records, expected = corpus
+    sink = OutputSink(tmp_path, max_records=150)
+
+    async def run():
+        async with TranslationService(workers=1, batch_size=32, sink=sink) as service:
+            host, port = service.address
+            return await send_records(records, host, port)
+
+    assert asyncio.run(run()) == expected
+    sink.close()
+    assert "".join(Path(p).read_text() for p in sink.files).splitlines() == expected
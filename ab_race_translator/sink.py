@@ -0,0 +1,431 @@
+"""
+Output Sink
+
+Writes translated records to rotating output files. Records are collected
+in memory and written in large blocks, optionally through gzip or xz
+compression. Files are rotated by size (uncompressed bytes) or record
+count and written under a ".part" name that is renamed into place when the
+file is complete, so downstream loaders never pick up a partial file.
+
+Durability is controlled per batch: every fsync_batches calls to
+write_batch the pending data is flushed and the file fsynced. For gzip the
+compressor is sync-flushed first; xz output still buffered inside the
+compressor only becomes durable when the file is closed.
+
+checkpoint() makes every record written so far durable and returns the
+sink state, including the position and CRC-32 of the file being written; a
+new sink continues from that state with resume(). Compressed files end
+their current gzip member or xz stream at every checkpoint, so a file can
+be truncated back to a checkpoint and appended to; both formats decode
+concatenated members as one stream.
+"""
+
+import gzip
+import lzma
+import os
+import re
+import zlib
+from itertools import accumulate
+from typing import IO, Any, Dict, Iterable, List, Optional, Union
+
+from .constants import ERROR_PREFIX
+from .data_structures import BatchResult
+
+# Bytes collected before a block write
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+# Suffix of files still being written
+PART_SUFFIX = ".part"
+
+# Compression name -> file name suffix
+COMPRESSION_SUFFIXES = {
+    None: "",
+    "gzip": ".gz",
+    "xz": ".xz",
+}
+
+# Bytes read at a time when verifying a file against a checkpoint
+_VERIFY_CHUNK = 1 << 20
+
+
+def _fsync_path(path: str):
+    """Fsync a file, or a directory to persist the renames in it, by path."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _ChecksumFile:
+    """Binary file wrapper tracking the position and CRC-32 of the bytes written."""
+
+    def __init__(self, raw: IO[bytes], position: int = 0, crc32: int = 0):
+        self.raw = raw
+        self.position = position
+        self.crc32 = crc32
+
+    def write(self, data) -> int:
+        self.crc32 = zlib.crc32(data, self.crc32)
+        size = len(data)
+        self.position += size
+        self.raw.write(data)
+        return size
+
+    def flush(self):
+        self.raw.flush()
+
+    def fileno(self) -> int:
+        return self.raw.fileno()
+
+    def close(self):
+        self.raw.close()
+
+
+class OutputSink:
+    """
+    Buffered, rotating, optionally compressed record writer.
+
+    Output files are named <prefix>.<sequence>.txt plus the compression
+    suffix, with a zero-padded sequence number starting at 1, and hold one
+    record per line.
+    """
+
+    def __init__(self, directory: Union[str, "os.PathLike[str]"],
+                 prefix: str = "ab_race",
+                 compression: Optional[str] = None,
+                 compresslevel: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 max_records: Optional[int] = None,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 fsync_batches: Optional[int] = None,
+                 skip_errors: bool = False):
+        """
+        Initialize the sink.
+
+        Args:
+            directory: Output directory, created if missing
+            prefix: Output file name prefix
+            compression: None, "gzip" or "xz"
+            compresslevel: Compression level, defaults to the library default
+                for xz and 6 for gzip
+            max_bytes: Rotate once a file holds this many uncompressed bytes
+            max_records: Rotate once a file holds this many records
+            buffer_size: Bytes collected before a block write
+            fsync_batches: Flush and fsync every this many batches, None to
+                leave flushing to the operating system
+            skip_errors: Drop results that start with ERROR_PREFIX instead of
+                writing them
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression {compression!r}")
+        if fsync_batches is not None and fsync_batches < 1:
+            raise ValueError("fsync_batches must be at least 1")
+
+        self.directory = os.fspath(directory)
+        self.prefix = prefix
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.buffer_size = buffer_size
+        self.fsync_batches = fsync_batches
+        self.skip_errors = skip_errors
+
+        self.files: List[str] = []
+        self.records_written = 0
+        self.errors_skipped = 0
+
+        self._sequence = 0
+        self._raw: Optional[_ChecksumFile] = None
+        self._stream: Optional[IO[bytes]] = None
+        self._path: Optional[str] = None
+        self._file_bytes = 0
+        self._file_records = 0
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+        self._batches = 0
+        self._synced_files = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def current_path(self) -> Optional[str]:
+        """Optional[str]: Final path of the file being written, if any."""
+        return self._path
+
+    def _open(self):
+        """Open the next output file."""
+        self._sequence += 1
+        name = (f"{self.prefix}.{self._sequence:05d}.txt"
+                f"{COMPRESSION_SUFFIXES[self.compression]}")
+        self._path = os.path.join(self.directory, name)
+        self._raw = _ChecksumFile(open(self._path + PART_SUFFIX, "wb"))
+        self._open_stream()
+        self._file_bytes = 0
+        self._file_records = 0
+
+    def _open_stream(self):
+        """Start a compressed member, or write plainly, on the current file."""
+        if self.compression == "gzip":
+            level = 6 if self.compresslevel is None else self.compresslevel
+            self._stream = gzip.GzipFile(filename=os.path.basename(self._path), mode="wb",
+                                         fileobj=self._raw, compresslevel=level)
+        elif self.compression == "xz":
+            preset = self.compresslevel
+            self._stream = lzma.LZMAFile(self._raw, mode="wb", preset=preset)
+        else:
+            self._stream = self._raw
+
+    def _close_file(self):
+        """Finish the current file and move it into place."""
+        if self._raw is None:
+            return
+        self._flush_pending()
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        if self.fsync_batches is not None:
+            os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self._path + PART_SUFFIX, self._path)
+        self.files.append(self._path)
+        self._raw = self._stream = self._path = None
+
+    def _flush_pending(self):
+        """Write the collected records as one block."""
+        if self._pending:
+            self._stream.write("".join(self._pending).encode("utf-8"))
+            self._pending.clear()
+            self._pending_bytes = 0
+
+    def _append(self, text: str, count: int):
+        """
+        Collect rendered lines for the current file.
+
+        Args:
+            text: Newline-terminated records
+            count: Number of records in text
+        """
+        size = len(text)
+        self._pending.append(text)
+        self._pending_bytes += size
+        self._file_bytes += size
+        self._file_records += count
+        self.records_written += count
+        if self._pending_bytes >= self.buffer_size:
+            self._flush_pending()
+
+    def _file_full(self) -> bool:
+        """Check whether the current file reached a rotation limit."""
+        return ((self.max_records is not None and self._file_records >= self.max_records)
+                or (self.max_bytes is not None and self._file_bytes >= self.max_bytes))
+
+    def _records_until_full(self, results: List[str], start: int, end: int) -> int:
+        """
+        Find where the current file reaches max_bytes within results[start:end].
+
+        Args:
+            results: Records being written
+            start: First record not yet written
+            end: End of the candidate range
+
+        Returns:
+            int: End of the records that go into the current file
+        """
+        remaining = self.max_bytes - self._file_bytes
+        # Size of results[start:k + 1] including terminators is sizes[k - start] + k - start + 1
+        sizes = list(accumulate(map(len, results[start:end])))
+        low, high = 0, len(sizes)
+        while low < high:
+            mid = (low + high) // 2
+            if sizes[mid] + mid + 1 >= remaining:
+                high = mid
+            else:
+                low = mid + 1
+        return start + min(low + 1, len(sizes))
+
+    def write(self, result: str):
+        """
+        Write one translated record.
+
+        Args:
+            result: Translated record without line terminator
+        """
+        if self.skip_errors and result.startswith(ERROR_PREFIX):
+            self.errors_skipped += 1
+            return
+        if self._raw is None:
+            self._open()
+        self._append(result + "\n", 1)
+        if self._file_full():
+            self._close_file()
+
+    def write_batch(self, results: Union[Iterable[str], BatchResult]):
+        """
+        Write a batch of translated records and apply the fsync policy.
+
+        Records are rendered once per output file the batch spans rather
+        than once per record.
+
+        Args:
+            results: Translated records, or a BatchResult
+        """
+        if isinstance(results, BatchResult):
+            results = results.results
+        elif not isinstance(results, list):
+            results = list(results)
+        if self.skip_errors:
+            kept = [result for result in results if not result.startswith(ERROR_PREFIX)]
+            self.errors_skipped += len(results) - len(kept)
+            results = kept
+
+        start = 0
+        count = len(results)
+        while start < count:
+            if self._raw is None:
+                self._open()
+            end = count
+            if self.max_records is not None:
+                end = min(end, start + self.max_records - self._file_records)
+            if self.max_bytes is not None:
+                end = self._records_until_full(results, start, end)
+
+            self._append("\n".join(results[start:end]) + "\n", end - start)
+            if self._file_full():
+                self._close_file()
+            start = end
+
+        self._batches += 1
+        if self.fsync_batches is not None and self._batches % self.fsync_batches == 0:
+            self.sync()
+
+    def sync(self):
+        """Flush collected records and fsync the current file."""
+        if self._raw is None:
+            return
+        self._flush_pending()
+        if self._stream is not self._raw and self.compression == "gzip":
+            self._stream.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+
+    def rotate(self):
+        """Finish the current file; the next record starts a new one."""
+        self._close_file()
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """
+        Make every record written so far durable and get the sink state.
+
+        Collected records are written, a compressed file ends its current
+        member and the file is fsynced.
+
+        Returns:
+            Dict[str, Any]: JSON-serializable sink state for resume()
+        """
+        position = crc32 = 0
+        completed = self.files[self._synced_files:]
+        for path in completed:
+            _fsync_path(path)
+        if completed and os.name == "posix":
+            _fsync_path(self.directory)
+        self._synced_files = len(self.files)
+        if self._raw is not None:
+            self._flush_pending()
+            if self._stream is not self._raw:
+                self._stream.close()
+            self._raw.flush()
+            os.fsync(self._raw.fileno())
+            position, crc32 = self._raw.position, self._raw.crc32
+            if self._stream is not self._raw:
+                self._open_stream()
+        return {
+            "sequence": self._sequence,
+            # Absolute, so a run resumed from another directory finds the files
+            "path": self._path and os.path.abspath(self._path),
+            "position": position,
+            "crc32": crc32,
+            "file_bytes": self._file_bytes,
+            "file_records": self._file_records,
+            "files": [os.path.abspath(path) for path in self.files],
+            "records_written": self.records_written,
+            "errors_skipped": self.errors_skipped,
+        }
+
+    def resume(self, state: Dict[str, Any]):
+        """
+        Continue writing from a state returned by checkpoint().
+
+        The file being written at the checkpoint is verified against the
+        checkpoint CRC-32, truncated to the checkpoint position and
+        reopened, also when it was completed after the checkpoint. Files
+        started after the checkpoint are removed.
+
+        Args:
+            state: Sink state of the checkpoint
+
+        Raises:
+            ValueError: If the sink already wrote records, or the output file
+                is missing or does not match the checkpoint
+        """
+        if self._sequence or self.files:
+            raise ValueError("Only a sink that has not written yet can resume")
+
+        sequence = state["sequence"]
+        pattern = re.compile(re.escape(self.prefix) + r"\.(\d+)\.txt"
+                             + re.escape(COMPRESSION_SUFFIXES[self.compression])
+                             + "(" + re.escape(PART_SUFFIX) + ")?$")
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match and int(match.group(1)) > sequence:
+                os.remove(os.path.join(self.directory, name))
+
+        path = state["path"]
+        if path is not None:
+            part_path = path + PART_SUFFIX
+            if not os.path.exists(part_path):
+                if not os.path.exists(path):
+                    raise ValueError(f"Output file of the checkpoint is missing: {path}")
+                os.replace(path, part_path)
+
+            position = state["position"]
+            raw = open(part_path, "r+b")
+            try:
+                crc32 = 0
+                remaining = position
+                while remaining:
+                    data = raw.read(min(remaining, _VERIFY_CHUNK))
+                    if not data:
+                        break
+                    crc32 = zlib.crc32(data, crc32)
+                    remaining -= len(data)
+                if remaining or crc32 != state["crc32"]:
+                    raise ValueError(f"{part_path} does not match the checkpoint")
+                raw.truncate(position)
+                raw.seek(position)
+            except BaseException:
+                raw.close()
+                raise
+
+            self._path = path
+            self._raw = _ChecksumFile(raw, position, crc32)
+            self._open_stream()
+            self._file_bytes = state["file_bytes"]
+            self._file_records = state["file_records"]
+
+        self._sequence = sequence
+        self.files = list(state["files"])
+        self._synced_files = len(self.files)
+        self.records_written = state["records_written"]
+        self.errors_skipped = state["errors_skipped"]
+
+    def close(self):
+        """Finish the current file."""
+        self._close_file()
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,73 @@
+import pytest
+
+import gzip
+import lzma
+import os
+from pathlib import Path
+
+from ab_race_translator.data_structures import BatchResult
+from ab_race_translator.sink import PART_SUFFIX, OutputSink
+
+
+def _lines(count):
+    return [f"ABRACE@|@AB~|~{i}~|~payload" for i in range(count)]
+
+
+def test_rotates_by_record_count(tmp_path):
+    lines = _lines(25)
+
+    with OutputSink(tmp_path, prefix="day", max_records=10) as sink:
+        sink.write_batch(lines[:12])
+        sink.write_batch(lines[12:])
+        assert sink.current_path.endswith("day.00003.txt")
+        assert os.path.exists(sink.current_path + PART_SUFFIX)
+
+    assert [os.path.basename(p) for p in sink.files] == [
+        "day.00001.txt", "day.00002.txt", "day.00003.txt"]
+    content = "".join(Path(p).read_text() for p in sink.files)
+    assert content.splitlines() == lines
+    assert sink.records_written == 25
+    assert not any(name.endswith(PART_SUFFIX) for name in os.listdir(tmp_path))
+
+
+@pytest.mark.parametrize("compression, opener", [("gzip", gzip.open), ("xz", lzma.open)])
+def test_compressed_rotation_by_size(tmp_path, compression, opener):
+    lines = _lines(500)
+
+    with OutputSink(tmp_path, compression=compression, max_bytes=8000,
+                    buffer_size=1000, fsync_batches=2) as sink:
+        for i in range(0, len(lines), 50):
+            sink.write_batch(lines[i:i + 50])
+        sink.sync()
+
+    assert len(sink.files) > 1
+    assert all(p.endswith(".gz" if compression == "gzip" else ".xz") for p in sink.files)
+    content = b"".join(opener(p).read() for p in sink.files).decode()
+    assert content.splitlines() == lines
+
+
+def test_skip_errors_and_batch_results(tmp_path):
+    batch = BatchResult.from_results(["ok 1", "ERROR: bad", "ok 2"])
+
+    with OutputSink(tmp_path, skip_errors=True) as sink:
+        sink.write_batch(batch)
+
+    assert Path(sink.files[0]).read_text() == "ok 1\nok 2\n"
+    assert sink.errors_skipped == 1
+
+    with pytest.raises(ValueError):
+        OutputSink(tmp_path, compression="zip")
+
+
+def test_skip_errors_matches_error_prefix_only(tmp_path):
+    results = ["ERRORS|ok 1", "ERROR: bad", "ERROR|ok 2"]
+
+    with OutputSink(tmp_path / "batch", skip_errors=True) as sink:
+        sink.write_batch(BatchResult.from_results(results))
+    with OutputSink(tmp_path / "single", skip_errors=True) as single:
+        for result in results:
+            single.write(result)
+
+    for written in (sink, single):
+        assert Path(written.files[0]).read_text() == "ERRORS|ok 1\nERROR|ok 2\n"
+        assert written.errors_skipped == 1
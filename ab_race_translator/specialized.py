@@ -0,0 +1,471 @@
+"""
+Specialized Racing Translators
+
+Straight-line translate functions per bet family, generated at import time.
+
+The generic path of ABRace decides on every message which bet type
+branches apply: selection formatting, allup or standard bet fields and
+bitmap layout. For a given bet type all of those decisions are fixed, so
+for each family below a function is generated that decodes, formats and
+appends the racing fields of one bet type without branching on it. The
+racing fields are emitted by walking schema.VALUE_FIELDS: every field is
+bound to an expression of the family, and runs of fields that are constant
+for the bet type (bet type name, unused allup events, banker counts) are
+folded into a single precomputed FieldBlock. The whole run of racing
+fields is then appended to the record with one extend_run call. Sources
+are generated at import time; each function is compiled the first time
+its bet type is translated.
+
+Allup bets get one function per event count, chosen from the event count
+of the message. ABRace dispatches through SPECIALIZED_TRANSLATORS, one
+dict lookup on the bet type. A generated function handles only bet bodies
+of the BetExoStd / BetAup shape (six standard selection bitmaps, two per
+allup event); it returns None, or raises, for anything else, including
+the empty BetVar of messages decoded by StructParser, which does not
+decode bet bodies, and ABRace then falls back to the generic path. A generated
+function sets the m_* racing attributes exactly as the generic path does,
+and touches the translator only after every value has been computed.
+"""
+
+import math
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .ab_msg_translator import FieldBlock
+from .ab_race import _HEX_BYTE, _clamp32
+from .constants import *
+from .schema import VALUE_FIELDS
+from .utils import DeSelMap
+
+# Signature of a specialized translator: (translator, pMlog, msg) -> record
+# or None when the message must take the generic path
+SpecializedTranslator = Callable[..., Optional[str]]
+
+# Family name -> bet types translated by its generated functions; bet
+# types not listed (lottery, multi-leg quinella, SB) use the generic path
+BET_FAMILIES: Dict[str, Tuple[int, ...]] = {
+    "win_place": (BETTYP_WINPLA, BETTYP_WIN, BETTYP_PLA,
+                  BETTYP_BWA, BETTYP_CWA, BETTYP_CWB, BETTYP_CWC),
+    "quinella": (BETTYP_QIN, BETTYP_QPL, BETTYP_TRIO, BETTYP_QINQPL,
+                 BETTYP_FF, BETTYP_IWN),
+    "exotic": (BETTYP_TCE, BETTYP_FCT, BETTYP_QTT),
+    "multi_leg": (BETTYP_DBL, BETTYP_TBL, BETTYP_6UP),
+    "allup": (BETTYP_AUP,),
+}
+
+# Ordered bitmaps per leg of an exotic bet, see DeSelMap._format_standard_selections
+_EXOTIC_BITMAPS = {BETTYP_TCE: 3, BETTYP_FCT: 2, BETTYP_QTT: 4}
+
+# Allup pool types formatted as quinella selections
+_ALLUP_QUINELLA_POOLS = frozenset((BETTYP_QIN, BETTYP_QPL, BETTYP_TRIO,
+                                   BETTYP_QINQPL, BETTYP_FF, BETTYP_IWN))
+
+# Racing fields start at the meeting date
+_RACING_FIELDS = VALUE_FIELDS[VALUE_FIELDS.index("meeting_date"):]
+
+# Output bitmap fields, one per standard selection bitmap and allup event
+_BITMAP_COUNT = sum(1 for name in VALUE_FIELDS if name[:-1] == "bitmap")
+_ALLUP_EVENTS = sum(1 for name in VALUE_FIELDS if name[:-1] == "allup_pool_type")
+assert _BITMAP_COUNT == _ALLUP_EVENTS
+
+# Per allup event: output field name prefix -> local name prefix
+_ALLUP_EVENT_FIELDS = (
+    ("allup_pool_type", "pool_name"),
+    ("allup_race_no", "race"),
+    ("allup_banker_flag", "banker"),
+    ("allup_field_flag", "field"),
+    ("allup_multi_flag", "multi"),
+    ("allup_multi_banker_flag", "multi_banker"),
+    ("allup_random_flag", "random"),
+    ("allup_no_of_combination", "combinations"),
+    ("allup_pay_factor", "pay_factor"),
+)
+
+# Per allup event: m_* list attribute -> local name prefix
+_ALLUP_EVENT_ATTRS = (
+    ("m_cAllupPoolType", "pool"),
+    ("m_iAllupRaceNo", "race"),
+    ("m_cAllupBankerFlag", "banker"),
+    ("m_cAllupFieldFlag", "field"),
+    ("m_cAllupMultiFlag", "multi"),
+    ("m_cAllupMultiBankerFlag", "multi_banker"),
+    ("m_cAllupRandomFlag", "random"),
+    ("m_iNoOfCombination", "combinations"),
+    ("m_iPayFactor", "pay_factor"),
+    ("m_iAllupBankerBitmap", "banker_bitmap"),
+    ("m_iAllupSelectBitmap", "select_bitmap"),
+)
+
+
+class Const(NamedTuple):
+    """Field value that is the same for every message of a bet type."""
+    value: object
+
+
+def _clamp(name: str) -> str:
+    """Inline ABMsgTranslator.add_field clamping of a local integer; in-range values skip the call."""
+    return f"({name} if -2147483647 <= {name} <= 2147483647 else _clamp32({name}))"
+
+
+def _hex16(name: str) -> str:
+    """Inline ab_race._hex16 of a local bitmap."""
+    return f"('0000' if {name} > 0xFFFF else _HEX_BYTE[{name} >> 8] + _HEX_BYTE[{name} & 0xFF])"
+
+
+def _allup_selection(desel: DeSelMap, sel) -> str:
+    """
+    Format the selections of one allup event, as DeSelMap does.
+
+    Args:
+        desel: Selection mapper of the translator
+        sel: Allup event
+
+    Returns:
+        str: Event selections without race number and indicators
+    """
+    pool = sel.bettypebu
+    if pool in _ALLUP_QUINELLA_POOLS:
+        return desel._format_quinella_selection(sel.sellu, sel.ind.bnk1, sel.fdsz)
+    if pool == BETTYP_FCT:
+        return desel._format_extended_selection(sel.sellu, 2, sel.ind.bnk1, sel.fdsz)
+    return desel._format_simple_selection(sel.sellu, 0, sel.fdsz)
+
+
+# Statements shared by every family; {body} is the bet body local ("es" or
+# "allup") and {var} its BetVar attribute
+_PROLOGUE = """\
+    bt_rac = pMlog.data.bt_rac
+    bet_data = bt_rac.d
+    {body} = bet_data.var.{var}
+    if {body} is None:
+        return None
+    bet_hdr = bet_data.hdr
+    total_pay = bet_hdr.totdu
+    total_cost = bet_hdr.costlu
+    flexi = bet_hdr.betinvcomb.flexi
+    flexi_flag = flexi.flexibet
+    if flexi_flag == 0:
+        unit_bet = flexi.baseinv
+        unit_bet_tenk = unit_bet * 10000
+        combinations = (total_cost // 100) // unit_bet if unit_bet > 0 else 0
+    else:
+        unit_bet = 0
+        combinations = flexi.baseinv
+        unit_bet_tenk = (int(_floor(float(total_cost) * 1000.0 / float(combinations) / 10.0 + 0.5))
+                         if combinations > 0 else 0)
+    sell_time = self.time_formatter.format_datetime(msg.m_iMsgSellTime or msg.m_iMsgTime)
+    md = str({body}.md)
+    meet_date = f"{{md[0:4]}}-{{md[4:6]}}-{{md[6:8]}} 00:00:00" if len(md) == 8 else "2024-01-01 00:00:00"
+    loc = {body}.loc
+    day = {body}.day
+    cross_sell = bt_rac.crossSellFl
+    anonymous = pMlog.hdr.anonymous1
+    csc_card = bt_rac.csctrn
+    desel = self.desel_map
+"""
+
+
+def _common_fields(bet_type: int) -> Dict[str, object]:
+    """Field expressions shared by every family."""
+    return {
+        "meeting_date": "meet_date",
+        "meeting_loc": _clamp("loc"),
+        "meeting_day": _clamp("day"),
+        "ttl_pay": "total_pay",
+        "unit_bet": "unit_bet_tenk",
+        "ttl_cost": "total_cost",
+        "sell_time": "sell_time",
+        "bet_type": Const(BET_TYPE_NAMES.get(bet_type, "XXXX")),
+        "cancel_flag": Const(" "),
+        "sb_selection": "selections[:1000]",
+        "no_banker_bitmap1": Const(0),
+        "no_banker_bitmap2": Const(0),
+        "no_banker_bitmap3": Const(0),
+        "cross_selling_flag": _clamp("cross_sell"),
+        "flexi_bet_flag": _clamp("flexi_flag"),
+        "no_of_combinations": _clamp("combinations"),
+        "is_anonymous_acc": _clamp("anonymous"),
+        "is_csc_card": _clamp("csc_card"),
+    }
+
+
+def _common_attrs(bet_type: int) -> List[Tuple[str, str]]:
+    """m_* attribute assignments shared by every family."""
+    return [
+        ("m_itotalPay", "total_pay"),
+        ("m_iTotalCost", "total_cost"),
+        ("m_cBetType", repr(bet_type)),
+        ("m_iFlexiBetFlag", "flexi_flag"),
+        ("m_iUnitBet", "unit_bet"),
+        ("m_iUnitBetTenK", "unit_bet_tenk"),
+        ("m_iTotalNoOfCombinations", "combinations"),
+        ("m_sSellTime", "sell_time"),
+        ("m_sBetType", repr(BET_TYPE_NAMES.get(bet_type, "XXXX"))),
+        ("m_cLoc", "loc"),
+        ("m_cDay", "day"),
+        ("m_sMeetDate", "meet_date"),
+        ("m_iAnonymous", "anonymous"),
+        ("m_iCscCard", "csc_card"),
+    ]
+
+
+def _standard_selection(family: str, bet_type: int) -> str:
+    """Selection expression of a standard/exotic bet, without race number and indicators."""
+    if family == "win_place":
+        return "decode(b0, fdsz[0])"
+    if family == "quinella":
+        bankers = "1" if bet_type == BETTYP_IWN else "es.betexbnk.bnkbu[0]"
+        return f"desel._format_quinella_selection(sellu, {bankers}, fdsz[0])"
+    if family == "exotic":
+        return (f"desel._format_extended_selection(sellu, {_EXOTIC_BITMAPS[bet_type]}, "
+                f"es.betexbnk.bnkbu[0], fdsz[0])")
+    legs = DeSelMap()._get_leg_count(bet_type)
+    return ' + "/" + '.join(f"decode(b{i}, fdsz[{i}])" for i in range(legs))
+
+
+def _standard_body(family: str, bet_type: int) -> Tuple[str, Dict[str, object], List[Tuple[str, str]]]:
+    """Statements, field expressions and attributes of a standard/exotic bet."""
+    # The generic path formats standard bitmaps for these bet types only
+    assert bet_type < BETTYP_AUP or bet_type >= BETTYP_FF
+    bitmaps = [f"b{i}" for i in range(_BITMAP_COUNT)]
+    lines = [
+        "    sellu = es.sellu",
+        f"    {', '.join(bitmaps)} = sellu",
+        "    fdsz = es.fdsz",
+        "    decode = desel._decode_bitmap",
+        "    ind = es.ind",
+        "    race_no = es.racebu",
+        "    banker = ind.bnk1",
+        "    field = ind.fld1",
+        "    multi = ind.mul1",
+        "    multi_banker = ind.mbk1",
+        "    random = ind.rand1",
+        f"    selections = (f\"{{race_no}}*\" + {_standard_selection(family, bet_type)}",
+        "                  + (\"F\" if field else \"\") + (\"M\" if multi else \"\"))",
+    ]
+
+    fields = _common_fields(bet_type)
+    fields["allup_event_no"] = Const(0)
+    fields["allup_formula"] = Const(0)
+    for event in range(1, _ALLUP_EVENTS + 1):
+        for prefix, _ in _ALLUP_EVENT_FIELDS:
+            fields[f"{prefix}{event}"] = Const(0)
+    for name, local in (("race_no", "race_no"), ("banker_flag", "banker"),
+                        ("field_flag", "field"), ("multiple_flag", "multi"),
+                        ("multi_banker_flag", "multi_banker"), ("random_flag", "random")):
+        fields[name] = _clamp(local)
+    for i, local in enumerate(bitmaps):
+        fields[f"bitmap{i + 1}"] = _hex16(local)
+
+    attrs = _common_attrs(bet_type) + [
+        ("m_iRaceNo", "race_no"),
+        ("m_cBankerFlag", "banker"),
+        ("m_cFieldFlag", "field"),
+        ("m_cMultiFlag", "multi"),
+        ("m_cMultiBankerFlag", "multi_banker"),
+        ("m_cRandomFlag", "random"),
+        ("m_iBitmap", f"[{', '.join(bitmaps)}]"),
+    ]
+    return "\n".join(lines) + "\n", fields, attrs
+
+
+def _allup_body(events: int) -> Tuple[str, Dict[str, object], List[Tuple[str, str]]]:
+    """Statements, field expressions and attributes of an allup bet with a given event count."""
+    lines = [
+        "    sels = allup.sel",
+        "    formula_no = allup.fmlbu",
+        "    formula = _FORMULA_NAMES.get(formula_no, \"Err\")",
+    ]
+    for k in range(events):
+        lines += [
+            f"    s{k} = sels[{k}]",
+            f"    i{k} = s{k}.ind",
+            f"    pool{k} = s{k}.bettypebu",
+            f"    pool_name{k} = _BET_TYPE_NAMES.get(pool{k}, \"XXXX\")",
+            f"    race{k} = s{k}.racebu",
+            f"    banker{k} = i{k}.bnk1",
+            f"    field{k} = i{k}.fld1",
+            f"    multi{k} = i{k}.mul1",
+            f"    multi_banker{k} = i{k}.mbk1",
+            f"    random{k} = i{k}.rand1",
+            f"    combinations{k} = s{k}.comwu",
+            f"    pay_factor{k} = s{k}.pftrlu",
+            f"    banker_bitmap{k}, select_bitmap{k} = s{k}.sellu",
+            f"    sel{k} = (f\"{{race{k}}}*\" + _allup_selection(desel, s{k})",
+            f"            + (\"F\" if field{k} else \"\") + (\"M\" if multi{k} else \"\"))",
+        ]
+    joined = " + \"/\" + ".join(f"sel{k}" for k in range(events)) or "\"\""
+    lines.append(f"    selections = {joined}")
+
+    fields = _common_fields(BETTYP_AUP)
+    fields["allup_event_no"] = Const(events)
+    fields["allup_formula"] = "formula"
+    for k in range(_ALLUP_EVENTS):
+        for prefix, local in _ALLUP_EVENT_FIELDS:
+            name = f"{prefix}{k + 1}"
+            if k >= events:
+                fields[name] = Const(0)
+            elif local == "pool_name":
+                fields[name] = f"pool_name{k}"
+            else:
+                fields[name] = _clamp(f"{local}{k}")
+        fields[f"bitmap{k + 1}"] = (
+            f"{_hex16(f'banker_bitmap{k}')} + {_hex16(f'select_bitmap{k}')}"
+            if k < events else Const("0000"))
+    for name in ("race_no", "banker_flag", "field_flag", "multiple_flag",
+                 "multi_banker_flag", "random_flag"):
+        fields[name] = Const(0)
+
+    attrs = _common_attrs(BETTYP_AUP) + [
+        ("m_cNoOfEvt", repr(events)),
+        ("m_cFormula", "formula_no"),
+        ("m_sFormula", "formula"),
+    ]
+    for attr, local in _ALLUP_EVENT_ATTRS:
+        values = [f"{local}{k}" for k in range(events)] + ["0"] * (_ALLUP_EVENTS - events)
+        attrs.append((attr, f"[{', '.join(values)}]"))
+    if events:
+        attrs.append(("m_sAllupBettype", f"pool_name{events - 1}"))
+    return "\n".join(lines) + "\n", fields, attrs
+
+
+def _render_run(fields: Dict[str, object], namespace: Dict[str, object]) -> Tuple[str, int]:
+    """
+    Build the racing field run in schema order.
+
+    Consecutive constant fields become one FieldBlock, stored in namespace.
+
+    Args:
+        fields: Field name -> expression source or Const
+        namespace: Globals of the generated function
+
+    Returns:
+        Tuple[str, int]: Tuple expression of the run and its number of blocks
+    """
+    assert set(fields) == set(_RACING_FIELDS), set(fields) ^ set(_RACING_FIELDS)
+    items: List[str] = []
+    constants: List[object] = []
+    blocks = 0
+
+    def close_block():
+        nonlocal blocks
+        if constants:
+            name = f"_BLOCK_{len(namespace)}"
+            namespace[name] = FieldBlock(constants)
+            items.append(name)
+            constants.clear()
+            blocks += 1
+
+    for name in _RACING_FIELDS:
+        value = fields[name]
+        if isinstance(value, Const):
+            constants.append(value.value)
+        else:
+            close_block()
+            items.append(value)
+    close_block()
+    return "(\n        " + ",\n        ".join(items) + ",\n    )", blocks
+
+
+def _generate(name: str, body: str, var: str, statements: str,
+              fields: Dict[str, object], attrs: List[Tuple[str, str]],
+              namespace: Dict[str, object]) -> str:
+    """
+    Generate the source of one specialized translator.
+
+    Args:
+        name: Function name
+        body: Local name of the bet body
+        var: BetVar attribute holding the bet body
+        statements: Family statements computing the field locals
+        fields: Field name -> expression source or Const
+        attrs: m_* attribute -> expression source
+        namespace: Globals shared by the generated functions, receives
+            the field blocks
+
+    Returns:
+        str: Function source
+    """
+    run, blocks = _render_run(fields, namespace)
+    source = (
+        f"def {name}(self, pMlog, msg):\n"
+        + _PROLOGUE.format(body=body, var=var)
+        + statements
+        + "".join(f"    self.{attr} = {value}\n" for attr, value in attrs)
+        + f"    self.record.extend_run({run}, {blocks})\n"
+        + "    return self.buf\n"
+    )
+    GENERATED_SOURCE[name] = source
+    return source
+
+
+def _deferred(table, key, name: str, source: str,
+              namespace: Dict[str, object]) -> SpecializedTranslator:
+    """
+    Get a stand-in that compiles a generated translator on first use.
+
+    Compiling every family costs tens of milliseconds, which only the bet
+    types a process actually translates should pay. The stand-in replaces
+    itself in table with the compiled function.
+
+    Args:
+        table: Dispatch table holding the stand-in
+        key: Key of the stand-in in table
+        name: Function name
+        source: Function source
+        namespace: Globals shared by the generated functions
+
+    Returns:
+        SpecializedTranslator: Stand-in translator
+    """
+    def compile_and_translate(self, pMlog, msg) -> Optional[str]:
+        exec(compile(source, f"<specialized {name}>", "exec"), namespace)
+        translate = table[key] = namespace[name]
+        return translate(self, pMlog, msg)
+
+    return compile_and_translate
+
+
+# Generated function name -> source, for inspection
+GENERATED_SOURCE: Dict[str, str] = {}
+
+
+def _build() -> Dict[int, SpecializedTranslator]:
+    """Generate the translators of every family."""
+    namespace: Dict[str, object] = {
+        "_floor": math.floor,
+        "_HEX_BYTE": _HEX_BYTE,
+        "_clamp32": _clamp32,
+        "_BET_TYPE_NAMES": BET_TYPE_NAMES,
+        "_FORMULA_NAMES": FORMULA_NAMES,
+        "_allup_selection": _allup_selection,
+    }
+    translators: Dict[int, SpecializedTranslator] = {}
+
+    for family, bet_types in BET_FAMILIES.items():
+        if family == "allup":
+            continue
+        for bet_type in bet_types:
+            statements, fields, attrs = _standard_body(family, bet_type)
+            name = f"_translate_{family}_{BET_TYPE_NAMES[bet_type].lower().replace('-', '')}"
+            source = _generate(name, "es", "es", statements, fields, attrs, namespace)
+            translators[bet_type] = _deferred(translators, bet_type, name, source, namespace)
+
+    by_events: List[SpecializedTranslator] = []
+    for events in range(_ALLUP_EVENTS + 1):
+        name = f"_translate_allup_{events}"
+        source = _generate(name, "allup", "a", *_allup_body(events), namespace)
+        by_events.append(_deferred(by_events, events, name, source, namespace))
+
+    def translate_allup(self, pMlog, msg) -> Optional[str]:
+        """Dispatch an allup bet on its event count."""
+        allup = pMlog.data.bt_rac.d.var.a
+        if allup is None or not 0 <= allup.evtbu <= _ALLUP_EVENTS:
+            return None
+        return by_events[allup.evtbu](self, pMlog, msg)
+
+    translators[BETTYP_AUP] = translate_allup
+    return translators
+
+
+# Bet type -> specialized translator
+SPECIALIZED_TRANSLATORS: Dict[int, SpecializedTranslator] = _build()
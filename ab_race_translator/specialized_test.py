@@ -0,0 +1,120 @@
+import pytest
+
+import random
+from dataclasses import replace
+
+from ab_race_translator.ab_race import ABRace
+from ab_race_translator.bench.corpus import build_corpus, build_racing_logs, encode_racing_message
+from ab_race_translator.constants import *
+from ab_race_translator.data_structures import (BetAup, BetAupSel, BetExBnk, BetExoStd, BetFlexiCombo,
+                                                BetInd, BetInvestCombo, BetVar, Msg, StructParser)
+from ab_race_translator.specialized import (BET_FAMILIES, GENERATED_SOURCE,
+                                            SPECIALIZED_TRANSLATORS)
+
+_ALL_BET_TYPES = sorted({bet_type for bet_types in BET_FAMILIES.values() for bet_type in bet_types}
+                        | {BETTYP_DQN, BETTYP_TTR, BETTYP_MK6, BETTYP_SB, 99})
+
+# Racing attributes set by the generic path
+_ATTRS = [name for name in vars(ABRace(specialized=False)) if name.startswith("m_")]
+
+
+def _ind(flags):
+    return BetInd(*((flags >> bit) & 1 for bit in range(6)))
+
+
+def _random_logs(count, seed):
+    """Racing structures of every bet type with random bodies, flags and flexi combinations."""
+    rnd = random.Random(seed)
+    logs = []
+    for i in range(count):
+        bet_type = rnd.choice(_ALL_BET_TYPES)
+        md = rnd.choice([20240615, 20240615, 2024])
+        if bet_type == BETTYP_AUP:
+            sels = [BetAupSel(racebu=leg + 1,
+                              bettypebu=rnd.choice([BETTYP_WIN, BETTYP_QIN, BETTYP_TRIO, BETTYP_FCT,
+                                                    BETTYP_IWN, BETTYP_DBL, 99]),
+                              ind=_ind(rnd.randrange(64)), pid=[0], fdsz=rnd.choice([0, 14, 70]),
+                              sellu=[rnd.getrandbits(16) & ~1,
+                                     rnd.getrandbits(rnd.choice([16, 20])) & ~1],
+                              comwu=rnd.randrange(100), pftrlu=rnd.randrange(1000))
+                    for leg in range(6)]
+            var = BetVar(a=BetAup(loc=1, day=2, md=md, evtbu=rnd.randrange(8),
+                                  fmlbu=rnd.randrange(70), sel=sels))
+        else:
+            var = BetVar(es=BetExoStd(
+                loc=rnd.randrange(4), day=3, md=md, racebu=rnd.randrange(1, 12),
+                ind=_ind(rnd.randrange(64)), pid=[1] * 6,
+                fdsz=[rnd.choice([0, 14, 20, 70]) for _ in range(6)],
+                sellu=[rnd.getrandbits(rnd.choice([15, 15, 40, 64])) for _ in range(6)],
+                betexbnk=BetExBnk(bnkbu=[rnd.randrange(3) for _ in range(3)])))
+        flexi = rnd.random() < 0.3
+        baseinv = rnd.randrange(50) if flexi else rnd.randrange(2000)
+        buf = encode_racing_message(bet_type, cost=rnd.randrange(10 ** 7), body=bytes(16),
+                                    timelu=1718400000 + i)
+        if i % 41 == 0:
+            buf = buf[:60]
+        msg = Msg(buf, 0, 1, "AB", 1718400000 + i, 15, 6, 2024,
+                  1718400000 + 2 * i if i % 3 else 0, LOGAB_CODE_RAC)
+        pMlog = StructParser.parse_logab_from_msg(msg)
+        bet_data = pMlog.data.bt_rac.d
+        if i % 41:
+            bet_data.var = var
+            bet_data.hdr.betinvcomb = BetInvestCombo(
+                flexi=BetFlexiCombo(baseinv=baseinv, flexibet=int(flexi)))
+        logs.append((pMlog, msg))
+    return logs
+
+
+def _translate(translator, logs):
+    """Translate structures, capturing output, typed fields and racing attributes."""
+    out = []
+    for order_no, (pMlog, msg) in enumerate(logs, start=1):
+        translator.m_iLoggerMsgOrderNo = order_no
+        result = translator.translate_logab(pMlog, msg)
+        out.append((result, list(translator.record.fields),
+                    {name: getattr(translator, name) for name in _ATTRS}))
+    return out
+
+
+def test_every_family_has_generated_translators():
+    for bet_types in BET_FAMILIES.values():
+        for bet_type in bet_types:
+            assert bet_type in SPECIALIZED_TRANSLATORS
+    assert BETTYP_MK6 not in SPECIALIZED_TRANSLATORS
+    assert "_translate_allup_6" in GENERATED_SOURCE
+    assert ABRace()._specialized is SPECIALIZED_TRANSLATORS
+    assert ABRace(specialized=False)._specialized is None
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_matches_generic_translation(seed):
+    logs = (_random_logs(1500, seed) + build_racing_logs(500, seed=seed)
+            + [(StructParser.parse_logab_from_msg(msg), msg) for msg in build_corpus(50, seed=seed)])
+
+    assert _translate(ABRace(), logs) == _translate(ABRace(specialized=False), logs)
+
+
+def test_unusual_structures_fall_back_to_generic_path():
+    pMlog, msg = build_racing_logs(1, seed=5)[0]
+    es = pMlog.data.bt_rac.d.var.es
+    shapes = [
+        replace(es, sellu=es.sellu[:3]),
+        replace(es, fdsz=14),
+        replace(es, betexbnk=replace(es.betexbnk, bnkbu=None)),
+    ]
+    for bet_type in (BETTYP_WIN, BETTYP_QIN, BETTYP_TCE, BETTYP_DBL):
+        for shape in shapes:
+            pMlog.data.bt_rac.d.hdr.bettypebu = bet_type
+            pMlog.data.bt_rac.d.var.es = shape
+            expected = ABRace(specialized=False).translate_logab(pMlog, msg)
+            assert ABRace().translate_logab(pMlog, msg) == expected
+
+
+def test_subclass_overrides_keep_generic_path():
+    class CustomRace(ABRace):
+        def get_bet_type(self, bet_type):
+            return "CUSTOM"
+
+    translator = CustomRace()
+    assert translator._specialized is None
+    assert "CUSTOM" in translator.translate_action(build_corpus(1, seed=1)[0])
@@ -0,0 +1,415 @@
+"""
+Logger Tape Reader
+
+Memory-maps a logger tape and frames the LOGAB records it contains using
+the sizew field of each LOGAB header. Records are yielded as zero-copy
+memoryview slices of the mapping together with the metadata needed to
+build a Msg, so multi-GB tapes can be translated without per-record reads
+or buffer copies.
+
+The offset of the message time within a record is not confirmed (see
+LOGAB_HDR), so a record only carries a time when the reader is given the
+byte offset of a 32-bit epoch seconds field as time_offset; otherwise its
+time is 0.
+"""
+
+import mmap
+import os
+import struct
+import time
+from array import array
+from datetime import datetime, tzinfo
+from typing import Iterator, Optional, Tuple, Union
+
+from .data_structures import Buffer, Msg
+from .layouts import LOGAB_HDR
+
+# LOGAB_HDR sizew, codewu and errorwu: the fields framing reads, and the
+# smallest valid record
+_FRAME = struct.Struct(LOGAB_HDR.byte_order + "HHH")
+_FRAME_SIZE = _FRAME.size
+_FRAME_UNPACK = _FRAME.unpack_from
+assert _FRAME_SIZE == LOGAB_HDR.field_offset("trapcodebu")
+# LOGAB_HDR.sizew, the leading field of every record
+_SIZEW_UNPACK = struct.Struct(LOGAB_HDR.byte_order + "H").unpack_from
+# Message time at a configured time_offset
+_TIME = struct.Struct(LOGAB_HDR.byte_order + "I")
+_TIME_SIZE = _TIME.size
+_TIME_UNPACK = _TIME.unpack_from
+
+
+class TapeRecord:
+    """
+    One framed LOGAB record of a tape.
+
+    buf is a zero-copy view into the tape mapping and is only valid while
+    the owning TapeReader is open.
+    """
+
+    __slots__ = ("offset", "size", "codewu", "errorwu", "timelu", "buf")
+
+    def __init__(self, offset: int, size: int, codewu: int, errorwu: int,
+                 timelu: int, buf: memoryview):
+        """
+        Initialize the record.
+
+        Args:
+            offset: Byte offset of the record in the tape
+            size: Record size in bytes (LOGAB header sizew)
+            codewu: Message code
+            errorwu: Header error code
+            timelu: Message time (epoch seconds), 0 if not read
+            buf: Record bytes
+        """
+        self.offset = offset
+        self.size = size
+        self.codewu = codewu
+        self.errorwu = errorwu
+        self.timelu = timelu
+        self.buf = buf
+
+    @property
+    def end_offset(self) -> int:
+        """int: Byte offset of the next record."""
+        return self.offset + self.size
+
+    def __repr__(self) -> str:
+        return (f"TapeRecord(offset={self.offset}, size={self.size}, "
+                f"codewu={self.codewu}, timelu={self.timelu})")
+
+
+class _MsgDates:
+    """
+    (day, month, year) of message times in a timezone.
+
+    Consecutive records mostly share their time, so the last lookup is cached.
+    """
+
+    __slots__ = ("tz", "_cache")
+
+    def __init__(self, tz: Optional[tzinfo] = None):
+        """
+        Initialize the lookup.
+
+        Args:
+            tz: Timezone of the dates, None for local time
+        """
+        self.tz = tz
+        self._cache: Tuple[int, Tuple[int, int, int]] = (-1, (0, 0, 0))
+
+    def __call__(self, timelu: int) -> Tuple[int, int, int]:
+        """
+        Get the date of a message time.
+
+        Args:
+            timelu: Message time (epoch seconds)
+
+        Returns:
+            Tuple[int, int, int]: Day, month and year in tz
+        """
+        cached_time, cached_date = self._cache
+        if timelu == cached_time:
+            return cached_date
+        if self.tz is None:
+            tm = time.localtime(timelu)
+            date = (tm.tm_mday, tm.tm_mon, tm.tm_year)
+        else:
+            dt = datetime.fromtimestamp(timelu, self.tz)
+            date = (dt.day, dt.month, dt.year)
+        self._cache = (timelu, date)
+        return date
+
+
+def _check_time_offset(time_offset: Optional[int]) -> Optional[int]:
+    """Validate a time_offset argument."""
+    if time_offset is not None and time_offset < 0:
+        raise ValueError(f"Invalid time offset {time_offset}")
+    return time_offset
+
+
+def _frame_record(buf: Buffer, offset: int, end: int,
+                  time_offset: Optional[int] = None) -> Optional[TapeRecord]:
+    """
+    Frame the record starting at a byte offset by its LOGAB header sizew.
+
+    Shared by TapeReader and the streaming service's MessageFramer, so tapes
+    and streams are framed the same way. The record buffer is a slice of
+    buf: a zero-copy view for a memoryview, a copy for bytes or bytearray.
+
+    Args:
+        buf: Buffer holding back-to-back records
+        offset: Byte offset of the record
+        end: End of the valid data in buf
+        time_offset: Offset of the message time within the record, None
+            to leave the time 0
+
+    Returns:
+        Optional[TapeRecord]: Framed record, None if the data ends inside
+            its framing fields or body
+
+    Raises:
+        ValueError: If sizew is smaller than the framing fields
+    """
+    if offset + _FRAME_SIZE > end:
+        return None
+    size, code, error = _FRAME_UNPACK(buf, offset)
+    if size < _FRAME_SIZE:
+        raise ValueError(f"Invalid record size {size}")
+    if offset + size > end:
+        return None
+    timelu = 0
+    if time_offset is not None and time_offset + _TIME_SIZE <= size:
+        timelu = _TIME_UNPACK(buf, offset + time_offset)[0]
+    return TapeRecord(offset, size, code, error, timelu, buf[offset:offset + size])
+
+
+def _record_msg(record: TapeRecord, sys_no: int, sys_name: str, msg_date: _MsgDates) -> Msg:
+    """
+    Build a translator message from a record.
+
+    Args:
+        record: Framed record
+        sys_no: System number reported in the Msg
+        sys_name: System name reported in the Msg
+        msg_date: Date lookup of message times
+
+    Returns:
+        Msg: Message whose buffer is the record buffer
+    """
+    day, month, year = msg_date(record.timelu)
+    return Msg(
+        m_cpBuf=record.buf,
+        m_iMsgErrwu=0,
+        m_iSysNo=sys_no,
+        m_iSysName=sys_name,
+        m_iMsgTime=record.timelu,
+        m_iMsgDay=day,
+        m_iMsgMonth=month,
+        m_iMsgYear=year,
+        m_iMsgCode=record.codewu
+    )
+
+
+class TapeReader:
+    """
+    Streaming reader over a memory-mapped logger tape.
+
+    Records are framed back to back by their LOGAB header sizew. A trailing
+    record that extends past the end of the tape (e.g. a tape still being
+    written) stops iteration; its offset and length are exposed through
+    truncated_offset and trailing_bytes. Zero padding after the last record
+    is treated the same way. Use strict=True to raise instead.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"], sys_no: int = 1,
+                 sys_name: str = "AB", strict: bool = False,
+                 time_offset: Optional[int] = None, tz: Optional[tzinfo] = None):
+        """
+        Open and map the tape.
+
+        Args:
+            path: Tape file path
+            sys_no: System number reported in each Msg
+            sys_name: System name reported in each Msg
+            strict: Raise ValueError on truncated trailing data
+            time_offset: Byte offset of the message time (32-bit epoch
+                seconds) within each record, None to report time 0
+            tz: Timezone of the message dates, None for local time
+        """
+        self.path = os.fspath(path)
+        self.sys_no = sys_no
+        self.sys_name = sys_name
+        self.strict = strict
+        self.time_offset = _check_time_offset(time_offset)
+        self.truncated_offset: Optional[int] = None
+        self.trailing_bytes = 0
+
+        self._file = open(self.path, "rb")
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            if self.size:
+                self._mmap: Optional[mmap.mmap] = mmap.mmap(
+                    self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+            else:
+                # Empty files cannot be mapped
+                self._mmap = None
+                self._view = memoryview(b"")
+        except BaseException:
+            self._file.close()
+            raise
+
+        self._msg_date = _MsgDates(tz)
+
+    @property
+    def buffer(self) -> memoryview:
+        """memoryview: Read-only view of the whole tape."""
+        return self._view
+
+    def _truncated(self, offset: int) -> None:
+        """Record trailing data that does not form a complete record."""
+        self.truncated_offset = offset
+        self.trailing_bytes = self.size - offset
+        if self.strict:
+            raise ValueError(
+                f"Truncated record at offset {offset} of {self.path} "
+                f"({self.trailing_bytes} trailing bytes)")
+
+    def record_at(self, offset: int) -> TapeRecord:
+        """
+        Frame the record starting at a byte offset.
+
+        Args:
+            offset: Byte offset of the record
+
+        Returns:
+            TapeRecord: Framed record
+
+        Raises:
+            ValueError: If no complete record starts at the offset
+        """
+        if offset < 0:
+            raise ValueError(f"No complete record at offset {offset}")
+        try:
+            record = _frame_record(self._view, offset, self.size, self.time_offset)
+        except ValueError as e:
+            raise ValueError(f"{e} at offset {offset}") from None
+        if record is None:
+            raise ValueError(f"No complete record at offset {offset}")
+        return record
+
+    def records(self, start_offset: int = 0, end_offset: Optional[int] = None) -> Iterator[TapeRecord]:
+        """
+        Iterate over the records of the tape.
+
+        Args:
+            start_offset: Byte offset of the first record to yield
+            end_offset: Stop before the record starting at or after this offset
+
+        Yields:
+            TapeRecord: Framed records in tape order
+        """
+        view = self._view
+        tape_size = self.size
+        time_offset = self.time_offset
+        stop = tape_size if end_offset is None else min(end_offset, tape_size)
+        offset = start_offset
+
+        while offset < stop:
+            try:
+                record = _frame_record(view, offset, tape_size, time_offset)
+            except ValueError as e:
+                if _SIZEW_UNPACK(view, offset)[0] == 0:
+                    # Zero padding after the last record
+                    self._truncated(offset)
+                    return
+                raise ValueError(f"{e} at offset {offset} of {self.path}") from None
+            if record is None:
+                self._truncated(offset)
+                return
+
+            yield record
+            offset = record.end_offset
+
+    def frame_offsets(self, start_offset: int = 0,
+                      end_offset: Optional[int] = None) -> Tuple[array, array]:
+        """
+        Frame the tape without building record objects.
+
+        Only the sizew field of each header is read, so this is the cheap
+        first pass for columnar decoders that gather fixed-offset fields of
+        every record at once. Framing and truncation handling are the same
+        as records().
+
+        Args:
+            start_offset: Byte offset of the first record
+            end_offset: Stop before the record starting at or after this offset
+
+        Returns:
+            Tuple[array, array]: Record offsets ('q') and sizes ('l') in tape order
+        """
+        view = self._view
+        tape_size = self.size
+        stop = tape_size if end_offset is None else min(end_offset, tape_size)
+        offsets = array("q")
+        sizes = array("l")
+        add_offset = offsets.append
+        add_size = sizes.append
+        offset = start_offset
+
+        while offset < stop:
+            if offset + _FRAME_SIZE > tape_size:
+                self._truncated(offset)
+                break
+
+            size = _SIZEW_UNPACK(view, offset)[0]
+            if size == 0:
+                # Zero padding after the last record
+                self._truncated(offset)
+                break
+            if size < _FRAME_SIZE:
+                raise ValueError(
+                    f"Invalid record size {size} at offset {offset} of {self.path}")
+            if offset + size > tape_size:
+                self._truncated(offset)
+                break
+
+            add_offset(offset)
+            add_size(size)
+            offset += size
+
+        return offsets, sizes
+
+    def __iter__(self) -> Iterator[TapeRecord]:
+        return self.records()
+
+    def to_msg(self, record: TapeRecord) -> Msg:
+        """
+        Build a translator message from a record.
+
+        Args:
+            record: Framed record
+
+        Returns:
+            Msg: Message whose buffer is the record view
+        """
+        return _record_msg(record, self.sys_no, self.sys_name, self._msg_date)
+
+    def messages(self, start_offset: int = 0, end_offset: Optional[int] = None) -> Iterator[Msg]:
+        """
+        Iterate over the records of the tape as translator messages.
+
+        Args:
+            start_offset: Byte offset of the first record to yield
+            end_offset: Stop before the record starting at or after this offset
+
+        Yields:
+            Msg: Messages in tape order
+        """
+        to_msg = self.to_msg
+        for record in self.records(start_offset, end_offset):
+            yield to_msg(record)
+
+    def close(self):
+        """
+        Unmap and close the tape.
+
+        If record views are still referenced the mapping stays alive until
+        the last of them is released; record views must not be used after
+        close() either way.
+        """
+        self._view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Unmapped when the last exported view is garbage collected
+                pass
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "TapeReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
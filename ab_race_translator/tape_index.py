@@ -0,0 +1,556 @@
+"""
+Tape Index
+
+Sidecar index for random access into a logger tape. Building the index
+frames the tape once and records, for every record, its offset and size
+plus the fields most queries filter on: message code, message time, bet
+type, account and terminal. A sparse time index holds the
+minimum and maximum message time of each block of records, so time range
+queries binary search to the candidate blocks instead of scanning the
+tape, and the translator seeks straight to the matching records. Message
+times are read at the time_offset of the tape (see TapeReader); an index
+built without one answers every query but time ranges:
+
+    index = TapeIndex.for_tape("sys1.tape", time_offset=TIME_OFFSET)
+    with TapeReader("sys1.tape", time_offset=TIME_OFFSET) as reader:
+        for result in index.translate(reader, translator,
+                                      start_time=t0, end_time=t1,
+                                      bet_types=BETTYP_QTT):
+            ...
+
+The sidecar file is a fixed header followed by one little-endian column per
+indexed field and the two columns of the sparse time index, so loading it
+is a handful of array reads.
+"""
+
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .constants import *
+from .data_structures import Msg
+from .layouts import BETHDR, LOGAB_HDR, RAC_BETHDR_OFFSET
+from .tape import (
+    _FRAME_UNPACK, _TIME_SIZE, _TIME_UNPACK, TapeReader, TapeRecord, _check_time_offset,
+)
+
+# Sidecar file name suffix appended to the tape path
+INDEX_SUFFIX = ".idx"
+
+# Records per block of the sparse time index
+DEFAULT_BLOCK_SIZE = 1024
+
+_MAGIC = b"ABTIDX\0\0"
+_VERSION = 3
+
+# magic, version, block size, record count, block count, tape size,
+# tape mtime (ns), end of the last indexed record, time offset (-1 for none)
+_FILE_HDR = struct.Struct("<8sHIQQQqQi")
+
+# (column name, array typecode) of every indexed field, in file order
+INDEX_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("offset", "Q"),
+    ("size", "H"),
+    ("codewu", "H"),
+    ("timelu", "I"),
+    ("bettypebu", "I"),
+    ("acclu", "I"),
+    ("ltnlu", "I"),
+)
+
+# Sparse time index columns, one value per block
+_BLOCK_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("block_min", "I"),
+    ("block_max", "I"),
+)
+
+_HDR_SIZE = LOGAB_HDR.size
+_HDR_UNPACK = LOGAB_HDR.unpack_from
+_CODE_INDEX = LOGAB_HDR.field_index("codewu")
+_ACC_INDEX = LOGAB_HDR.field_index("acclu")
+_LTN_INDEX = LOGAB_HDR.field_index("ltnlu")
+
+# BETHDR.bettypebu of a LOGAB_RAC record
+_BETTYPE_OFFSET = RAC_BETHDR_OFFSET + BETHDR.field_offset("bettypebu")
+_BETTYPE_END = _BETTYPE_OFFSET + 4
+_BETTYPE_UNPACK = struct.Struct(BETHDR.byte_order + "I").unpack_from
+
+_SWAP = sys.byteorder != "little"
+
+Filter = Union[None, int, Iterable[int]]
+
+
+class IndexEntry(NamedTuple):
+    """Indexed fields of one tape record."""
+    index: int       # position of the record in the tape
+    offset: int      # byte offset of the record
+    size: int        # record size in bytes
+    codewu: int      # message code
+    timelu: int      # message time (epoch seconds), 0 without a time offset
+    bettypebu: int   # bet type, 0 for non-racing records
+    acclu: int       # account number
+    ltnlu: int       # logical terminal number
+
+
+def _as_set(values: Filter) -> Optional[frozenset]:
+    """Normalize a filter given as None, a single value or an iterable."""
+    if values is None:
+        return None
+    if isinstance(values, int):
+        return frozenset((values,))
+    return frozenset(values)
+
+
+def sidecar_path(tape_path: Union[str, "os.PathLike[str]"]) -> str:
+    """
+    Get the default sidecar path of a tape.
+
+    Args:
+        tape_path: Tape file path
+
+    Returns:
+        str: Tape path with INDEX_SUFFIX appended
+    """
+    return os.fspath(tape_path) + INDEX_SUFFIX
+
+
+class TapeIndex:
+    """
+    Per-record index of a logger tape.
+
+    Columns are stored as typed arrays, one value per record in tape order.
+    bettypebu is only decoded for LOGAB_RAC records long enough to contain
+    it and is 0 otherwise. timelu is read at time_offset, and is 0 when the
+    index has none. Tapes are assumed to be append-only:
+    update() indexes records written after the last indexed one.
+    """
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE,
+                 time_offset: Optional[int] = None):
+        """
+        Initialize an empty index.
+
+        Args:
+            block_size: Records per block of the sparse time index
+            time_offset: Byte offset of the message time within each
+                record, None for an index without times
+        """
+        if block_size < 1:
+            raise ValueError(f"Invalid block size {block_size}")
+        self.block_size = block_size
+        self.time_offset = _check_time_offset(time_offset)
+        self.columns: Dict[str, array] = {
+            name: array(code) for name, code in INDEX_COLUMNS + _BLOCK_COLUMNS}
+        self.tape_size = 0
+        self.tape_mtime_ns = 0
+        self.end_offset = 0
+        self._bounds: Optional[Tuple[List[int], List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.columns["offset"])
+
+    @classmethod
+    def build(cls, reader: TapeReader,
+              block_size: int = DEFAULT_BLOCK_SIZE) -> "TapeIndex":
+        """
+        Index every record of a tape in one pass.
+
+        Message times are read at the time_offset of the reader.
+
+        Args:
+            reader: Open tape reader
+            block_size: Records per block of the sparse time index
+
+        Returns:
+            TapeIndex: Index of the tape
+        """
+        index = cls(block_size, reader.time_offset)
+        index.update(reader)
+        return index
+
+    def update(self, reader: TapeReader) -> int:
+        """
+        Index the records written since the last update.
+
+        A truncated trailing record is left for the next update.
+
+        Args:
+            reader: Open tape reader over the same tape, with the time
+                offset of the index
+
+        Returns:
+            int: Number of records added
+        """
+        if reader.size < self.end_offset:
+            raise ValueError(
+                f"Tape {reader.path} is shorter than its index "
+                f"({reader.size} < {self.end_offset} bytes)")
+        if reader.time_offset != self.time_offset:
+            raise ValueError(
+                f"Reader time offset {reader.time_offset} does not match the "
+                f"index time offset {self.time_offset}")
+
+        columns = self.columns
+        add_offset = columns["offset"].append
+        add_size = columns["size"].append
+        add_code = columns["codewu"].append
+        add_time = columns["timelu"].append
+        add_bettype = columns["bettypebu"].append
+        add_acc = columns["acclu"].append
+        add_ltn = columns["ltnlu"].append
+        view = reader.buffer
+        count = len(self)
+        time_offset = self.time_offset
+        time_end = None if time_offset is None else time_offset + _TIME_SIZE
+
+        offsets, sizes = reader.frame_offsets(self.end_offset)
+        for offset, size in zip(offsets, sizes):
+            if size >= _HDR_SIZE:
+                hdr = _HDR_UNPACK(view, offset)
+                code, acc, ltn = hdr[_CODE_INDEX], hdr[_ACC_INDEX], hdr[_LTN_INDEX]
+            else:
+                # Record shorter than the header: only the framing fields
+                code = _FRAME_UNPACK(view, offset)[1]
+                acc = ltn = 0
+            bettype = msg_time = 0
+            if code == LOGAB_CODE_RAC and size >= _BETTYPE_END:
+                bettype = _BETTYPE_UNPACK(view, offset + _BETTYPE_OFFSET)[0]
+            if time_end is not None and size >= time_end:
+                msg_time = _TIME_UNPACK(view, offset + time_offset)[0]
+
+            add_offset(offset)
+            add_size(size)
+            add_code(code)
+            add_time(msg_time)
+            add_bettype(bettype)
+            add_acc(acc)
+            add_ltn(ltn)
+
+        if offsets:
+            self.end_offset = offsets[-1] + sizes[-1]
+        self.tape_size = reader.size
+        self.tape_mtime_ns = os.stat(reader.path).st_mtime_ns
+        self._update_blocks(count)
+        return len(self) - count
+
+    def _update_blocks(self, start: int):
+        """
+        Recompute the sparse time index from the block holding a record on.
+
+        Args:
+            start: Position of the first new record
+        """
+        times = self.columns["timelu"]
+        block_min = self.columns["block_min"]
+        block_max = self.columns["block_max"]
+        size = self.block_size
+        first = start // size
+
+        del block_min[first:]
+        del block_max[first:]
+        for begin in range(first * size, len(times), size):
+            block = times[begin:begin + size]
+            block_min.append(min(block))
+            block_max.append(max(block))
+        self._bounds = None
+
+    def _block_bounds(self) -> Tuple[List[int], List[int]]:
+        """
+        Get the monotonic search keys of the sparse time index.
+
+        Returns:
+            Tuple[List[int], List[int]]: Running maximum of block_max from
+                the first block and running minimum of block_min from the
+                last block; both are non-decreasing even when message times
+                are not
+        """
+        if self._bounds is None:
+            running_max = []
+            high = 0
+            for value in self.columns["block_max"]:
+                high = max(high, value)
+                running_max.append(high)
+
+            running_min = []
+            low = None
+            for value in reversed(self.columns["block_min"]):
+                low = value if low is None else min(low, value)
+                running_min.append(low)
+            running_min.reverse()
+
+            self._bounds = (running_max, running_min)
+        return self._bounds
+
+    def _candidate_blocks(self, start_time: Optional[int],
+                          end_time: Optional[int]) -> range:
+        """
+        Find the blocks that may hold records in [start_time, end_time).
+
+        Args:
+            start_time: Earliest message time, None for unbounded
+            end_time: Message time upper bound (exclusive), None for unbounded
+
+        Returns:
+            range: Candidate block numbers
+        """
+        running_max, running_min = self._block_bounds()
+        first = 0 if start_time is None else bisect_left(running_max, start_time)
+        last = len(running_min) if end_time is None else bisect_left(running_min, end_time)
+        return range(first, last)
+
+    def entry(self, index: int) -> IndexEntry:
+        """
+        Get the indexed fields of one record.
+
+        Args:
+            index: Position of the record in the tape
+
+        Returns:
+            IndexEntry: Indexed fields
+        """
+        if index < 0:
+            index += len(self)
+        return IndexEntry(index, *(self.columns[name][index] for name, _ in INDEX_COLUMNS))
+
+    def query(self, start_time: Optional[int] = None, end_time: Optional[int] = None,
+              codes: Filter = None, bet_types: Filter = None,
+              accounts: Filter = None, terminals: Filter = None) -> Iterator[IndexEntry]:
+        """
+        Find the records matching every given filter.
+
+        Filters left as None match everything; the others take a single
+        value or an iterable of accepted values.
+
+        Args:
+            start_time: Earliest message time (epoch seconds, inclusive)
+            end_time: Latest message time (epoch seconds, exclusive)
+            codes: Message codes (codewu)
+            bet_types: Bet types (bettypebu), racing records only
+            accounts: Account numbers (acclu)
+            terminals: Logical terminal numbers (ltnlu)
+
+        Yields:
+            IndexEntry: Matching records in tape order
+
+        Raises:
+            ValueError: If a time range is given and the index has no times
+        """
+        if self.time_offset is None and (start_time is not None or end_time is not None):
+            raise ValueError("Time range queries need an index built with a time offset")
+        columns = self.columns
+        times = columns["timelu"]
+        filters = [(columns[name], accepted) for name, accepted in (
+            ("codewu", _as_set(codes)),
+            ("bettypebu", _as_set(bet_types)),
+            ("acclu", _as_set(accounts)),
+            ("ltnlu", _as_set(terminals)),
+        ) if accepted is not None]
+        entry = self.entry
+        block_min = columns["block_min"]
+        block_max = columns["block_max"]
+        size = self.block_size
+        count = len(self)
+
+        for block in self._candidate_blocks(start_time, end_time):
+            if start_time is not None and block_max[block] < start_time:
+                continue
+            if end_time is not None and block_min[block] >= end_time:
+                continue
+            for i in range(block * size, min(count, (block + 1) * size)):
+                msg_time = times[i]
+                if start_time is not None and msg_time < start_time:
+                    continue
+                if end_time is not None and msg_time >= end_time:
+                    continue
+                if all(column[i] in accepted for column, accepted in filters):
+                    yield entry(i)
+
+    def records(self, reader: TapeReader, **filters) -> Iterator[TapeRecord]:
+        """
+        Seek to the records matching a query.
+
+        Args:
+            reader: Open reader over the indexed tape
+            **filters: Query filters, see query()
+
+        Yields:
+            TapeRecord: Matching records in tape order
+        """
+        record_at = reader.record_at
+        for entry in self.query(**filters):
+            yield record_at(entry.offset)
+
+    def messages(self, reader: TapeReader, **filters) -> Iterator[Msg]:
+        """
+        Seek to the records matching a query as translator messages.
+
+        Args:
+            reader: Open reader over the indexed tape
+            **filters: Query filters, see query()
+
+        Yields:
+            Msg: Matching messages in tape order
+        """
+        to_msg = reader.to_msg
+        for record in self.records(reader, **filters):
+            yield to_msg(record)
+
+    def translate(self, reader: TapeReader, translator, start_order_no: int = 1,
+                  **filters) -> Iterator[str]:
+        """
+        Translate only the records matching a query.
+
+        Each record keeps the logger order number it has in a full-tape
+        translation (start_order_no plus its position in the tape), so the
+        output lines equal the corresponding lines of translating the whole
+        tape. Matches at consecutive tape positions are translated as one
+        translate_iter run numbered from the first of them.
+
+        Args:
+            reader: Open reader over the indexed tape
+            translator: ABRace instance, e.g. from create_ab_race()
+            start_order_no: Order number of the first record of the tape
+            **filters: Query filters, see query()
+
+        Yields:
+            str: Translation result of each matching record
+        """
+        record_at = reader.record_at
+        to_msg = reader.to_msg
+        matches = enumerate(self.query(**filters))
+        # Entries of a run of consecutive tape positions share index - match number
+        for _, run in groupby(matches, key=lambda match: match[1].index - match[0]):
+            first = next(run)[1]
+            msgs = (to_msg(record_at(entry.offset))
+                    for entry in (first, *(entry for _, entry in run)))
+            yield from translator.translate_iter(msgs, start_order_no + first.index)
+
+    def is_current(self, tape_path: Union[str, "os.PathLike[str]"]) -> bool:
+        """
+        Check whether the index still describes a tape file.
+
+        Args:
+            tape_path: Tape file path
+
+        Returns:
+            bool: True if the tape size and modification time are unchanged
+        """
+        st = os.stat(tape_path)
+        return st.st_size == self.tape_size and st.st_mtime_ns == self.tape_mtime_ns
+
+    def save(self, path: Union[str, "os.PathLike[str]"]):
+        """
+        Write the index to a sidecar file.
+
+        The file is written under a temporary name and renamed into place,
+        so readers never see a partial index.
+
+        Args:
+            path: Sidecar file path
+        """
+        path = os.fspath(path)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_FILE_HDR.pack(
+                _MAGIC, _VERSION, self.block_size, len(self),
+                len(self.columns["block_min"]), self.tape_size,
+                self.tape_mtime_ns, self.end_offset,
+                -1 if self.time_offset is None else self.time_offset))
+            for name, _ in INDEX_COLUMNS + _BLOCK_COLUMNS:
+                column = self.columns[name]
+                if _SWAP:
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, "os.PathLike[str]"]) -> "TapeIndex":
+        """
+        Read an index from a sidecar file.
+
+        Args:
+            path: Sidecar file path
+
+        Returns:
+            TapeIndex: Loaded index
+
+        Raises:
+            ValueError: If the file is not a valid tape index
+        """
+        with open(path, "rb") as f:
+            hdr = f.read(_FILE_HDR.size)
+            if len(hdr) != _FILE_HDR.size:
+                raise ValueError(f"Truncated tape index header in {os.fspath(path)}")
+            (magic, version, block_size, count, blocks,
+             tape_size, tape_mtime_ns, end_offset, time_offset) = _FILE_HDR.unpack(hdr)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"Not a version {_VERSION} tape index: {os.fspath(path)}")
+
+            index = cls(block_size, None if time_offset < 0 else time_offset)
+            index.tape_size = tape_size
+            index.tape_mtime_ns = tape_mtime_ns
+            index.end_offset = end_offset
+            try:
+                for name, _ in INDEX_COLUMNS:
+                    index.columns[name].fromfile(f, count)
+                for name, _ in _BLOCK_COLUMNS:
+                    index.columns[name].fromfile(f, blocks)
+            except EOFError:
+                raise ValueError(f"Truncated tape index {os.fspath(path)}") from None
+
+        if _SWAP:
+            for column in index.columns.values():
+                column.byteswap()
+        return index
+
+    @classmethod
+    def for_tape(cls, tape_path: Union[str, "os.PathLike[str]"],
+                 index_path: Optional[Union[str, "os.PathLike[str]"]] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE,
+                 save: bool = True,
+                 time_offset: Optional[int] = None) -> "TapeIndex":
+        """
+        Load the sidecar index of a tape, building or extending it as needed.
+
+        A missing or unreadable sidecar, or one built with another time
+        offset, is rebuilt. If the tape grew since the sidecar was written
+        only the new records are indexed.
+
+        Args:
+            tape_path: Tape file path
+            index_path: Sidecar path, defaults to sidecar_path(tape_path)
+            block_size: Records per block when the index is rebuilt
+            save: Write the sidecar back when it was built or extended
+            time_offset: Byte offset of the message time within each
+                record, see TapeReader
+
+        Returns:
+            TapeIndex: Current index of the tape
+        """
+        index_path = sidecar_path(tape_path) if index_path is None else os.fspath(index_path)
+
+        index = None
+        if os.path.exists(index_path):
+            try:
+                index = cls.load(index_path)
+            except ValueError:
+                index = None
+        if index is not None and index.time_offset != time_offset:
+            index = None
+        if index is not None and index.is_current(tape_path):
+            return index
+
+        with TapeReader(tape_path, time_offset=time_offset) as reader:
+            if index is None or reader.size < index.end_offset:
+                index = cls.build(reader, block_size)
+            else:
+                index.update(reader)
+
+        if save:
+            index.save(index_path)
+        return index
@@ -0,0 +1,124 @@
+import pytest
+
+import os
+import struct
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.bench.corpus import CORPUS_TIME_OFFSET, build_corpus
+from ab_race_translator.constants import BETTYP_QIN, BETTYP_WIN, LOGAB_CODE_RAC
+from ab_race_translator.tape import TapeReader
+from ab_race_translator.tape_index import TapeIndex, sidecar_path
+
+
+def _tape(tmp_path, msgs, times):
+    records = []
+    for msg, msg_time in zip(msgs, times):
+        record = bytearray(msg.m_cpBuf)
+        struct.pack_into("<I", record, CORPUS_TIME_OFFSET, msg_time)
+        records.append(bytes(record))
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(records))
+    return path
+
+
+@pytest.fixture
+def corpus_tape(tmp_path):
+    msgs = build_corpus(300, seed=7)
+    # Mostly increasing times with some records logged out of order
+    times = [1700000000 + i // 3 - (5 if i % 17 == 0 else 0) for i in range(len(msgs))]
+    return _tape(tmp_path, msgs, times), times
+
+
+def test_query_matches_full_scan(corpus_tape):
+    path, times = corpus_tape
+
+    with TapeReader(path, time_offset=CORPUS_TIME_OFFSET) as reader:
+        index = TapeIndex.build(reader, block_size=16)
+        records = list(reader)
+
+        assert len(index) == len(records)
+        assert [e.offset for e in index.query()] == [r.offset for r in records]
+
+        start, end = 1700000020, 1700000040
+        expected = [i for i, t in enumerate(times) if start <= t < end]
+        assert [e.index for e in index.query(start_time=start, end_time=end)] == expected
+
+        wins = [e for e in index.query(start_time=start, bet_types=BETTYP_WIN)]
+        assert wins and all(e.bettypebu == BETTYP_WIN and e.timelu >= start for e in wins)
+
+        both = {e.bettypebu for e in index.query(bet_types=[BETTYP_WIN, BETTYP_QIN],
+                                                 codes=LOGAB_CODE_RAC)}
+        assert both == {BETTYP_WIN, BETTYP_QIN}
+
+
+def test_translate_matches_full_tape_lines(corpus_tape):
+    path, times = corpus_tape
+
+    with TapeReader(path, time_offset=CORPUS_TIME_OFFSET) as reader:
+        full = list(create_ab_race().translate_iter(reader.messages(), start_order_no=1))
+        index = TapeIndex.build(reader, block_size=32)
+        entries = list(index.query(start_time=1700000050, end_time=1700000060))
+        results = list(index.translate(reader, create_ab_race(),
+                                       start_time=1700000050, end_time=1700000060))
+        # Scattered matches keep their full-tape order numbers too
+        wins = list(index.query(bet_types=[BETTYP_WIN]))
+        win_results = list(index.translate(reader, create_ab_race(), bet_types=[BETTYP_WIN]))
+
+    assert results == [full[e.index] for e in entries]
+    assert len({e.index - i for i, e in enumerate(wins)}) > 1
+    assert win_results == [full[e.index] for e in wins]
+
+
+def test_sidecar_round_trip_and_update(corpus_tape):
+    path, times = corpus_tape
+    data = path.read_bytes()
+    with TapeReader(path) as reader:
+        sizes = [r.size for r in reader]
+    half = sum(sizes[:150])
+
+    path.write_bytes(data[:half] + data[half:half + 20])
+    index = TapeIndex.for_tape(path, block_size=64, time_offset=CORPUS_TIME_OFFSET)
+    assert len(index) == 150
+    assert os.path.exists(sidecar_path(path))
+
+    loaded = TapeIndex.load(sidecar_path(path))
+    assert loaded.columns == index.columns
+    assert loaded.time_offset == CORPUS_TIME_OFFSET
+    assert loaded.is_current(path)
+
+    path.write_bytes(data)
+    os.utime(path, ns=(0, 0))
+    grown = TapeIndex.for_tape(path, time_offset=CORPUS_TIME_OFFSET)
+    assert len(grown) == len(times)
+    assert list(grown.columns["timelu"]) == times
+    assert list(grown.columns["block_min"]) == [
+        min(times[i:i + 64]) for i in range(0, len(times), 64)]
+
+
+def test_load_rejects_foreign_file(tmp_path):
+    path = tmp_path / "bogus.idx"
+    path.write_bytes(b"not an index" * 10)
+
+    with pytest.raises(ValueError):
+        TapeIndex.load(path)
+
+
+def test_index_without_time_offset(corpus_tape):
+    path, _ = corpus_tape
+
+    index = TapeIndex.for_tape(path)
+    assert index.time_offset is None
+    assert set(index.columns["timelu"]) == {0}
+    assert TapeIndex.load(sidecar_path(path)).time_offset is None
+    assert len(list(index.query(bet_types=BETTYP_WIN))) > 0
+    with pytest.raises(ValueError):
+        next(index.query(start_time=1700000000))
+
+    with TapeReader(path, time_offset=CORPUS_TIME_OFFSET) as reader:
+        with pytest.raises(ValueError):
+            index.update(reader)
+
+    # A sidecar built with another time offset is rebuilt
+    timed = TapeIndex.for_tape(path, time_offset=CORPUS_TIME_OFFSET)
+    assert timed.time_offset == CORPUS_TIME_OFFSET
+    assert min(timed.columns["timelu"]) > 0
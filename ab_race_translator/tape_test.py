@@ -0,0 +1,167 @@
+import pytest
+
+import io
+import struct
+import time
+from datetime import timedelta, timezone
+
+from ab_race_translator import create_ab_race
+from ab_race_translator.constants import LOGAB_CODE_RAC
+from ab_race_translator.layouts import LOGAB_HDR
+from ab_race_translator.tape import TapeReader
+
+
+# Message time offset of the test tapes
+TIME_OFFSET = LOGAB_HDR.size
+
+
+def _record(size, code, msg_time, ltn=0):
+    record = bytearray(max(size, TIME_OFFSET + 4))
+    LOGAB_HDR.struct.pack_into(record, 0, size, code, 0, 0, 0, ltn, 0, 0, 0, 0, 0)
+    struct.pack_into("<I", record, TIME_OFFSET, msg_time)
+    return bytes(record[:size])
+
+
+@pytest.fixture
+def tape(tmp_path):
+    records = [
+        _record(120, LOGAB_CODE_RAC, 1700000000, ltn=1),
+        _record(46, 1, 1700000001, ltn=2),
+        _record(200, LOGAB_CODE_RAC, 1700000002, ltn=3),
+    ]
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(records))
+    return path, records
+
+
+def test_frames_records_by_sizew(tape):
+    path, records = tape
+
+    with TapeReader(path, time_offset=TIME_OFFSET) as reader:
+        framed = [(r.offset, r.size, r.codewu, r.timelu, bytes(r.buf)) for r in reader]
+
+    assert [f[0] for f in framed] == [0, 120, 166]
+    assert [f[1] for f in framed] == [120, 46, 200]
+    assert [f[2] for f in framed] == [LOGAB_CODE_RAC, 1, LOGAB_CODE_RAC]
+    assert [f[3] for f in framed] == [1700000000, 1700000001, 1700000002]
+    assert [f[4] for f in framed] == records
+
+
+def test_time_is_not_read_without_offset(tape):
+    path, _ = tape
+
+    with TapeReader(path) as reader:
+        assert [r.timelu for r in reader] == [0, 0, 0]
+        assert [msg.m_iMsgTime for msg in reader.messages()] == [0, 0, 0]
+
+    with pytest.raises(ValueError):
+        TapeReader(path, time_offset=-1)
+
+
+def test_frames_records_shorter_than_the_header(tmp_path):
+    records = [_record(6, 1, 0), _record(20, 2, 0), _record(36, 3, 1700000000)]
+    path = tmp_path / "short.tape"
+    path.write_bytes(b"".join(records))
+
+    with TapeReader(path, strict=True, time_offset=TIME_OFFSET) as reader:
+        framed = [(r.size, r.codewu, r.timelu) for r in reader]
+        offsets, sizes = reader.frame_offsets()
+
+    # Records too short to hold the time field report time 0
+    assert framed == [(6, 1, 0), (20, 2, 0), (36, 3, 1700000000)]
+    assert list(offsets) == [0, 6, 26]
+    assert list(sizes) == [6, 20, 36]
+
+
+def test_truncated_trailing_record(tape):
+    path, records = tape
+    path.write_bytes(b"".join(records) + records[0][:70])
+
+    with TapeReader(path) as reader:
+        assert len(list(reader)) == 3
+        assert reader.truncated_offset == 366
+        assert reader.trailing_bytes == 70
+
+    with TapeReader(path, strict=True) as reader:
+        with pytest.raises(ValueError):
+            list(reader)
+
+
+def test_messages_carry_metadata_and_translate(tape):
+    path, records = tape
+
+    with TapeReader(path, sys_no=3, sys_name="AB3", time_offset=TIME_OFFSET) as reader:
+        msgs = list(reader.messages())
+        tm = time.localtime(1700000002)
+
+        assert isinstance(msgs[2].m_cpBuf, memoryview)
+        assert msgs[2].m_iSysNo == 3
+        assert msgs[2].m_iMsgTime == 1700000002
+        assert (msgs[2].m_iMsgDay, msgs[2].m_iMsgMonth, msgs[2].m_iMsgYear) == (
+            tm.tm_mday, tm.tm_mon, tm.tm_year)
+
+        result = create_ab_race().translate_action(msgs[2])
+        assert result.split("@|@")[1].startswith("AB3~|~")
+
+
+def test_message_dates_in_timezone(tape):
+    path, _ = tape
+
+    # 1700000000 is 22:13:20 UTC on 14-Nov-2023, already 15-Nov at UTC+8
+    with TapeReader(path, time_offset=TIME_OFFSET, tz=timezone.utc) as reader:
+        msg = next(reader.messages())
+        assert (msg.m_iMsgDay, msg.m_iMsgMonth, msg.m_iMsgYear) == (14, 11, 2023)
+
+    with TapeReader(path, time_offset=TIME_OFFSET, tz=timezone(timedelta(hours=8))) as reader:
+        msg = next(reader.messages())
+        assert (msg.m_iMsgDay, msg.m_iMsgMonth, msg.m_iMsgYear) == (15, 11, 2023)
+
+
+def test_seek_to_record_offset(tape):
+    path, records = tape
+
+    with TapeReader(path) as reader:
+        record = reader.record_at(120)
+        assert record.size == 46
+        assert [r.offset for r in reader.records(start_offset=120)] == [120, 166]
+
+        with pytest.raises(ValueError):
+            reader.record_at(121)
+
+
+def test_empty_tape(tmp_path):
+    path = tmp_path / "empty.tape"
+    path.write_bytes(b"")
+
+    with TapeReader(path) as reader:
+        assert list(reader) == []
+        assert reader.trailing_bytes == 0
+
+
+def test_failed_mapping_closes_the_file(tape, monkeypatch):
+    path, _ = tape
+    opened = []
+
+    def failing_mmap(*args, **kwargs):
+        raise OSError("cannot map")
+
+    monkeypatch.setattr("ab_race_translator.tape.mmap.mmap", failing_mmap)
+    monkeypatch.setattr("builtins.open", lambda *args: opened.append(io.open(*args)) or opened[-1])
+
+    with pytest.raises(OSError):
+        TapeReader(path)
+    assert opened[0].closed
+
+
+def test_frame_offsets_match_records(tape):
+    path, records = tape
+    path.write_bytes(path.read_bytes() + records[0][:30])
+
+    with TapeReader(path) as reader:
+        offsets, sizes = reader.frame_offsets()
+        assert list(offsets) == [0, 120, 166]
+        assert list(sizes) == [120, 46, 200]
+        assert reader.truncated_offset == 366
+
+        offsets, sizes = reader.frame_offsets(120, 166)
+        assert list(offsets) == [120]
@@ -6,11 +6,50 @@ Provides selection mapping and formatting functionality.
 """
 
 import struct
-from typing import List, Dict, Optional
+import time
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import List, Dict, Optional, Tuple
+from . import metrics as _metrics
 from .constants import *
 from .data_structures import Logab
 
 
+# Maximum number of memoized selection bitmap decodings per DeSelMap
+SELECTION_MEMO_SIZE = 4096
+
+# _BYTE_RUNNERS[pos][byte]: runner strings selected by byte value `byte`
+# at byte position `pos` of a bitmap (bit n selects runner n)
+_BYTE_RUNNERS = tuple(
+    tuple(
+        tuple(f"{pos * 8 + bit:02d}" for bit in range(8)
+              if byte >> bit & 1 and 1 <= pos * 8 + bit <= RDS_MAXFLD)
+        for byte in range(256)
+    )
+    for pos in range(RDS_MAXFLD // 8 + 1)
+)
+
+# _RUNNER_MASKS[n]: bitmap mask selecting runners 1..n
+_RUNNER_MASKS = tuple(((1 << (n + 1)) - 1) & ~1 for n in range(RDS_MAXFLD + 1))
+
+
+def _leg_field_size(fdsz, leg: int) -> int:
+    """
+    Get the field size of one leg from a per-leg list or a single value.
+    
+    Args:
+        fdsz: Field size list, single field size or None
+        leg: Leg index
+        
+    Returns:
+        int: Field size, 0 if unknown
+    """
+    if isinstance(fdsz, int):
+        return fdsz
+    if fdsz and leg < len(fdsz):
+        return fdsz[leg]
+    return 0
+
+
 class DeSelMap:
     """
     Selection mapping utility class.
@@ -18,9 +57,15 @@ class DeSelMap:
     Handles formatting of bet selections from binary bitmaps to human-readable strings.
     """
     
-    def __init__(self):
-        """Initialize the selection mapper."""
-        pass
+    def __init__(self, memo_size: int = SELECTION_MEMO_SIZE):
+        """
+        Initialize the selection mapper.
+        
+        Args:
+            memo_size: Maximum number of memoized bitmap decodings
+        """
+        self.memo_size = max(1, memo_size)
+        self._memo: Dict[Tuple[int, int], str] = {}
     
     def get_selections(self, pMlog: Logab, bet_type: int) -> str:
         """
@@ -41,6 +86,7 @@ class DeSelMap:
             else:
                 return self._format_standard_selections(pMlog)
         except Exception as e:
+            _metrics.record_exception("DeSelMap.get_selections", e)
             return f"ERROR: {str(e)}"
     
     def _format_allup_selections(self, pMlog: Logab) -> str:
@@ -71,14 +117,14 @@ class DeSelMap:
                         bet_type = sel.bettypebu
                         if bet_type in [BETTYP_WIN, BETTYP_PLA, BETTYP_WINPLA, 
                                        BETTYP_BWA, BETTYP_CWA, BETTYP_CWB, BETTYP_CWC]:
-                            race_sel += self._format_simple_selection(sel.sellu, 0)
+                            race_sel += self._format_simple_selection(sel.sellu, 0, sel.fdsz)
                         elif bet_type in [BETTYP_QIN, BETTYP_QPL, BETTYP_TRIO, 
                                          BETTYP_QINQPL, BETTYP_FF, BETTYP_IWN]:
-                            race_sel += self._format_quinella_selection(sel.sellu, sel.ind.bnk1)
+                            race_sel += self._format_quinella_selection(sel.sellu, sel.ind.bnk1, sel.fdsz)
                         elif bet_type == BETTYP_FCT:
-                            race_sel += self._format_extended_selection(sel.sellu, 2, sel.ind.bnk1)
+                            race_sel += self._format_extended_selection(sel.sellu, 2, sel.ind.bnk1, sel.fdsz)
                         else:
-                            race_sel += self._format_simple_selection(sel.sellu, 0)
+                            race_sel += self._format_simple_selection(sel.sellu, 0, sel.fdsz)
                         
                         # Add indicators
                         race_sel += self._format_indicators(sel.ind, True)
@@ -89,6 +135,7 @@ class DeSelMap:
                 return "1*01"  # Default selection
                 
         except Exception as e:
+            _metrics.record_exception("DeSelMap._format_allup_selections", e)
             return "1*01"  # Default on error
     
     def _format_standard_selections(self, pMlog: Logab) -> str:
@@ -110,32 +157,34 @@ class DeSelMap:
                 bet_type = pMlog.data.bt_rac.d.hdr.bettypebu
                 
                 selections = f"{exostd.racebu}*"
+                field_size = _leg_field_size(exostd.fdsz, 0)
                 
                 if bet_type in [BETTYP_WIN, BETTYP_PLA, BETTYP_WINPLA, 
                                BETTYP_BWA, BETTYP_CWA, BETTYP_CWB, BETTYP_CWC]:
-                    selections += self._format_simple_selection(exostd.sellu, 0)
+                    selections += self._format_simple_selection(exostd.sellu, 0, field_size)
                 elif bet_type in [BETTYP_QIN, BETTYP_QPL, BETTYP_TRIO, 
                                  BETTYP_QINQPL, BETTYP_FF]:
                     banker_count = exostd.betexbnk.bnkbu[0] if exostd.betexbnk.bnkbu else 0
-                    selections += self._format_quinella_selection(exostd.sellu, banker_count)
+                    selections += self._format_quinella_selection(exostd.sellu, banker_count, field_size)
                 elif bet_type == BETTYP_IWN:
-                    selections += self._format_quinella_selection(exostd.sellu, 1)
+                    selections += self._format_quinella_selection(exostd.sellu, 1, field_size)
                 elif bet_type == BETTYP_TCE:
                     banker_count = exostd.betexbnk.bnkbu[0] if exostd.betexbnk.bnkbu else 0
-                    selections += self._format_extended_selection(exostd.sellu, 3, banker_count)
+                    selections += self._format_extended_selection(exostd.sellu, 3, banker_count, field_size)
                 elif bet_type == BETTYP_FCT:
                     banker_count = exostd.betexbnk.bnkbu[0] if exostd.betexbnk.bnkbu else 0
-                    selections += self._format_extended_selection(exostd.sellu, 2, banker_count)
+                    selections += self._format_extended_selection(exostd.sellu, 2, banker_count, field_size)
                 elif bet_type == BETTYP_QTT:
                     banker_count = exostd.betexbnk.bnkbu[0] if exostd.betexbnk.bnkbu else 0
-                    selections += self._format_extended_selection(exostd.sellu, 4, banker_count)
+                    selections += self._format_extended_selection(exostd.sellu, 4, banker_count, field_size)
                 elif bet_type in [BETTYP_DBL, BETTYP_TBL, BETTYP_6UP]:
                     # Multi-leg bets
                     leg_count = self._get_leg_count(bet_type)
                     leg_selections = []
                     for i in range(leg_count):
                         if i < len(exostd.sellu):
-                            leg_sel = self._format_simple_selection([exostd.sellu[i]], 0)
+                            leg_sel = self._format_simple_selection(
+                                [exostd.sellu[i]], 0, _leg_field_size(exostd.fdsz, i))
                             leg_selections.append(leg_sel)
                     selections += "/".join(leg_selections)
                 elif bet_type in [BETTYP_TTR, BETTYP_DQN, BETTYP_DTR]:
@@ -144,11 +193,12 @@ class DeSelMap:
                     leg_selections = []
                     for i in range(leg_count):
                         banker_count = exostd.betexbnk.bnkbu[i] if (exostd.betexbnk.bnkbu and i < len(exostd.betexbnk.bnkbu)) else 0
-                        leg_sel = self._format_quinella_selection(exostd.sellu[i*2:(i+1)*2], banker_count)
+                        leg_sel = self._format_quinella_selection(
+                            exostd.sellu[i*2:(i+1)*2], banker_count, _leg_field_size(exostd.fdsz, i))
                         leg_selections.append(leg_sel)
                     selections += "/".join(leg_selections)
                 else:
-                    selections += self._format_simple_selection(exostd.sellu, 0)
+                    selections += self._format_simple_selection(exostd.sellu, 0, field_size)
                 
                 # Add indicators
                 selections += self._format_indicators(exostd.ind, False)
@@ -158,6 +208,7 @@ class DeSelMap:
                 return "1*01"  # Default selection
                 
         except Exception as e:
+            _metrics.record_exception("DeSelMap._format_standard_selections", e)
             return "1*01"  # Default on error
     
     def _format_lottery_selections(self, pMlog: Logab) -> str:
@@ -173,13 +224,15 @@ class DeSelMap:
         # Simplified lottery formatting
         return "01+02+03+04+05+06"
     
-    def _format_simple_selection(self, sellu: List[int], bitmap_pos: int) -> str:
+    def _format_simple_selection(self, sellu: List[int], bitmap_pos: int,
+                                 field_size: int = 0) -> str:
         """
         Format simple selection bitmap.
         
         Args:
             sellu: Selection bitmap array
             bitmap_pos: Position in bitmap array
+            field_size: Number of runners in the race, 0 if unknown
             
         Returns:
             str: Formatted selection string
@@ -187,26 +240,57 @@ class DeSelMap:
         if not sellu or bitmap_pos >= len(sellu):
             return "01"
         
-        selections = []
-        bitmap = sellu[bitmap_pos]
+        return self._decode_bitmap(sellu[bitmap_pos], field_size)
+    
+    def _decode_bitmap(self, bitmap: int, field_size: int = 0) -> str:
+        """
+        Decode a selection bitmap into "+"-joined runner numbers.
         
-        # Check each bit position (horses 1-64)
-        for horse in range(1, RDS_MAXFLD + 1):
-            if bitmap & (1 << horse):
-                selections.append(f"{horse:02d}")
+        Bit n selects runner n. The bitmap is decoded a byte at a time from
+        precomputed runner tables, considering only runners 1..field_size
+        (1..RDS_MAXFLD when the field size is unknown). Results are memoized
+        since favourite combinations recur heavily within a race.
         
-        if not selections:
-            return "01"
+        Args:
+            bitmap: Selection bitmap
+            field_size: Number of runners in the race, 0 if unknown
+            
+        Returns:
+            str: Formatted selection string, "01" if no runner is selected
+        """
+        limit = field_size if 0 < field_size < RDS_MAXFLD else RDS_MAXFLD
+        key = (bitmap, limit)
+        memo = self._memo
+        text = memo.get(key)
+        if text is not None:
+            return text
         
-        return "+".join(selections)
+        bits = bitmap & _RUNNER_MASKS[limit]
+        runners: List[str] = []
+        pos = 0
+        while bits:
+            byte = bits & 0xFF
+            if byte:
+                runners.extend(_BYTE_RUNNERS[pos][byte])
+            bits >>= 8
+            pos += 1
+        
+        text = "+".join(runners) if runners else "01"
+        
+        if len(memo) >= self.memo_size:
+            del memo[next(iter(memo))]
+        memo[key] = text
+        return text
     
-    def _format_quinella_selection(self, sellu: List[int], num_bankers: int) -> str:
+    def _format_quinella_selection(self, sellu: List[int], num_bankers: int,
+                                   field_size: int = 0) -> str:
         """
         Format quinella-type selection with bankers.
         
         Args:
             sellu: Selection bitmap array
             num_bankers: Number of banker bitmaps
+            field_size: Number of runners in the race, 0 if unknown
             
         Returns:
             str: Formatted quinella selection
@@ -218,18 +302,19 @@ class DeSelMap:
         
         if num_bankers == 0:
             # No bankers, format as simple selection
-            return self._format_simple_selection(sellu, 0)
+            return self._format_simple_selection(sellu, 0, field_size)
         else:
             # Format bankers and other selections
             for i in range(min(2, len(sellu))):
-                sel_part = self._format_simple_selection(sellu, i)
+                sel_part = self._format_simple_selection(sellu, i, field_size)
                 selections.append(sel_part)
                 if i < len(sellu) - 1:
                     selections.append(">")  # Banker separator
         
         return "".join(selections)
     
-    def _format_extended_selection(self, sellu: List[int], num_bitmaps: int, num_bankers: int) -> str:
+    def _format_extended_selection(self, sellu: List[int], num_bitmaps: int, num_bankers: int,
+                                   field_size: int = 0) -> str:
         """
         Format extended selection (TCE/QTT/FCT).
         
@@ -237,6 +322,7 @@ class DeSelMap:
             sellu: Selection bitmap array
             num_bitmaps: Number of bitmaps to process
             num_bankers: Number of banker selections
+            field_size: Number of runners in the race, 0 if unknown
             
         Returns:
             str: Formatted extended selection
@@ -248,7 +334,7 @@ class DeSelMap:
         
         # Process each bitmap
         for i in range(min(num_bitmaps, len(sellu))):
-            sel_part = self._format_simple_selection(sellu, i)
+            sel_part = self._format_simple_selection(sellu, i, field_size)
             selections.append(sel_part)
         
         # Add banker separators if needed
@@ -282,8 +368,8 @@ class DeSelMap:
                 indicators += "F"
             if hasattr(ind, 'mul1') and ind.mul1:
                 indicators += "M"
-        except:
-            pass
+        except Exception as e:
+            _metrics.record_exception("DeSelMap._format_indicators", e)
         
         return indicators
     
@@ -309,6 +395,126 @@ class DeSelMap:
             return 1
 
 
+_EPOCH = datetime(1970, 1, 1)
+
+
+class TimestampFormatter:
+    """
+    Cached formatter for message timestamps and dates.
+    
+    Logger tapes are time-ordered, so consecutive messages mostly share the
+    same second and day. Formatted "DD-Mon-YYYY HH:MM:SS" strings are cached
+    per second and "DD-Mon-YYYY" day prefixes per calendar day, both with a
+    bounded size; the oldest entry is evicted first.
+    
+    With tz=None times are rendered in the process local timezone, as
+    time.localtime does. A fixed-offset datetime.timezone is rendered with
+    plain arithmetic, and any other tzinfo through datetime.fromtimestamp.
+    """
+    
+    def __init__(self, tz: Optional[tzinfo] = None, maxsize: int = 4096):
+        """
+        Initialize the formatter.
+        
+        Args:
+            tz: Timezone to render times in, None for local time
+            maxsize: Maximum number of cached seconds and of cached days
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        
+        self.tz = tz
+        self.maxsize = maxsize
+        self._offset: Optional[int] = None
+        if isinstance(tz, timezone):
+            offset = tz.utcoffset(None)
+            self._offset = offset.days * 86400 + offset.seconds
+        
+        self._seconds: Dict[int, str] = {}
+        self._days: Dict[Tuple[int, int, int], str] = {}
+        self._last_time: Optional[int] = None
+        self._last_str = ""
+    
+    def _cache_put(self, cache: dict, key, value: str):
+        """Insert into a bounded cache, evicting the oldest entry when full."""
+        if len(cache) >= self.maxsize:
+            del cache[next(iter(cache))]
+        cache[key] = value
+    
+    def format_date(self, day: int, month: int, year: int) -> str:
+        """
+        Format a calendar date as DD-Mon-YYYY.
+        
+        Args:
+            day: Day of month
+            month: Month number (1-12)
+            year: Year
+            
+        Returns:
+            str: Formatted date
+        """
+        key = (day, month, year)
+        prefix = self._days.get(key)
+        if prefix is None:
+            prefix = f"{day:02d}-{MONTH_NAMES[month]}-{year}"
+            self._cache_put(self._days, key, prefix)
+        return prefix
+    
+    def _fields(self, timestamp: int) -> Tuple[int, int, int, int, int, int]:
+        """
+        Break a timestamp into (year, month, day, hour, minute, second).
+        
+        Args:
+            timestamp: Epoch seconds
+            
+        Returns:
+            Tuple[int, int, int, int, int, int]: Calendar fields in self.tz
+        """
+        if self.tz is None:
+            return time.localtime(timestamp)[:6]
+        
+        if self._offset is not None:
+            local = timestamp + self._offset
+            days, seconds = divmod(local, 86400)
+            date = _EPOCH + timedelta(days=days)
+            hour, rem = divmod(seconds, 3600)
+            return (date.year, date.month, date.day, hour, rem // 60, rem % 60)
+        
+        dt = datetime.fromtimestamp(timestamp, self.tz)
+        return (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+    
+    def format_datetime(self, timestamp: int) -> str:
+        """
+        Format a timestamp as DD-Mon-YYYY HH:MM:SS.
+        
+        Args:
+            timestamp: Epoch seconds
+            
+        Returns:
+            str: Formatted date and time
+        """
+        if timestamp == self._last_time:
+            return self._last_str
+        
+        text = self._seconds.get(timestamp)
+        if text is None:
+            year, month, day, hour, minute, second = self._fields(timestamp)
+            text = f"{self.format_date(day, month, year)} {hour:02d}:{minute:02d}:{second:02d}"
+            self._cache_put(self._seconds, timestamp, text)
+        
+        self._last_time = timestamp
+        self._last_str = text
+        return text
+    
+    def clear(self):
+        """Drop all cached strings."""
+        self._seconds.clear()
+        self._days.clear()
+        self._last_time = None
+        self._last_str = ""
+
+
+
 class BinaryParser:
     """
     Utility class for parsing binary data.
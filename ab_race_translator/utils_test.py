@@ -0,0 +1,84 @@
+import pytest
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from ab_race_translator.constants import MONTH_NAMES, RDS_MAXFLD
+from ab_race_translator.utils import DeSelMap, TimestampFormatter
+
+
+def _reference(tm):
+    return (f"{tm.tm_mday:02d}-{MONTH_NAMES[tm.tm_mon]}-{tm.tm_year} "
+            f"{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}")
+
+
+def test_local_time_matches_localtime():
+    formatter = TimestampFormatter()
+
+    for ts in (0, 1700000000, 1700000001, 1700000000, 1719999999, 1711846800):
+        assert formatter.format_datetime(ts) == _reference(time.localtime(ts))
+
+
+def test_fixed_offset_timezone():
+    hkt = timezone(timedelta(hours=8))
+    formatter = TimestampFormatter(tz=hkt)
+
+    for ts in (0, 1700000000, 1700056799, 1700056800, -86401):
+        expected = datetime.fromtimestamp(ts, hkt).strftime("%d-%b-%Y %H:%M:%S")
+        assert formatter.format_datetime(ts) == expected
+
+
+def test_format_date():
+    formatter = TimestampFormatter()
+
+    assert formatter.format_date(5, 6, 2024) == "05-Jun-2024"
+    assert formatter.format_date(5, 6, 2024) == "05-Jun-2024"
+    with pytest.raises(IndexError):
+        formatter.format_date(1, 13, 2024)
+
+
+def test_caches_are_bounded():
+    formatter = TimestampFormatter(tz=timezone.utc, maxsize=8)
+
+    for ts in range(1700000000, 1700000000 + 86400 * 20, 3600):
+        formatter.format_datetime(ts)
+
+    assert len(formatter._seconds) == 8
+    assert len(formatter._days) <= 8
+    assert formatter.format_datetime(1700000000) == "14-Nov-2023 22:13:20"
+
+
+def _bitwise_selection(bitmap, field_size=0):
+    limit = field_size or RDS_MAXFLD
+    sel = [f"{h:02d}" for h in range(1, min(limit, RDS_MAXFLD) + 1) if bitmap >> h & 1]
+    return "+".join(sel) if sel else "01"
+
+
+def test_selection_bitmap_decoding():
+    desel = DeSelMap()
+
+    assert desel._format_simple_selection([0], 0) == "01"
+    assert desel._format_simple_selection([1], 0) == "01"
+    assert desel._format_simple_selection([0b1010], 0) == "01+03"
+    assert desel._format_simple_selection([1 << 64 | 1 << 9], 0) == "09+64"
+    for bitmap in (0xFFFFFFFFFFFFFFFF, 0x5555AAAA5555AAAA, 1 << 63, 0x1FE00):
+        assert desel._format_simple_selection([bitmap], 0) == _bitwise_selection(bitmap)
+
+
+def test_selection_bounded_by_field_size():
+    desel = DeSelMap()
+    bitmap = 1 << 2 | 1 << 14 | 1 << 15 | 1 << 40
+
+    assert desel._format_simple_selection([bitmap], 0, 14) == "02+14"
+    assert desel._format_simple_selection([bitmap], 0, 0) == "02+14+15+40"
+    assert desel._format_simple_selection([1 << 20], 0, 14) == "01"
+    assert desel._format_extended_selection([bitmap, 1 << 3 | 1 << 16], 2, 1, 14) == "02+14>03"
+
+
+def test_selection_memo_is_bounded():
+    desel = DeSelMap(memo_size=16)
+
+    for bitmap in range(0, 4096, 2):
+        assert desel._format_simple_selection([bitmap], 0) == _bitwise_selection(bitmap)
+
+    assert len(desel._memo) == 16
@@ -0,0 +1,279 @@
+"""
+Vectorized Tape Decoder
+
+Decodes the fixed-offset part of every racing record of a tape into NumPy
+columns in one pass, instead of building a Logab object graph per message.
+The LOGAB header and the BETHDR sit at the same offsets in every LOGAB_RAC
+record, so after framing
+the tape (TapeReader.frame_offsets) those bytes are gathered into a
+contiguous array and viewed through a structured dtype derived from the
+compiled layouts in layouts.py.
+
+Bet bodies are not decoded here, as they are not by StructParser; use
+TapeColumns.parse to decode single records with the scalar StructParser.
+
+NumPy is an optional dependency: pip install ab-race-translator[numpy]
+"""
+
+from typing import Dict, Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from .constants import LOGAB_CODE_RAC
+from .data_structures import Buffer, Logab, StructParser
+from .layouts import BETHDR, LOGAB_HDR, RAC_BETHDR_OFFSET, StructLayout
+from .tape import TapeReader
+
+# Records gathered per chunk; bounds the temporary index array
+DEFAULT_CHUNK_SIZE = 65536
+
+# struct format character -> NumPy scalar type (byte order added separately)
+_NUMPY_CODES = {
+    "B": "u1", "b": "i1", "H": "u2", "h": "i2", "I": "u4", "i": "i4",
+    "L": "u4", "l": "i4", "Q": "u8", "q": "i8", "?": "u1",
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "The vectorized decoder requires NumPy: "
+            "pip install ab-race-translator[numpy]")
+
+
+def layout_dtype(layout: StructLayout) -> "np.dtype":
+    """
+    Build the NumPy structured dtype of a compiled layout.
+
+    Arrays become subarray fields and nested layouts nested dtypes, at the
+    same byte offsets as the packed C++ structure.
+
+    Args:
+        layout: Compiled layout
+
+    Returns:
+        np.dtype: Structured dtype with itemsize == layout.size
+    """
+    _require_numpy()
+    names, formats, offsets = [], [], []
+
+    for spec in layout.fields:
+        name, code = spec[0], spec[1]
+        count = layout.counts[name]
+        if isinstance(code, StructLayout):
+            base = layout_dtype(code)
+        else:
+            base = np.dtype(layout.byte_order + _NUMPY_CODES[code])
+
+        names.append(name)
+        formats.append((base, (count,)) if count > 1 else base)
+        offsets.append(layout.offsets[name])
+
+    return np.dtype({"names": names, "formats": formats,
+                     "offsets": offsets, "itemsize": layout.size})
+
+
+def _racing_prefix_dtype() -> "np.dtype":
+    """
+    Flat dtype of the fixed-offset prefix of a LOGAB_RAC record.
+
+    Returns:
+        np.dtype: LOGAB header and BETHDR fields
+    """
+    names, formats, offsets = [], [], []
+
+    def add(layout: StructLayout, base: int, fields):
+        codes = {spec[0]: spec[1] for spec in layout.fields}
+        for name in fields:
+            code = codes[name]
+            names.append(name)
+            formats.append(np.dtype(layout.byte_order + _NUMPY_CODES[code]))
+            offsets.append(base + layout.field_offset(name))
+
+    add(LOGAB_HDR, 0, LOGAB_HDR.field_names())
+    add(BETHDR, RAC_BETHDR_OFFSET, BETHDR.field_names())
+
+    itemsize = max(offset + fmt.itemsize for offset, fmt in zip(offsets, formats))
+    return np.dtype({"names": names, "formats": formats,
+                     "offsets": offsets, "itemsize": itemsize})
+
+
+# Dtype of the decoded racing prefix, None without NumPy
+RAC_PREFIX_DTYPE = _racing_prefix_dtype() if np is not None else None
+
+# (field name, end offset) of every prefix field
+_FIELD_ENDS = tuple(
+    (name, RAC_PREFIX_DTYPE.fields[name][1] + RAC_PREFIX_DTYPE.fields[name][0].itemsize)
+    for name in RAC_PREFIX_DTYPE.names
+) if np is not None else ()
+
+
+class TapeColumns:
+    """
+    Columnar decode of the fixed-offset fields of a tape.
+
+    records is a structured array with one row per framed record; header
+    fields are filled for every record, bet fields only for LOGAB_RAC
+    records. Fields a record is too short to contain are zero (the scalar
+    parser substitutes defaults there instead). Individual columns are available by name:
+
+        columns["costlu"], columns["bettypebu"], columns["ltnlu"]
+    """
+
+    def __init__(self, records: "np.ndarray", offsets: "np.ndarray",
+                 sizes: "np.ndarray", reader: Optional[TapeReader] = None):
+        """
+        Initialize the columns.
+
+        Args:
+            records: Decoded prefix rows (RAC_PREFIX_DTYPE)
+            offsets: Byte offset of each record
+            sizes: Size of each record in bytes
+            reader: Tape the records were decoded from, for scalar fallback
+        """
+        self.records = records
+        self.offsets = offsets
+        self.sizes = sizes
+        self.reader = reader
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def racing(self) -> "np.ndarray":
+        """np.ndarray: Boolean mask of LOGAB_RAC records."""
+        return self.records["codewu"] == LOGAB_CODE_RAC
+
+    def __getitem__(self, name: str) -> "np.ndarray":
+        return self.records[name]
+
+    def columns(self) -> Dict[str, "np.ndarray"]:
+        """
+        Get every column as a contiguous array.
+
+        Returns:
+            Dict[str, np.ndarray]: Column name to values
+        """
+        result = {name: np.ascontiguousarray(self.records[name])
+                  for name in self.records.dtype.names}
+        result["offset"] = self.offsets
+        return result
+
+    def parse(self, index: int) -> Logab:
+        """
+        Decode one record completely with the scalar parser.
+
+        Args:
+            index: Row index
+
+        Returns:
+            Logab: Parsed LOGAB structure
+        """
+        if self.reader is None:
+            raise ValueError("Scalar fallback needs the TapeReader the columns came from")
+        reader = self.reader
+        return StructParser.parse_logab_from_msg(
+            reader.to_msg(reader.record_at(int(self.offsets[index]))))
+
+
+def _gather(data: "np.ndarray", offsets: "np.ndarray", sizes: "np.ndarray") -> "np.ndarray":
+    """
+    Gather the fixed-offset prefix of a chunk of records.
+
+    Fields that do not lie entirely within their record, and the bet
+    fields of non-racing records, are zero.
+
+    Args:
+        data: Whole tape as a uint8 array
+        offsets: Record offsets of the chunk
+        sizes: Record sizes of the chunk
+
+    Returns:
+        np.ndarray: Decoded rows (RAC_PREFIX_DTYPE)
+    """
+    columns = np.arange(RAC_PREFIX_DTYPE.itemsize, dtype=np.int64)
+    index = offsets[:, None] + columns
+    np.minimum(index, len(data) - 1, out=index)
+    records = data[index].view(RAC_PREFIX_DTYPE)[:, 0]
+
+    not_racing = records["codewu"] != LOGAB_CODE_RAC
+    for name, end in _FIELD_ENDS:
+        missing = sizes < end
+        if end > LOGAB_HDR.size:
+            missing |= not_racing
+        records[name][missing] = 0
+    return records
+
+
+def iter_decode_buffer(data: Buffer, offsets, sizes,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator["np.ndarray"]:
+    """
+    Decode framed records of a buffer in chunks.
+
+    Args:
+        data: Buffer holding the records, e.g. a tape mapping
+        offsets: Record offsets (any sequence or buffer of integers)
+        sizes: Record sizes
+        chunk_size: Records decoded per chunk
+
+    Yields:
+        np.ndarray: Decoded rows (RAC_PREFIX_DTYPE) of each chunk
+    """
+    _require_numpy()
+    data = np.frombuffer(data, dtype=np.uint8)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+
+    for start in range(0, len(offsets), chunk_size):
+        end = start + chunk_size
+        yield _gather(data, offsets[start:end], sizes[start:end])
+
+
+def decode_buffer(data: Buffer, offsets, sizes,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> TapeColumns:
+    """
+    Decode framed records of a buffer into columns.
+
+    Args:
+        data: Buffer holding the records, e.g. a tape mapping
+        offsets: Record offsets (any sequence or buffer of integers)
+        sizes: Record sizes
+        chunk_size: Records decoded per chunk
+
+    Returns:
+        TapeColumns: Decoded columns
+    """
+    _require_numpy()
+    offsets = np.asarray(offsets, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+
+    if len(offsets) == 0:
+        records = np.zeros(0, dtype=RAC_PREFIX_DTYPE)
+    else:
+        records = np.concatenate(list(iter_decode_buffer(data, offsets, sizes, chunk_size)))
+    return TapeColumns(records, offsets, sizes)
+
+
+def decode_tape(reader: TapeReader, start_offset: int = 0,
+                end_offset: Optional[int] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> TapeColumns:
+    """
+    Decode the fixed-offset fields of every record of a tape.
+
+    Args:
+        reader: Open tape reader
+        start_offset: Byte offset of the first record
+        end_offset: Stop before the record starting at or after this offset
+        chunk_size: Records decoded per chunk
+
+    Returns:
+        TapeColumns: Decoded columns, with reader set for scalar fallback
+    """
+    _require_numpy()
+    offsets, sizes = reader.frame_offsets(start_offset, end_offset)
+    columns = decode_buffer(reader.buffer, offsets, sizes, chunk_size)
+    columns.reader = reader
+    return columns
@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ab_race_translator.bench.corpus import build_corpus
+from ab_race_translator.constants import LOGAB_CODE_RAC
+from ab_race_translator.data_structures import StructParser
+from ab_race_translator.layouts import BETHDR, LOGAB_HDR, RAC_BETHDR_OFFSET
+from ab_race_translator.tape import TapeReader
+from ab_race_translator.vectorized import decode_buffer, decode_tape, layout_dtype
+
+
+@pytest.fixture
+def tape(tmp_path):
+    records = [msg.m_cpBuf for msg in build_corpus(500, seed=11)]
+
+    # Non-racing record followed by trailing bytes that must not leak into it
+    other = bytearray(60)
+    LOGAB_HDR.struct.pack_into(other, 0, 60, 1, 0, 0, 0, 7, 0, 0, 0, 0, 0)
+    other[LOGAB_HDR.size:] = b"\xff" * (60 - LOGAB_HDR.size)
+    records.insert(3, bytes(other))
+
+    path = tmp_path / "sys1.tape"
+    path.write_bytes(b"".join(records))
+    return path
+
+
+def test_layout_dtype_matches_layout():
+    dtype = layout_dtype(LOGAB_HDR)
+
+    assert dtype.itemsize == LOGAB_HDR.size
+    assert dtype.fields["ltnlu"][1] == LOGAB_HDR.field_offset("ltnlu")
+    assert layout_dtype(BETHDR).fields["bettypebu"][1] == BETHDR.field_offset("bettypebu")
+
+
+def test_columns_match_scalar_parser(tape):
+    with TapeReader(tape) as reader:
+        columns = decode_tape(reader, chunk_size=64)
+        assert len(columns) == 501
+
+        for i, record in enumerate(reader):
+            logab = StructParser.parse_logab_from_msg(reader.to_msg(record))
+            assert columns["codewu"][i] == logab.hdr.codewu
+            assert columns["ltnlu"][i] == logab.hdr.ltnlu
+            assert columns["acclu"][i] == logab.hdr.acclu
+
+            if logab.data.bt_rac is None:
+                assert columns["costlu"][i] == 0
+                assert columns["bettypebu"][i] == 0
+                continue
+
+            bet = logab.data.bt_rac.d
+            assert columns["totdu"][i] == bet.hdr.totdu
+            assert columns["costlu"][i] == bet.hdr.costlu
+            assert columns["bettypebu"][i] == bet.hdr.bettypebu
+
+        assert columns.racing.sum() == 500
+        # The message time offset is not confirmed, so it is not decoded
+        assert "timelu" not in columns.columns()
+        assert columns.parse(3).hdr.ltnlu == 7
+
+
+def test_short_records_zero_missing_fields():
+    size = RAC_BETHDR_OFFSET + BETHDR.field_offset("bettypebu")
+    record = bytearray(build_corpus(1, seed=3)[0].m_cpBuf[:size])
+    LOGAB_HDR.struct.pack_into(record, 0, size, LOGAB_CODE_RAC, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    columns = decode_buffer(bytes(record) * 2, [0, size], [size, size])
+
+    assert list(columns["codewu"]) == [LOGAB_CODE_RAC] * 2
+    assert columns["costlu"][0] > 0
+    assert list(columns["bettypebu"]) == [0, 0]
+
+
+def test_empty_tape(tmp_path):
+    path = tmp_path / "empty.tape"
+    path.write_bytes(b"")
+
+    with TapeReader(path) as reader:
+        columns = decode_tape(reader)
+
+    assert len(columns) == 0
+    assert set(columns.columns()) >= {"codewu", "costlu", "bettypebu", "offset"}
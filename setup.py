@@ -63,11 +63,17 @@ setup(
         'build': [
             'build>=0.10.0',
             'twine>=4.0.0',
-        ]
+        ],
+        'numpy': [
+            'numpy>=1.20.0',
+        ],
+        'arrow': [
+            'pyarrow>=8.0.0',
+        ],
     },
     entry_points={
         'console_scripts': [
-            'ab-race-translate=ab_race_translator.example_usage:main',
+            'ab-race-translate=ab_race_translator.cli:main',
         ],
     },
     package_data={